@@ -6,14 +6,13 @@
 
 # System imports...
 import argparse
-import base64
 from pprint import pprint
 import sys
 
 # Other imports...
 import attr
 import helios
-from helios_client_utilities.common import add_common_arguments, zeroconf_find_server
+from helios_client_utilities.common import add_common_arguments, add_song_from_file, zeroconf_find_server
 from termcolor import colored
 from tqdm import tqdm
 
@@ -104,9 +103,8 @@ def main():
         # Progress bar to be allocated by tqdm as soon as we know the total size...
         progress_bar = None
 
-        # Prepare new song data...
+        # Prepare new song data. The file itself is streamed from disk...
         new_song_dict = {
-            'file': base64.b64encode(open(arguments.song_file, 'rb').read()).decode('ascii'),
             'reference': arguments.song_reference
         }
 
@@ -140,8 +138,10 @@ def main():
             progress_bar.refresh()
 
         # Submit the song...
-        stored_song = client.add_song(
+        stored_song = add_song_from_file(
+            client,
             new_song_dict=new_song_dict,
+            song_path=arguments.song_file,
             store=arguments.store,
             progress_callback=progress_callback)
 
@@ -0,0 +1,468 @@
+#!/usr/bin/python3
+#
+#   Helios, intelligent music.
+#   Copyright (C) 2015-2024 Cartesian Theatre. All rights reserved.
+#
+
+# System imports...
+import argparse
+import collections
+import concurrent.futures
+import logging
+import os
+import re
+import sqlite3
+import sys
+import time
+
+# Other imports...
+from helios_client_utilities.common import format_catalogue_field, get_cache_directory, get_song_reference, get_version, song_file_extensions
+import mutagen
+
+# i18n...
+import gettext
+_ = gettext.gettext
+
+# Column fields written to the catalogue, in the order helios-import-songs(1)
+#  documents them...
+catalogue_field_names = [
+    'reference',
+    'album',
+    'artist',
+    'title',
+    'genre',
+    'isrc',
+    'beats_per_minute',
+    'year',
+    'path'
+]
+
+# Tag fields read from each song, in the order they are cached...
+tag_field_names = [
+    'album',
+    'artist',
+    'title',
+    'genre',
+    'isrc',
+    'beats_per_minute',
+    'year'
+]
+
+# Add arguments specific to this utility to argument parser...
+def add_arguments(argument_parser):
+
+    # Define positional argument for music directory...
+    argument_parser.add_argument(
+        'directory',
+        help=_('Path to directory of songs to catalogue.'))
+
+    # Define behaviour for --absolute-path...
+    argument_parser.add_argument(
+        '--absolute-path',
+        action='store_true',
+        default=False,
+        dest='absolute_path',
+        help=_('Write absolute path to each song in generated CSV instead of '
+               'the path relative to the current directory.'))
+
+    # Define behaviour for --cache...
+    argument_parser.add_argument(
+        '--cache',
+        default=None,
+        dest='cache_path',
+        nargs='?',
+        help=_('Path to local cache of tags read from each song, keyed by its '
+               'size and modification time. Defaults to one in the user\'s '
+               'cache directory.'))
+
+    # Define behaviour for --no-cache...
+    argument_parser.add_argument(
+        '--no-cache',
+        action='store_false',
+        default=True,
+        dest='cache',
+        help=_('Read the tags of every song, neither using nor updating the '
+               'cache.'))
+
+    # Define behaviour for --output-csv...
+    argument_parser.add_argument(
+        '--output-csv',
+        default=None,
+        dest='output_csv',
+        nargs='?',
+        help=_('CSV file to write the catalogue to. Defaults to standard '
+               'output.'))
+
+    # Define behaviour for --processes...
+    argument_parser.add_argument(
+        '--processes',
+        default=0,
+        dest='processes',
+        nargs='?',
+        type=int,
+        help=_('Number of processes reading tags in parallel. Defaults to the '
+               'number of logical cores.'))
+
+    # Define behaviour for --reference-prefix...
+    argument_parser.add_argument(
+        '--reference-prefix',
+        default='',
+        dest='reference_prefix',
+        nargs='?',
+        help=_('Prefix for every generated song reference.'))
+
+    # Define behaviour for --verbose...
+    argument_parser.add_argument(
+        '--verbose',
+        action='store_true',
+        default=False,
+        dest='verbose',
+        help=_('Be verbose by showing additional information.'))
+
+    # Define behaviour for --version...
+    argument_parser.add_argument(
+        '--version',
+        action='version',
+        version=get_version())
+
+# Local cache of the tags read from each song file. A song's entry is only
+#  valid while its size and modification time are unchanged...
+class TagCache:
+
+    # Constructor...
+    def __init__(self, path):
+
+        # Create the directory to hold it, if necessary...
+        directory = os.path.dirname(os.path.abspath(path))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        # Open or create the database...
+        self._connection = sqlite3.connect(database=path)
+
+        # Write-ahead logging keeps commits cheap...
+        self._connection.execute('PRAGMA journal_mode=WAL;')
+        self._connection.execute('PRAGMA synchronous=NORMAL;')
+
+        # Create schema if this is a new cache...
+        self._connection.execute(
+        """
+            CREATE TABLE IF NOT EXISTS songs (
+                path                TEXT PRIMARY KEY NOT NULL,
+                size                INTEGER NOT NULL,
+                mtime               INTEGER NOT NULL,
+                album               TEXT,
+                artist              TEXT,
+                title               TEXT,
+                genre               TEXT,
+                isrc                TEXT,
+                beats_per_minute    INTEGER,
+                year                INTEGER
+            );
+        """)
+
+    # Close the cache...
+    def close(self):
+        if self._connection:
+            self._connection.close()
+            self._connection = None
+
+    # Look up the given list of tuples of path, size, and modification time.
+    #  Returns a dictionary of tag dictionaries for each path still valid...
+    def get_tags(self, files):
+
+        # Look up every path at once...
+        cursor = self._connection.execute(
+            F"SELECT path, size, mtime, {', '.join(tag_field_names)} FROM songs WHERE path IN ({', '.join('?' * len(files))});",
+            [path for path, size, mtime in files])
+        rows = { row[0]: row for row in cursor }
+
+        # Keep those whose files haven't changed since...
+        tags = {}
+        for path, size, mtime in files:
+            row = rows.get(path)
+            if row is not None and row[1] == size and row[2] == mtime:
+                tags[path] = dict(zip(tag_field_names, row[3:]))
+
+        # Done...
+        return tags
+
+    # Store the tags read from each file in a list of tuples of path, size,
+    #  modification time, and tag dictionary...
+    def put_tags(self, files):
+        with self._connection:
+            self._connection.executemany(
+                F"INSERT OR REPLACE INTO songs (path, size, mtime, {', '.join(tag_field_names)}) "
+                F"VALUES (?, ?, ?, {', '.join('?' * len(tag_field_names))});",
+                [(path, size, mtime, *[tags[key] for key in tag_field_names]) for path, size, mtime, tags in files])
+
+# Get the default path of the tag cache...
+def get_default_cache_path():
+    return os.path.join(get_cache_directory(), 'tags.db')
+
+# Walk the given directory and yield a tuple of path, size, and modification
+#  time of every song file under it in a stable order...
+def find_song_files(directory):
+
+    # Directory entries, sorted so the catalogue is the same on every run...
+    try:
+        entries = sorted(os.scandir(directory), key=lambda entry: entry.name)
+    except OSError as some_exception:
+        logging.warning(_(F"Could not read {directory} ({str(some_exception)})."))
+        return
+
+    # Visit each...
+    for entry in entries:
+
+        # Descend into subdirectories...
+        if entry.is_dir(follow_symlinks=False):
+            yield from find_song_files(entry.path)
+
+        # Song file...
+        elif entry.name.lower().endswith(song_file_extensions) and entry.is_file():
+            file_stat = entry.stat()
+            yield entry.path, file_stat.st_size, file_stat.st_mtime_ns
+
+# Get the first value of a tag, or None if it isn't present or is empty...
+def get_first_tag(tags, key):
+
+    # Not present...
+    values = tags.get(key)
+    if not values:
+        return None
+
+    # Take the first value of a list...
+    if isinstance(values, list):
+        values = values[0]
+
+    # Tags can't span lines in the catalogue...
+    value = ' '.join(str(values).split())
+    return value or None
+
+# Read the tags of each of the given song files. This runs in a worker process.
+#  Returns a list of tag dictionaries. A song whose tags can't be read gets an
+#  empty one, so the server can still try to detect them itself...
+def read_song_tags(paths):
+
+    # Tags for each song...
+    tags_list = []
+
+    # Read each song...
+    for path in paths:
+
+        # Every field starts empty...
+        song_tags = dict.fromkeys(tag_field_names)
+
+        # Try to read its tags. The easy interface maps each format's own tag
+        #  names to common ones...
+        try:
+            audio = mutagen.File(path, easy=True)
+            tags = audio.tags if audio is not None and audio.tags is not None else {}
+
+            # Text fields...
+            for key in ('album', 'artist', 'title', 'genre', 'isrc'):
+                song_tags[key] = get_first_tag(tags, key)
+
+            # Tempo, which may be fractional...
+            bpm = get_first_tag(tags, 'bpm')
+            if bpm is not None:
+                try:
+                    song_tags['beats_per_minute'] = int(round(float(bpm)))
+                except ValueError:
+                    pass
+
+            # Year, from a date that may be more specific...
+            date = get_first_tag(tags, 'date') or get_first_tag(tags, 'year')
+            match = re.match(r'\d{4}', date or '')
+            if match:
+                song_tags['year'] = int(match.group(0))
+
+        # Couldn't read it...
+        except Exception as some_exception:
+            logging.warning(_(F"Could not read tags of {path} ({str(some_exception)})."))
+
+        # Add to list...
+        tags_list.append(song_tags)
+
+    # Done...
+    return tags_list
+
+# Main function...
+def main():
+
+    # Initialize the argument parser...
+    argument_parser = argparse.ArgumentParser(
+        description=_('Generate a catalogue for helios-import-songs(1) from the tags of a directory of songs.'))
+
+    # Add arguments specific to this utility to argument parser...
+    add_arguments(argument_parser)
+
+    # Parse the command line...
+    arguments = argument_parser.parse_args()
+
+    # Setup logging...
+    logging_format = "%(asctime)s: %(message)s"
+    if arguments.verbose:
+        logging.basicConfig(format=logging_format, level=logging.DEBUG, datefmt="%H:%M:%S")
+    else:
+        logging.basicConfig(format=logging_format, level=logging.INFO, datefmt="%H:%M:%S")
+
+    # Success flag to determine exit code...
+    success = False
+
+    # Tag cache, if one is kept...
+    cache = None
+
+    # Output file...
+    output_file = None
+
+    # Try to catalogue the directory...
+    try:
+
+        # Check the directory exists...
+        if not os.path.isdir(arguments.directory):
+            raise NotADirectoryError(_(F"{arguments.directory} is not a directory."))
+
+        # Open the tag cache, unless user asked us not to keep one...
+        if arguments.cache:
+            if arguments.cache_path is None:
+                arguments.cache_path = get_default_cache_path()
+            cache = TagCache(arguments.cache_path)
+            logging.info(_(F"Using tag cache {arguments.cache_path}..."))
+
+        # Open the output file, or use standard output...
+        if arguments.output_csv:
+            output_file = open(arguments.output_csv, 'w', encoding='utf-8')
+        else:
+            output_file = sys.stdout
+
+        # Number of processes to read tags with...
+        processes = arguments.processes or os.cpu_count() or 1
+
+        # Number of songs handed to a worker process at a time, and the most
+        #  batches to have in flight before writing out the oldest...
+        batch_size          = 64
+        batches_maximum     = processes * 4
+
+        # Statistics...
+        songs_total     = 0
+        songs_cached    = 0
+        started         = time.monotonic()
+
+        # References already written, so duplicates can be numbered...
+        references = set()
+
+        # Start with the column fields...
+        print(','.join(catalogue_field_names), file=output_file)
+
+        # Write out the songs in a batch once all of their tags are known...
+        def write_batch(files, cached_tags, future):
+
+            # Tags read by a worker process for those not in the cache...
+            read_files = [(path, size, mtime) for path, size, mtime in files if path not in cached_tags]
+            read_tags = dict(zip((path for path, size, mtime in read_files), future.result() if future else []))
+
+            # Remember them for next time...
+            if cache and read_files:
+                cache.put_tags([(path, size, mtime, read_tags[path]) for path, size, mtime in read_files])
+
+            # Write each song out in order...
+            for path, size, mtime in files:
+
+                # Its tags...
+                song_tags = cached_tags.get(path) or read_tags[path]
+
+                # Its reference, numbered if another song already has it so
+                #  that the catalogue can still be imported...
+                reference = get_song_reference(
+                    arguments.reference_prefix, os.path.relpath(path, arguments.directory))
+                if reference in references:
+                    duplicate_reference = reference
+                    suffix = 2
+                    while F'{duplicate_reference}_{suffix}' in references:
+                        suffix += 1
+                    reference = F'{duplicate_reference}_{suffix}'
+                    logging.warning(_(F"Non-unique song reference \"{duplicate_reference}\" for {path}. Using \"{reference}\" instead..."))
+                references.add(reference)
+
+                # Its path...
+                output_path = os.path.abspath(path) if arguments.absolute_path else path
+
+                # Write...
+                row = dict(song_tags, reference=reference, path=output_path)
+                print(','.join(format_catalogue_field(row[key]) for key in catalogue_field_names), file=output_file)
+
+        # Read tags in a pool of worker processes...
+        with concurrent.futures.ProcessPoolExecutor(max_workers=processes) as executor:
+
+            # Batches whose tags are still being read, oldest first...
+            batches = collections.deque()
+
+            # Divide the songs found into batches...
+            song_files = find_song_files(arguments.directory)
+            while True:
+
+                # Get the next batch...
+                files = []
+                for song_file in song_files:
+                    files.append(song_file)
+                    if len(files) == batch_size:
+                        break
+                if not files:
+                    break
+                songs_total += len(files)
+
+                # Take what tags we can from the cache...
+                cached_tags = cache.get_tags(files) if cache else {}
+                songs_cached += len(cached_tags)
+
+                # Read the rest in a worker process...
+                paths = [path for path, size, mtime in files if path not in cached_tags]
+                future = executor.submit(read_song_tags, paths) if paths else None
+                batches.append((files, cached_tags, future))
+
+                # Write out the oldest batch if we have enough in flight...
+                if len(batches) > batches_maximum:
+                    write_batch(*batches.popleft())
+
+            # Write out the rest...
+            while batches:
+                write_batch(*batches.popleft())
+
+        # Summarize...
+        logging.info(_(F"Catalogued {songs_total:,} songs, {songs_cached:,} from cache, in {time.monotonic() - started:.1f} seconds."))
+
+        # Done...
+        success = True
+
+    # User trying to abort...
+    except KeyboardInterrupt:
+        print(_('\rAborting, please wait a moment...'), file=sys.stderr)
+
+    # Some other kind of exception...
+    except Exception as some_exception:
+        print(_(F"An exception occurred: {str(some_exception)}"), file=sys.stderr)
+
+    # Cleanup...
+    finally:
+
+        # Close output file, unless it was standard output...
+        if output_file and output_file is not sys.stdout:
+            output_file.close()
+
+        # Close cache...
+        if cache:
+            cache.close()
+
+    # Exit with status code based on whether we were successful or not...
+    if success:
+        sys.exit(0)
+    else:
+        sys.exit(1)
+
+# Entry point...
+if __name__ == '__main__':
+
+    # Run main function...
+    main()
+
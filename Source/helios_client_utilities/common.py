@@ -5,28 +5,48 @@
 #
 
 # System imports...
+import argparse
+import array
+import asyncio
+import base64
+from bisect import bisect_left
+import concurrent.futures
 from datetime import datetime
+from functools import partial
+import gzip
+import hashlib
+import inspect
+import io
 import ipaddress
 import json
 import netifaces
+import os
 import re
+import ssl
 import sys
 import threading
+import unicodedata
+import urllib.parse
 
 # Helios...
+import helios
 from helios_client_utilities import __version__
 
 # Other imports...
+import marshmallow
+import numpy
 from termcolor import colored
-from time import sleep
+from time import monotonic, sleep
+from tqdm import tqdm
 from zeroconf import ServiceBrowser, Zeroconf
 
 # i18n...
 import gettext
 _ = gettext.gettext
 
-# Add common arguments to argument parser...
-def add_common_arguments(argument_parser):
+# Add common arguments to argument parser. If multiple_hosts is set, --host may
+#  be given more than once and is parsed into a list...
+def add_common_arguments(argument_parser, multiple_hosts=False):
 
     # Define behaviour for --api-key...
     argument_parser.add_argument(
@@ -38,12 +58,22 @@ def add_common_arguments(argument_parser):
                'This may or may not be required, depending on your server\'s configuration.'))
 
     # Define behaviour for --host...
-    argument_parser.add_argument(
-        '--host',
-        action='store',
-        default=None,
-        dest='host',
-        help=_('IP address or host name of remote server. Defaults to auto.'))
+    if multiple_hosts:
+        argument_parser.add_argument(
+            '--host',
+            action='append',
+            default=None,
+            dest='host',
+            help=_('IP address or host name of remote server, optionally '
+                   'followed by a colon and port. Repeat to use several '
+                   'servers. Defaults to auto.'))
+    else:
+        argument_parser.add_argument(
+            '--host',
+            action='store',
+            default=None,
+            dest='host',
+            help=_('IP address or host name of remote server. Defaults to auto.'))
 
     # Define behaviour for --port...
     argument_parser.add_argument(
@@ -494,6 +524,1064 @@ class TrainingSession:
         self._version = version
 
 
+# Digest of a song file's contents as a StreamingSongUpload streams them. The
+#  body may be iterated more than once if the request is retried, so each pass
+#  is hashed afresh and only a pass that reached the end of the file replaces
+#  the digest...
+class ContentDigest:
+
+    # Constructor. The algorithm is any name hashlib.new() accepts...
+    def __init__(self, algorithm='sha256'):
+        self._algorithm = algorithm
+        self._hexdigest = None
+
+    # Record the hash of a pass that read the whole file...
+    def finish_pass(self, pass_hash):
+        self._hexdigest = pass_hash.hexdigest()
+
+    # Get the hex digest of the last complete pass, or None if there was none...
+    def hexdigest(self):
+        return self._hexdigest
+
+    # Get a new hash object for a pass over the file...
+    def start_pass(self):
+        return hashlib.new(self._algorithm)
+
+
+# Streaming request body for uploading a local song file without ever holding
+#  the whole file in memory. The file is base64 encoded a chunk at a time as it is
+#  read from disk and spliced into a JSON document as the value of file_field,
+#  alongside the other fields in fields_dict. Like helios' chunked_upload, an
+#  optional progress callback of the form foo(bytes_read, new_bytes, total_bytes)
+#  is invoked after each chunk. If the body is resent, new_bytes only counts
+#  bytes beyond those already reported. If a ContentDigest is provided as
+#  content_hash, it receives the digest of the file's raw contents...
+class StreamingSongUpload:
+
+    # Constructor. The chunk size is the number of bytes read from disk at a
+    #  time and is rounded down to a multiple of three so that every chunk but
+    #  the last encodes without base64 padding. If the file's contents were
+    #  already read into memory, they can be given instead of reading them
+    #  from path again...
+    def __init__(self, fields_dict, file_field, path, chunk_size=196608, progress_callback=None, content_hash=None, rate_limiter=None, content=None):
+
+        # Serialize every other field up front since they are small, then
+        #  leave the file field's string value open for the encoded file...
+        members = [
+            F'{json.dumps(key)}: {json.dumps(value)}'
+            for key, value in fields_dict.items() if key != file_field]
+        members.append(F'{json.dumps(file_field)}: "')
+
+        # Initialize...
+        self._prefix            = ('{' + ', '.join(members)).encode('utf-8')
+        self._suffix            = b'"}'
+        self._path              = path
+        self._chunk_size        = max(chunk_size - (chunk_size % 3), 3)
+        self._content           = content
+        self._bytes_notified    = 0
+        self._content_hash      = content_hash
+        self._file_size         = os.path.getsize(path) if content is None else len(content)
+        self._progress_callback = progress_callback
+        self._rate_limiter      = rate_limiter
+
+        # Total size of the request body is known in advance, which allows the
+        #  server to be sent a Content-Length rather than a chunked body...
+        self._total_size = (
+            len(self._prefix) +
+            4 * ((self._file_size + 2) // 3) +
+            len(self._suffix))
+
+    # Iterator method. Each pass starts over from the beginning of the file so
+    #  the body can be resent if the request is retried...
+    def __iter__(self):
+
+        # Bytes of the request body handed to the caller so far...
+        bytes_sent = 0
+
+        # Opening brace and every field other than the file...
+        bytes_sent += len(self._prefix)
+        self._notify(bytes_sent)
+        yield self._prefix
+
+        # Hash this pass over the file from scratch, if requested...
+        pass_hash = self._content_hash.start_pass() if self._content_hash is not None else None
+
+        # Encode the file as it streams off of the disk, or out of memory...
+        with open(self._path, 'rb') if self._content is None else io.BytesIO(self._content) as file:
+
+            # Bytes of the file still expected...
+            bytes_remaining = self._file_size
+
+            # Keep reading until we have all of it...
+            while bytes_remaining > 0:
+
+                # Read the next chunk, but never more than the size we promised
+                #  in case the file is being appended to while we upload...
+                chunk = file.read(min(self._chunk_size, bytes_remaining))
+
+                # File was truncated after we measured it. Content-Length would
+                #  be wrong, so there is no way to recover...
+                if not chunk:
+                    raise OSError(_(F'{self._path} changed size during upload.'))
+
+                # Reads from pipes and network file systems can come back short.
+                #  Read the rest so only the final chunk can require padding...
+                while len(chunk) % 3 and len(chunk) < bytes_remaining:
+                    more = file.read(3 - (len(chunk) % 3))
+                    if not more:
+                        raise OSError(_(F'{self._path} changed size during upload.'))
+                    chunk += more
+
+                # Update this pass' content hash, if requested...
+                if pass_hash is not None:
+                    pass_hash.update(chunk)
+
+                # Encode...
+                bytes_remaining -= len(chunk)
+                encoded = base64.b64encode(chunk)
+
+                # Wait for bandwidth, if limited, then hand to caller...
+                if self._rate_limiter is not None:
+                    self._rate_limiter.consume(len(encoded))
+                bytes_sent += len(encoded)
+                self._notify(bytes_sent)
+                yield encoded
+
+        # The whole file was read, so its digest is complete...
+        if pass_hash is not None:
+            self._content_hash.finish_pass(pass_hash)
+
+        # Close the file field's string and the JSON object...
+        bytes_sent += len(self._suffix)
+        self._notify(bytes_sent)
+        yield self._suffix
+
+    # Length of upload...
+    def __len__(self):
+        return self._total_size
+
+    # Invoke the progress callback, if one was provided. Bytes resent on a later
+    #  pass were already reported, so only count those past the furthest any
+    #  pass has reached...
+    def _notify(self, bytes_sent):
+        new_bytes = max(0, bytes_sent - self._bytes_notified)
+        self._bytes_notified = max(self._bytes_notified, bytes_sent)
+        if self._progress_callback:
+            self._progress_callback(bytes_sent, new_bytes, self._total_size)
+
+
+# Oldest helios-client release whose private request internals, which
+#  _submit_streaming_request() relies on, are known to work...
+minimum_helios_client_version = (0, 5, 20241122)
+
+# Client classes whose private request internals have already been checked...
+_checked_client_types = set()
+
+# Check that the given helios.Client still has the private request internals
+#  that _submit_streaming_request() relies on, since helios-client has no
+#  public way to stream a request body. Raises an exception naming the
+#  installed helios-client version if not...
+def _check_client_internals(client):
+
+    # Already checked this kind of client...
+    if type(client) in _checked_client_types:
+        return
+
+    # Get the installed helios-client version...
+    version = getattr(getattr(helios, '__version__', None), 'version', 'unknown')
+    version_numbers = tuple(int(part) for part in re.findall(r'\d+', version)[:3])
+
+    # Check it is recent enough and has the headers and request method we need
+    #  with the parameters we pass it...
+    submit_request = getattr(client, '_submit_request', None)
+    compatible = (
+        version_numbers >= minimum_helios_client_version and
+        isinstance(getattr(client, '_common_headers', None), dict) and
+        callable(submit_request) and
+        {'endpoint', 'method', 'headers', 'query_parameters', 'data'} <= set(inspect.signature(submit_request).parameters))
+
+    # It isn't...
+    if not compatible:
+        minimum_version = '.'.join(str(number) for number in minimum_helios_client_version)
+        raise Exception(_(
+            F"Streaming uploads need helios-client {minimum_version} or a compatible later release, but "
+            F"{version} is installed and its client is not compatible. Install a compatible helios-client."))
+
+    # Remember so we don't check again...
+    _checked_client_types.add(type(client))
+
+
+# Submit a request to a Helios server whose JSON body is the given fields plus
+#  the contents of a local file streamed in as file_field. This reuses the
+#  client's connection, TLS settings, and HTTP error to exception mapping, but
+#  bypasses its request builders which need the whole file base64 encoded in
+#  memory before anything can be sent...
+def _submit_streaming_request(
+    client, endpoint, method, fields_dict, file_field, path,
+    query_parameters=None, extra_headers=None, progress_callback=None, content_hash=None,
+    rate_limiter=None, content=None):
+
+    # Make sure the client's internals are what we expect...
+    _check_client_internals(client)
+
+    # Initialize headers. Copy the client's common headers because its own
+    #  request methods modify them in place...
+    headers                     = dict(client._common_headers)
+    headers['Accept']           = 'application/json'
+    headers['Accept-Encoding']  = 'gzip'
+    headers['Content-Type']     = 'application/json'
+
+    # Add any headers specific to this endpoint...
+    if extra_headers:
+        headers.update(extra_headers)
+
+    # Submit request...
+    return client._submit_request(
+        endpoint=endpoint,
+        method=method,
+        headers=headers,
+        query_parameters=query_parameters,
+        data=StreamingSongUpload(
+            fields_dict=fields_dict,
+            file_field=file_field,
+            path=path,
+            progress_callback=progress_callback,
+            content_hash=content_hash,
+            rate_limiter=rate_limiter,
+            content=content))
+
+
+# Add a new song to a Helios server streaming its file from song_path. This is
+#  equivalent to helios.Client.add_song() with new_song_dict['file'] set to the
+#  base64 encoded contents of song_path, but with constant memory use. An
+#  optional ContentDigest passed as content_hash receives the digest of the
+#  file's contents, and an optional TokenBucket passed as rate_limiter caps
+#  bytes per second. If the file was already read ahead, its contents may be
+#  passed as content...
+def add_song_from_file(
+    client, new_song_dict, song_path, store=True, progress_callback=None, content_hash=None, rate_limiter=None,
+    content=None):
+
+    # Validate everything other than the file against the request schema...
+    _validate_request_fields(helios.requests.NewSongSchema(), new_song_dict, 'file')
+
+    # Submit request...
+    response = _submit_streaming_request(
+        client=client,
+        endpoint='/songs',
+        method='POST',
+        fields_dict=new_song_dict,
+        file_field='file',
+        path=song_path,
+        query_parameters={ 'store': str(store).lower() },
+        progress_callback=progress_callback,
+        content_hash=content_hash,
+        rate_limiter=rate_limiter,
+        content=content)
+
+    # Extract and construct stored song from response...
+    try:
+        return helios.responses.StoredSongSchema().load(response.json())
+
+    # Deserialization error...
+    except marshmallow.exceptions.MarshmallowError as some_exception:
+        raise helios.exceptions.UnexpectedResponse(some_exception) from some_exception
+
+
+# Modify an existing song on a Helios server, replacing its file with the one at
+#  song_path streamed from disk. Equivalent to helios.Client.modify_song() with
+#  patch_song_dict['file'] set to the base64 encoded contents of song_path...
+def modify_song_from_file(client, patch_song_dict, song_path, store=None, song_id=None, song_reference=None):
+
+    # Prepare endpoint...
+    if song_id is not None:
+        endpoint = F'/songs/by_id/{song_id}'
+    elif song_reference is not None:
+        endpoint = F'/songs/by_reference/{song_reference}'
+    else:
+        raise helios.exceptions.ExceptionBase(_('You must provide either a song_id or a song_reference.'))
+
+    # Prepare query parameters...
+    query_parameters = {}
+    if store is not None:
+        query_parameters['store'] = str(store).lower()
+
+    # Validate everything other than the file against the request schema...
+    _validate_request_fields(helios.requests.PatchSongSchema(), patch_song_dict, 'file')
+
+    # Submit request...
+    response = _submit_streaming_request(
+        client=client,
+        endpoint=endpoint,
+        method='PATCH',
+        fields_dict=patch_song_dict,
+        file_field='file',
+        path=song_path,
+        query_parameters=query_parameters)
+
+    # Extract and construct stored song from response...
+    try:
+        return helios.responses.StoredSongSchema().load(response.json())
+
+    # Deserialization error...
+    except marshmallow.exceptions.MarshmallowError as some_exception:
+        raise helios.exceptions.UnexpectedResponse(some_exception) from some_exception
+
+
+# Perform a similarity search on a Helios server using the song file at
+#  song_path, streamed from disk, as the search key. Equivalent to
+#  helios.Client.get_similar_songs() with similarity_search_dict['similar_file']
+#  set to the base64 encoded contents of song_path...
+def get_similar_songs_from_file(client, similarity_search_dict, song_path, progress=False):
+
+    # Validate everything other than the file against the request schema...
+    _validate_request_fields(helios.requests.SimilaritySearchSchema(), similarity_search_dict, 'similar_file')
+
+    # Submit request. The server will acknowledge with the location of a job
+    #  we can poll for the results...
+    response = _submit_streaming_request(
+        client=client,
+        endpoint='/songs/similar',
+        method='POST',
+        fields_dict=similarity_search_dict,
+        file_field='similar_file',
+        path=song_path,
+        extra_headers={ 'X-Helios-Expect': '202-accepted' })
+
+    # Parse Location header for job ID...
+    location = response.headers.get('Location', '')
+    matches = re.fullmatch(R'^/[^/]+/status/jobs/(\d+)$', location)
+    if not matches:
+        raise helios.exceptions.UnexpectedResponse(
+            _(F'Location header missing or malformed: {location}'))
+    job_id = matches.group(1)
+
+    # Optional progress bar, constructed once the server tells us the total...
+    progress_bar = None
+
+    # Try to monitor progress until final result is available...
+    try:
+
+        # Counter of the number of bytes the server has processed...
+        bytes_fetched = 0
+
+        # Keep polling until final result is received...
+        while True:
+
+            # Wait a second after each query...
+            sleep(1.0)
+
+            # Query server for response code and object...
+            status_code, response_object = client.get_job_status(
+                job_id,
+                helios.responses.StoredSongSchema(many=True))
+
+            # Result is ready...
+            if status_code == 200:
+                return response_object
+
+            # Status update available, but final result not ready yet...
+            if status_code == 202:
+
+                # Construct progress bar if requested and not done already...
+                if progress and progress_bar is None and response_object.progress_total is not None:
+                    progress_bar = tqdm(total=response_object.progress_total, unit='B', unit_scale=True)
+
+                # Update it...
+                if progress_bar is not None:
+                    progress_bar.update(response_object.progress_current - bytes_fetched)
+                    bytes_fetched = response_object.progress_current
+                    progress_bar.set_description(response_object.message)
+
+            # For all other responses treat it as though it was unexpected...
+            else:
+                raise helios.exceptions.UnexpectedResponse(
+                    _(F'Unexpected server response while polling job status: {status_code}'))
+
+    # User trying to abort. Ask server to delete the job and propagate...
+    except KeyboardInterrupt:
+        print(_('\rAborting. Please wait a moment...'))
+        client.delete_job(job_id)
+        raise
+
+    # Deallocate progress bar if we created one...
+    finally:
+        if progress_bar is not None:
+            progress_bar.close()
+
+
+# Raise the appropriate Helios exception for an HTTP error response from the
+#  server, given its status code and raw body. This mirrors how helios.Client
+#  maps error responses for callers that don't go through it...
+def raise_response_exception(status_code, body):
+
+    # Try to decode the JSON error object the server normally sends...
+    try:
+        json_response = json.loads(body)
+        if not isinstance(json_response, dict):
+            raise ValueError()
+
+    # No JSON body...
+    except ValueError:
+        raise helios.exceptions.ResponseExceptionBase(
+            code=status_code,
+            details=F'Server response had no JSON body, but code {status_code}.',
+            summary=F'Server response had no JSON body, but code {status_code}.') from None
+
+    # Extract error details from JSON response...
+    code    = int(json_response.get('code', status_code))
+    details = json_response.get('details', 'A problem occurred, but the server provided no details.')
+    summary = json_response.get('summary', 'Server provided no summary.')
+
+    # Map code to exception...
+    exception_class = {
+        400: helios.exceptions.BadRequest,
+        401: helios.exceptions.Unauthorized,
+        404: helios.exceptions.NotFound,
+        409: helios.exceptions.Conflict,
+        500: helios.exceptions.InternalServer,
+        507: helios.exceptions.InsufficientStorage
+    }.get(code, helios.exceptions.ResponseExceptionBase)
+
+    # Raise it...
+    raise exception_class(code, details, summary) from None
+
+
+# Minimal asyncio HTTP/1.1 client for a Helios server. It keeps a pool of
+#  persistent connections so that many requests can be in flight at once on a
+#  single event loop without a thread or helios.Client for each. Only the
+#  endpoints the bulk tools need are implemented. Request bodies that are
+#  iterables, such as StreamingSongUpload, are advanced in the loop's default
+#  executor so reading from disk never blocks the event loop...
+class AsyncHeliosClient:
+
+    # Constructor...
+    def __init__(
+        self, host, port=6440, api_key=None, timeout_connect=None, timeout_read=None,
+        tls=True, tls_ca_file=None, tls_certificate=None, tls_key=None, version='v1'):
+
+        # Make sure host provided...
+        if host is None:
+            raise Exception(_('No host provided.'))
+
+        # Initialize, using the same default timeouts as helios.Client...
+        self._host              = host
+        self._idle_connections  = []
+        self._port              = port
+        self._ssl_context       = None
+        self._timeout_connect   = timeout_connect if timeout_connect is not None else 15
+        self._timeout_read      = timeout_read if timeout_read is not None else 300
+        self._version           = version
+
+        # TLS was requested, so prepare to use associated settings. As with
+        #  helios.Client, the server certificate is only verified if we were
+        #  given a certificate authority to verify it against...
+        if tls:
+            if tls_ca_file:
+                self._ssl_context = ssl.create_default_context(cafile=tls_ca_file)
+            else:
+                self._ssl_context = ssl.create_default_context()
+                self._ssl_context.check_hostname = False
+                self._ssl_context.verify_mode = ssl.CERT_NONE
+            if tls_certificate or tls_key:
+                self._ssl_context.load_cert_chain(tls_certificate, tls_key)
+
+        # Initialize headers common to all queries...
+        self._common_headers                    = {}
+        self._common_headers['Accept']          = 'application/json'
+        self._common_headers['Accept-Encoding'] = 'gzip, identity'
+        self._common_headers['Host']            = F'{host}:{port}'
+        self._common_headers['User-Agent']      = F'helios-client-utilities/{get_version()}'
+
+        # If an API key was provided by user, add it to request headers...
+        if api_key is not None:
+            self._common_headers['X-API-Key']   = api_key
+
+    # Add a new song streaming its file from song_path. Coroutine equivalent of
+    #  add_song_from_file()...
+    async def add_song_from_file(
+        self, new_song_dict, song_path, store=True, progress_callback=None, content_hash=None, rate_limiter=None,
+        content=None):
+
+        # Validate everything other than the file against the request schema...
+        _validate_request_fields(helios.requests.NewSongSchema(), new_song_dict, 'file')
+
+        # Submit request...
+        status_code, headers, body = await self.request(
+            method='POST',
+            endpoint='/songs',
+            query_parameters={ 'store': str(store).lower() },
+            headers={ 'Content-Type': 'application/json' },
+            body=StreamingSongUpload(
+                fields_dict=new_song_dict,
+                file_field='file',
+                path=song_path,
+                progress_callback=progress_callback,
+                content_hash=content_hash,
+                rate_limiter=rate_limiter,
+                content=content))
+
+        # Extract and construct stored song from response...
+        return _load_response(helios.responses.StoredSongSchema(), body)
+
+    # Close every idle connection...
+    async def close(self):
+        while self._idle_connections:
+            (reader, writer) = self._idle_connections.pop()
+            writer.close()
+
+    # Submit a request and return a tuple of its status code, lower cased
+    #  response headers, and body. Raises a Helios exception on any error
+    #  response or connection problem...
+    async def request(self, method, endpoint, query_parameters=None, headers=None, body=None):
+
+        # Construct request target...
+        target = F'/{self._version}/{endpoint.strip("/")}'
+        if query_parameters:
+            target += '?' + urllib.parse.urlencode(query_parameters)
+
+        # Construct headers...
+        request_headers = dict(self._common_headers)
+        if headers:
+            request_headers.update(headers)
+        request_headers['Content-Length'] = str(len(body) if body is not None else 0)
+
+        # Request line and headers...
+        head = F'{method} {target} HTTP/1.1\r\n'
+        head += ''.join(F'{key}: {value}\r\n' for key, value in request_headers.items())
+        head += '\r\n'
+
+        # Try on an idle connection, if there is one. If the server already
+        #  closed it we find out here, so try once more on a fresh one...
+        while True:
+
+            # Get a connection...
+            reused = bool(self._idle_connections)
+            if reused:
+                (reader, writer) = self._idle_connections.pop()
+            else:
+                (reader, writer) = await self._open_connection()
+
+            # Exchange request and response...
+            try:
+                await self._send_request(writer, head.encode('latin-1'), body)
+                (status_code, response_headers, response_body) = await asyncio.wait_for(
+                    self._read_response(reader), self._timeout_read)
+
+            # Idle connection went stale...
+            except (ConnectionError, asyncio.IncompleteReadError) as some_exception:
+                writer.close()
+                if reused:
+                    continue
+                raise helios.exceptions.Connection(
+                    _(F'Connection error while connecting to {self._host}:{self._port}')) from some_exception
+
+            # Took too long...
+            except asyncio.TimeoutError as some_exception:
+                writer.close()
+                raise helios.exceptions.Connection(
+                    _(F'Read timeout awaiting response from {self._host}:{self._port}')) from some_exception
+
+            # Anything else, including cancellation, leaves the connection in
+            #  an unknown state...
+            except BaseException:
+                writer.close()
+                raise
+
+            # Done with this exchange...
+            break
+
+        # Return connection to the pool unless the server is closing it...
+        if response_headers.get('connection', '').lower() == 'close':
+            writer.close()
+        else:
+            self._idle_connections.append((reader, writer))
+
+        # Server reported an error, raise appropriate exception...
+        if status_code >= 400:
+            raise_response_exception(status_code, response_body)
+
+        # Return response to caller...
+        return (status_code, response_headers, response_body)
+
+    # Check if a song with the given reference is on the server...
+    async def song_exists(self, song_reference):
+
+        # Query the server...
+        try:
+            await self.request(
+                method='GET',
+                endpoint=F'/songs/by_reference/{urllib.parse.quote(song_reference, safe="")}')
+            return True
+
+        # No such song...
+        except helios.exceptions.NotFound:
+            return False
+
+    # Open a new connection to the server...
+    async def _open_connection(self):
+
+        # Try to connect...
+        try:
+            return await asyncio.wait_for(
+                asyncio.open_connection(self._host, self._port, ssl=self._ssl_context),
+                self._timeout_connect)
+
+        # Connection timeout...
+        except asyncio.TimeoutError as some_exception:
+            raise helios.exceptions.Connection(
+                _(F'Connection timeout while trying to connect to {self._host}:{self._port}')) from some_exception
+
+        # Some other connection problem...
+        except OSError as some_exception:
+            raise helios.exceptions.Connection(
+                _(F'Connection error while connecting to {self._host}:{self._port}')) from some_exception
+
+    # Read a response's status line, headers, and body...
+    async def _read_response(self, reader):
+
+        # Status line...
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError(_('Server closed connection.'))
+        status_code = int(status_line.split()[1])
+
+        # Headers...
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            key, _separator, value = line.decode('latin-1').partition(':')
+            headers[key.strip().lower()] = value.strip()
+
+        # Body sent in chunks...
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b';')[0], 16)
+                if size == 0:
+                    while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                        pass
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            body = b''.join(chunks)
+
+        # Body of known size...
+        elif 'content-length' in headers:
+            body = await reader.readexactly(int(headers['content-length']))
+
+        # Otherwise body ends when the server closes the connection...
+        else:
+            body = await reader.read()
+            headers['connection'] = 'close'
+
+        # Decompress if necessary...
+        if headers.get('content-encoding', '').lower() == 'gzip':
+            body = gzip.decompress(body)
+
+        # Return response...
+        return (status_code, headers, body)
+
+    # Close a streamed body's iterator once the executor read still running on
+    #  it when the request was abandoned has finished...
+    @staticmethod
+    def _close_body_iterator(iterator, pending):
+        if not pending.cancelled():
+            pending.exception()
+        iterator.close()
+
+    # Send request head and body...
+    async def _send_request(self, writer, head, body):
+
+        # Request line and headers...
+        writer.write(head)
+
+        # Body already in memory...
+        if isinstance(body, (bytes, bytearray)):
+            writer.write(body)
+
+        # Body to be streamed. Advance it in the default executor so file
+        #  reads and encoding never block the event loop. Shield each read so
+        #  that if we are cancelled, its future still tracks the executor
+        #  thread which can't be interrupted...
+        elif body is not None:
+            loop = asyncio.get_running_loop()
+            iterator = iter(body)
+            pending = None
+            try:
+                while True:
+                    pending = loop.run_in_executor(None, next, iterator, None)
+                    chunk = await asyncio.shield(pending)
+                    if chunk is None:
+                        break
+                    writer.write(chunk)
+                    await writer.drain()
+
+            # A generator can't be closed while it is still executing, so if
+            #  a read is still running leave closing it until it is done...
+            finally:
+                if pending is None or pending.done():
+                    iterator.close()
+                else:
+                    pending.add_done_callback(partial(self._close_body_iterator, iterator))
+
+        # Flush...
+        await writer.drain()
+
+
+# Validate the fields of a request other than its file field against the
+#  given request schema...
+def _validate_request_fields(schema, fields_dict, file_field):
+    try:
+        schema.load({**fields_dict, file_field: ''})
+    except marshmallow.ValidationError as some_exception:
+        raise helios.exceptions.Validation(some_exception) from some_exception
+
+
+# Deserialize a JSON response body with the given response schema...
+def _load_response(schema, body):
+    try:
+        return schema.load(json.loads(body))
+    except (ValueError, marshmallow.exceptions.MarshmallowError) as some_exception:
+        raise helios.exceptions.UnexpectedResponse(some_exception) from some_exception
+
+
+# Get a new client with the same connection settings as the given one. The
+#  client keeps per-request state, so each thread needs its own...
+def clone_client(client):
+    return helios.Client(
+        host=client._host,
+        port=client._port,
+        api_key=client._api_key,
+        timeout_connect=client._timeout_connect,
+        timeout_read=client._timeout_read,
+        tls=client._tls,
+        tls_ca_file=client._tls_ca_file,
+        tls_certificate=client._tls_certificate,
+        tls_key=client._tls_key,
+        verbose=client._verbose)
+
+
+# Generator yielding every stored song on the server. Rather than waiting on
+#  each page before asking for the next, up to window pages of page_size songs
+#  are requested concurrently, each on its own thread and client. If ordered,
+#  songs are yielded in catalogue order, otherwise pages are yielded as soon as
+#  they arrive. Pages are only requested as the caller consumes them, so no
+#  more than window pages are ever held in memory. The catalogue ends at the
+#  first empty page. Pages before first_page are skipped...
+def scan_all_songs(client, page_size=1000, window=8, ordered=True, first_page=1):
+
+    # Each worker thread lazily creates its own client...
+    thread_local = threading.local()
+
+    # Retrieve a single page...
+    def get_page(page):
+        if not hasattr(thread_local, 'client'):
+            thread_local.client = clone_client(client)
+        return thread_local.client.get_all_songs(page=page, page_size=page_size)
+
+    # Initialize...
+    completed_pages = {}
+    end_page        = None
+    executor        = concurrent.futures.ThreadPoolExecutor(max_workers=window)
+    next_page       = first_page
+    next_yield_page = first_page
+    pending_pages   = {}
+
+    try:
+
+        # Keep going until every page before the end has been yielded...
+        while True:
+
+            # Keep the window full, counting pages waiting their turn, until
+            #  we know where the catalogue ends...
+            while len(pending_pages) + len(completed_pages) < window and (end_page is None or next_page < end_page):
+                pending_pages[next_page] = executor.submit(get_page, next_page)
+                next_page += 1
+
+            # Nothing left to wait on...
+            if not pending_pages:
+                break
+
+            # Wait for at least one page...
+            concurrent.futures.wait(
+                pending_pages.values(),
+                return_when=concurrent.futures.FIRST_COMPLETED)
+
+            # Collect every page that arrived...
+            for page, future in sorted(pending_pages.items()):
+
+                # Not done yet, or no longer needed...
+                if not future.done() or page not in pending_pages:
+                    continue
+
+                # Retrieve its songs, raising any exception...
+                del pending_pages[page]
+                page_songs_list = future.result()
+
+                # Empty page, so the catalogue ends before it. Anything after
+                #  it that is still outstanding is no longer needed...
+                if len(page_songs_list) == 0:
+                    end_page = page if end_page is None else min(end_page, page)
+                    for later_page in [later_page for later_page in pending_pages if later_page > end_page]:
+                        pending_pages.pop(later_page).cancel()
+                    continue
+
+                # Beyond the end...
+                if end_page is not None and page > end_page:
+                    continue
+
+                # Hold on to it until it is its turn, if ordered...
+                completed_pages[page] = page_songs_list
+
+            # Yield every page that is ready to go...
+            for page in sorted(completed_pages):
+                if end_page is not None and page > end_page:
+                    del completed_pages[page]
+                    continue
+                if ordered and page != next_yield_page:
+                    break
+                yield from completed_pages.pop(page)
+                next_yield_page = page + 1
+
+    # Whether exhausted, failed, or abandoned by the caller, don't wait on
+    #  requests still in flight...
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Compact set of song references. Rather than keeping every reference string,
+#  only a 64-bit hash of each is kept in a sorted array and looked up with a
+#  binary search, costing eight bytes a song instead of the eighty or more a
+#  set of strings would. With ten million songs the chance of any given
+#  reference being mistaken for a member is about one in two trillion. The
+#  hashes are only meaningful within the process that computed them. It cannot
+#  be modified after construction and is safe to share between threads...
+class CompactReferenceSet:
+
+    # Constructor takes any iterable of references...
+    def __init__(self, references=()):
+
+        # Hash each reference into a packed array of unsigned 64-bit
+        #  integers...
+        hashes = array.array('Q')
+        for reference in references:
+            hashes.append(CompactReferenceSet._hash(reference))
+
+        # Sort and remove duplicates...
+        self._hashes = array.array(
+            'Q', numpy.unique(numpy.frombuffer(hashes, dtype=numpy.uint64)).tobytes())
+
+    # Check if the given reference is a member...
+    def __contains__(self, reference):
+        reference_hash = CompactReferenceSet._hash(reference)
+        index = bisect_left(self._hashes, reference_hash)
+        return index < len(self._hashes) and self._hashes[index] == reference_hash
+
+    # Get the number of references...
+    def __len__(self):
+        return len(self._hashes)
+
+    # Get the number of bytes used to store the references...
+    def get_memory_size(self):
+        return self._hashes.itemsize * len(self._hashes)
+
+    # Calculate a reference's 64-bit hash...
+    @staticmethod
+    def _hash(reference):
+        return hash(reference) & 0xFFFFFFFFFFFFFFFF
+
+
+# Set-like view of the song references on the server that checks membership by
+#  asking the server about each song, one at a time. For when only a few songs
+#  need checking against a server with far more. Each thread uses its own
+#  client...
+class ServerReferenceLookup:
+
+    # Constructor...
+    def __init__(self, client):
+        self._client        = client
+        self._thread_local  = threading.local()
+
+    # Check if a song with the given reference is on the server...
+    def __contains__(self, reference):
+
+        # Get this thread's client...
+        if not hasattr(self._thread_local, 'client'):
+            self._thread_local.client = clone_client(self._client)
+
+        # Query the server...
+        try:
+            self._thread_local.client.get_song(song_reference=reference)
+            return True
+
+        # No such song...
+        except helios.exceptions.NotFound:
+            return False
+
+
+# Token bucket rate limiter. Tokens are added at a constant rate up to the
+#  burst size and each unit of work, a byte or a request, spends one. Callers
+#  may overdraw the bucket, in which case they wait until the debt is repaid.
+#  This keeps the long run average at the configured rate no matter how large
+#  each amount is. A single instance is safe to share between threads...
+class TokenBucket:
+
+    # Constructor. The rate is in tokens per second and the burst is the most
+    #  that can be spent at once without waiting, defaulting to a second's
+    #  worth...
+    def __init__(self, rate, burst=None):
+
+        # Rate must be positive...
+        if rate <= 0:
+            raise ValueError(_(F'Token bucket rate must be positive, but got {rate}.'))
+
+        # Initialize...
+        self._rate      = float(rate)
+        self._burst     = float(burst if burst is not None else rate)
+        self._tokens    = self._burst
+        self._updated   = monotonic()
+        self._lock      = threading.Lock()
+
+    # Spend the given number of tokens, blocking until they are available...
+    def consume(self, amount=1):
+        delay = self.reserve(amount)
+        if delay > 0:
+            sleep(delay)
+
+    # Get the rate in tokens per second...
+    def get_rate(self):
+        return self._rate
+
+    # Spend the given number of tokens without blocking and return the number of
+    #  seconds the caller must wait before using them. Coroutines should use
+    #  this with asyncio.sleep() rather than consume()...
+    def reserve(self, amount=1):
+
+        # Only one thread may update the bucket at a time...
+        with self._lock:
+
+            # Refill for the time elapsed since the last update...
+            now = monotonic()
+            self._tokens    = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+            self._updated   = now
+
+            # Spend, going into debt if necessary...
+            self._tokens -= amount
+
+            # Time until the debt is repaid...
+            return max(0.0, -self._tokens / self._rate)
+
+
+# Parse a number of bytes, where a K, M, or G suffix multiplies by the
+#  corresponding power of 1024. Raises a ValueError if it isn't one...
+def _parse_byte_count(value):
+
+    # Multiplier for each suffix...
+    multipliers = { 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3 }
+
+    # Separate the suffix, if any...
+    multiplier  = multipliers.get(value[-1:].upper(), 1)
+    number      = value[:-1] if multiplier != 1 else value
+
+    # Parse the remainder...
+    return float(number) * multiplier
+
+
+# Parse a transfer rate in bytes per second from the command line. A K, M, or G
+#  suffix multiplies by the corresponding power of 1024...
+def byte_rate_argument(value):
+
+    # Parse...
+    try:
+        rate = _parse_byte_count(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(_(F"expected a rate in bytes per second, but got {value}"))
+
+    # Must be positive...
+    if rate <= 0:
+        raise argparse.ArgumentTypeError(_(F"rate must be positive, but got {value}"))
+
+    # Done...
+    return rate
+
+
+# Parse a size in bytes from the command line. A K, M, or G suffix multiplies by
+#  the corresponding power of 1024...
+def byte_size_argument(value):
+
+    # Parse...
+    try:
+        size = int(_parse_byte_count(value))
+    except ValueError:
+        raise argparse.ArgumentTypeError(_(F"expected a size in bytes, but got {value}"))
+
+    # Can't be negative...
+    if size < 0:
+        raise argparse.ArgumentTypeError(_(F"size cannot be negative, but got {value}"))
+
+    # Done...
+    return size
+
+
+# Format a field for the catalogue. Strings are quoted with any quotation marks
+#  or backslashes escaped, and missing values left empty so the server will try
+#  to detect them itself...
+def format_catalogue_field(value):
+
+    # Omitted...
+    if value is None:
+        return ''
+
+    # Numeric...
+    if isinstance(value, int):
+        return str(value)
+
+    # String...
+    value = value.replace('\\', '\\\\').replace('"', '\\"')
+    return F'"{value}"'
+
+
+# Format a song's reference from its path relative to the directory its
+#  catalogue or import is rooted at, reduced to characters permitted in a
+#  reference. Accented letters lose their accents and any other run of
+#  characters besides letters and digits becomes an underscore. That can give
+#  different paths the same reference, or none at all, so it always ends with
+#  a short hash of the whole relative path to keep it unique...
+def get_song_reference(prefix, relative_path):
+
+    # Readable part from the path without its extension...
+    readable = unicodedata.normalize('NFKD', os.path.splitext(relative_path)[0])
+    readable = readable.encode('ascii', 'ignore').decode('ascii')
+    readable = re.sub('[^0-9a-zA-Z]+', '_', readable).strip('_').upper()
+
+    # Hash of the path, the same whichever separator the platform uses...
+    path_hash = hashlib.sha256(os.fsencode(relative_path.replace(os.sep, '/'))).hexdigest()[:12].upper()
+
+    # Combine...
+    if not readable:
+        return F'{prefix}{path_hash}'
+    return F'{prefix}{readable}_{path_hash}'
+
+
+# File extensions of song files looked for when searching a directory...
+song_file_extensions = (
+    '.aac', '.aif', '.aiff', '.flac', '.m4a', '.mp3', '.oga', '.ogg', '.opus',
+    '.wav', '.wma')
+
+# Get the directory in the user's cache directory where the utilities keep
+#  their caches...
+def get_cache_directory():
+
+    # Use the user's cache directory...
+    cache_directory = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+
+    # Construct path...
+    return os.path.join(cache_directory, 'helios-client-utilities')
+
+
 # Find the first available Helios server on the local network and return a tuple
 #  ip_address, port, and TLS capability. Set wait_time to maximum time to look
 #  for a server, or None to wait indefinitely...
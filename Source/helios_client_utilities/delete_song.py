@@ -6,11 +6,18 @@
 
 # System imports...
 import argparse
+import array
+import concurrent.futures
+import os
+import re
+import sqlite3
 import sys
+import threading
 
 # Other imports...
 import helios
-from helios_client_utilities.common import add_common_arguments, zeroconf_find_server
+from helios_client_utilities.common import add_common_arguments, clone_client, get_cache_directory, scan_all_songs, zeroconf_find_server
+from helios_client_utilities.mirror_songs import SongMirror, get_default_mirror_path, mirror_field_names
 from tqdm import tqdm
 
 # i18n...
@@ -32,6 +39,16 @@ def add_arguments(argument_parser):
         dest='delete_all',
         help=_('Delete on the remote server all song metadata and song files.'))
 
+    # Define behaviour for --delete-matching in song selection exclusion
+    #  group...
+    song_selection_group.add_argument(
+        '--delete-matching',
+        action='store_true',
+        default=False,
+        dest='delete_matching',
+        help=_('Delete every song matching all of --album, --artist, --genre, '
+               'and --year that were given.'))
+
     # Define behaviour for --id in song selection exclusion group...
     song_selection_group.add_argument(
         '--id',
@@ -51,6 +68,40 @@ def add_arguments(argument_parser):
         help=_('Unique reference of song to modify. You must provide either '
                'this or an --id.'))
 
+    # Define behaviour for --references-from in song selection exclusion
+    #  group...
+    song_selection_group.add_argument(
+        '--references-from',
+        dest='references_from',
+        required=False,
+        help=_('Delete every song whose reference is listed one per line in '
+               '<path>, or standard input if -.'))
+
+    # Define behaviour for --resume in song selection exclusion group...
+    song_selection_group.add_argument(
+        '--resume',
+        action='store_true',
+        default=False,
+        dest='resume',
+        help=_('Resume an interrupted --delete-matching or --references-from '
+               'using its journal.'))
+
+    # Define behaviour for --album...
+    argument_parser.add_argument(
+        '--album',
+        default=None,
+        dest='album',
+        help=_('With --delete-matching, only songs on this album, ignoring '
+               'case.'))
+
+    # Define behaviour for --artist...
+    argument_parser.add_argument(
+        '--artist',
+        default=None,
+        dest='artist',
+        help=_('With --delete-matching, only songs by this artist, ignoring '
+               'case.'))
+
     # Define behaviour for --delete-file-only in song selection exclusion group...
     argument_parser.add_argument(
         '--delete-file-only',
@@ -60,20 +111,252 @@ def add_arguments(argument_parser):
         help=_('Delete on the remote server the stored song file, but keep '
                'preserve the metadata of the analyzed.'))
 
+    # Define behaviour for --from-mirror...
+    argument_parser.add_argument(
+        '--from-mirror',
+        const=get_default_mirror_path(),
+        default=None,
+        dest='mirror_path',
+        nargs='?',
+        help=_('With --delete-matching, find matching songs in the local '
+               'mirror kept by helios-mirror-songs(1) rather than listing '
+               'the server\'s catalogue.'))
+
+    # Define behaviour for --genre...
+    argument_parser.add_argument(
+        '--genre',
+        default=None,
+        dest='genre',
+        help=_('With --delete-matching, only songs of this genre, ignoring '
+               'case.'))
+
+    # Define behaviour for --journal...
+    argument_parser.add_argument(
+        '--journal',
+        default=None,
+        dest='journal_path',
+        help=_('Path to local journal recording which songs selected with '
+               '--delete-matching or --references-from have been deleted. '
+               'Defaults to one in the user\'s cache directory.'))
+
+    # Define behaviour for --threads...
+    argument_parser.add_argument(
+        '--threads',
+        default=8,
+        dest='threads',
+        type=int,
+        help=_('Number of songs to delete concurrently with --delete-all, '
+               '--delete-matching, or --references-from. Default is 8.'))
+
+    # Define behaviour for --year...
+    argument_parser.add_argument(
+        '--year',
+        default=None,
+        dest='year',
+        type=year_range_argument,
+        help=_('With --delete-matching, only songs from this year, or range '
+               'of years such as 1990-1999.'))
+
+# Parse a year or an inclusive range of years into a tuple of the first and
+#  last...
+def year_range_argument(value):
+
+    # Either a single year or two separated by a dash...
+    match = re.fullmatch(r'\s*(\d+)\s*(?:-\s*(\d+)\s*)?', value)
+    if not match:
+        raise argparse.ArgumentTypeError(_(F"expected a year or range of years, but got {value}"))
+
+    # Make sure the range is the right way around...
+    first_year  = int(match.group(1))
+    last_year   = int(match.group(2) or first_year)
+    if first_year > last_year:
+        raise argparse.ArgumentTypeError(_(F"expected the first year before the last, but got {value}"))
+
+    # Done...
+    return first_year, last_year
+
+# Local journal of a bulk deletion. It records every song selected for deletion
+#  before any are deleted, by ID or reference, and then which of them have been
+#  deleted so that an interrupted deletion can carry on where it left off
+#  without having to find them all again...
+class DeletionJournal:
+
+    # States a song's journal entry can be in...
+    state_deleted   = 'deleted'
+    state_failed    = 'failed'
+    state_pending   = 'pending'
+
+    # Constructor...
+    def __init__(self, path):
+
+        # Create the directory to hold it, if necessary...
+        directory = os.path.dirname(os.path.abspath(path))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        # Initialize...
+        self._marks_uncommitted = 0
+        self._path              = path
+
+        # Open or create the database...
+        self._connection = sqlite3.connect(database=path)
+
+        # Write-ahead logging keeps commits cheap while still surviving a
+        #  crash...
+        self._connection.execute('PRAGMA journal_mode=WAL;')
+        self._connection.execute('PRAGMA synchronous=NORMAL;')
+
+        # Create schema if this is a new journal...
+        self._connection.executescript(
+        """
+            CREATE TABLE IF NOT EXISTS songs (
+                key         TEXT PRIMARY KEY NOT NULL,
+                state       TEXT NOT NULL,
+                reason      TEXT
+            );
+            CREATE TABLE IF NOT EXISTS properties (
+                key         TEXT PRIMARY KEY NOT NULL,
+                value       TEXT
+            );
+        """)
+
+    # Start a new deletion from the server, discarding any previous one. Songs
+    #  are identified by key_type, either id or reference, and are each of the
+    #  keys given...
+    def begin(self, server, key_type, delete_file_only, keys):
+        with self._connection:
+            self._connection.execute('DELETE FROM songs;')
+            self._connection.execute('DELETE FROM properties;')
+            self._connection.executemany(
+                'INSERT OR IGNORE INTO songs (key, state) VALUES (?, ?);',
+                ((str(key), DeletionJournal.state_pending) for key in keys))
+            self._connection.executemany(
+                'INSERT INTO properties (key, value) VALUES (?, ?);',
+                [('server', server), ('key_type', key_type), ('delete_file_only', '1' if delete_file_only else '0')])
+
+    # Close the journal, saving any songs marked since the last commit...
+    def close(self):
+        if self._connection:
+            self._connection.commit()
+            self._connection.close()
+            self._connection = None
+
+    # Get the path to the journal on disk...
+    def get_path(self):
+        return self._path
+
+    # Get the keys of every song not yet deleted, including those that failed
+    #  last time...
+    def get_pending_keys(self):
+        keys = [key for (key, ) in self._connection.execute(
+            'SELECT key FROM songs WHERE state != ? ORDER BY rowid;', (DeletionJournal.state_deleted,))]
+        if self.get_property('key_type') == 'id':
+            return array.array('q', map(int, keys))
+        return keys
+
+    # Get a property of the deletion, or None if there isn't one...
+    def get_property(self, key):
+        row = self._connection.execute('SELECT value FROM properties WHERE key = ?;', (key,)).fetchone()
+        return row[0] if row else None
+
+    # Record what happened to a song. Changes are committed in batches, since
+    #  losing the last few only means they are found already gone on resume...
+    def mark(self, key, state, reason=None):
+        self._connection.execute(
+            'UPDATE songs SET state = ?, reason = ? WHERE key = ?;', (state, reason, str(key)))
+        self._marks_uncommitted += 1
+        if self._marks_uncommitted >= 1000:
+            self._connection.commit()
+            self._marks_uncommitted = 0
+
+# Get the default path of the deletion journal...
+def get_default_journal_path():
+    return os.path.join(get_cache_directory(), 'delete-songs.journal')
+
+# Check whether a stored song matches every filter given on the command line...
+def song_matches(song, arguments):
+
+    # Text fields, ignoring case...
+    for field, value in [('album', arguments.album), ('artist', arguments.artist), ('genre', arguments.genre)]:
+        if value is not None and (getattr(song, field) or '').casefold() != value.casefold():
+            return False
+
+    # Year range...
+    if arguments.year is not None and not (arguments.year[0] <= song.year <= arguments.year[1]):
+        return False
+
+    # Passed every one...
+    return True
+
+# Find the IDs of every song matching the filters on the command line, either
+#  in a single pass over the server's catalogue or from the local mirror of it.
+#  Returns an array of them...
+def find_matching_songs(client, arguments, server):
+
+    # From the mirror, which must be of this server. The year range and file
+    #  check aren't indexed, but are cheap on the songs that remain...
+    if arguments.mirror_path:
+        mirror = SongMirror(arguments.mirror_path)
+        try:
+            if mirror.get_property('server') != server:
+                raise helios.exceptions.Validation(
+                    _(F"Mirror {arguments.mirror_path} is not of {server}. Synchronize it with helios-mirror-songs(1) first."))
+            id_index        = mirror_field_names.index('id')
+            location_index  = mirror_field_names.index('location')
+            return array.array('q', (
+                row[id_index] for row in mirror.query(
+                    artist=arguments.artist, genre=arguments.genre, album=arguments.album, year=arguments.year)
+                if not arguments.delete_file_only or row[location_index]))
+        finally:
+            mirror.close()
+
+    # Otherwise list the server's catalogue once, in whatever order pages
+    #  arrive...
+    progress_bar = tqdm(
+        desc=_('Finding songs'),
+        total=client.get_system_status().songs,
+        unit=_(' songs'))
+    try:
+        song_ids = array.array('q')
+        for song in scan_all_songs(client, page_size=1000, ordered=False):
+            if song_matches(song, arguments) and (not arguments.delete_file_only or song.location):
+                song_ids.append(song.id)
+            progress_bar.update(1)
+        return song_ids
+    finally:
+        progress_bar.close()
+
+# Read song references listed one per line in the file at path, or standard
+#  input if -, skipping blank lines...
+def read_song_references(path):
+    input_file = sys.stdin if path == '-' else open(path, 'r', encoding='utf-8')
+    try:
+        return [reference for reference in (line.strip() for line in input_file) if reference]
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+
 # Delete a song by ID or reference. If delete_file_only is True, then only the
 #  song file is deleted off the server, if it had one, but the metadata is
-#  preserved. Returns true if a song file was deleted if delete_file_only
-#  is true. If delete_file_only is False, always returns True on success or
-#  throws an exception otherwise...
-def delete_song(client, song_id, song_reference, delete_file_only=False):
+#  preserved. If the caller already has the stored song, such as from a listing
+#  of the catalogue, it can be provided to save asking the server for it again.
+#  Returns true if a song file was deleted if delete_file_only is true. If
+#  delete_file_only is False, always returns True on success or throws an
+#  exception otherwise...
+def delete_song(client, song_id, song_reference, delete_file_only=False, stored_song=None):
 
     # Delete just the remote file itself...
     if delete_file_only:
 
         # See if the song already had a stored song...
-        stored_song = client.get_song(
-            song_id=song_id,
-            song_reference=song_reference)
+        if stored_song is None:
+            stored_song = client.get_song(
+                song_id=song_id,
+                song_reference=song_reference)
+
+        # It didn't, so there's nothing to delete...
+        if not stored_song.location:
+            return False
 
         # Prepare to instruct server to delete it's file, if it had one...
         patch_song_dict = { 'file' : '' }
@@ -98,6 +381,101 @@ def delete_song(client, song_id, song_reference, delete_file_only=False):
         # Update statistics...
         return True
 
+# Delete every song in the given iterable, which may be stored songs or just
+#  their IDs or references, or only their files if delete_file_only. Each song
+#  is deleted from a pool of threads, each with its own client, as soon as it
+#  is listed with no more than four per thread waiting at a time. A song that
+#  is already gone counts as done, so an interrupted deletion can simply be
+#  started over. Advances the progress bar and marks the journal, if one is
+#  given, as each is done with. Returns a tuple of the number of songs or files
+#  deleted and a list of tuples of each song that couldn't be and why...
+def delete_songs(client, songs, delete_file_only, threads, progress_bar, journal=None):
+
+    # Each worker thread lazily creates its own client...
+    thread_local = threading.local()
+
+    # Delete a single song...
+    def delete(song):
+
+        # Get this thread's client...
+        if not hasattr(thread_local, 'client'):
+            thread_local.client = clone_client(client)
+
+        # Delete it, or its file, by ID or reference...
+        try:
+            if isinstance(song, int):
+                return delete_song(
+                    thread_local.client, song_id=song, song_reference=None, delete_file_only=delete_file_only)
+            if isinstance(song, str):
+                return delete_song(
+                    thread_local.client, song_id=None, song_reference=song, delete_file_only=delete_file_only)
+            return delete_song(
+                thread_local.client,
+                song_id=song.id,
+                song_reference=None,
+                delete_file_only=delete_file_only,
+                stored_song=song)
+
+        # Someone else got there first...
+        except helios.exceptions.NotFound:
+            return False
+
+    # Statistics...
+    failures        = []
+    total_deleted   = 0
+
+    # Wait for at least one deletion to finish, then tally up all that have...
+    def collect(futures, return_when):
+        nonlocal total_deleted
+        done, pending = concurrent.futures.wait(futures, return_when=return_when)
+        for future in done:
+
+            # How the song is known...
+            song = futures.pop(future)
+            key = song if isinstance(song, (int, str)) else song.id
+
+            # See how it went...
+            reason = None
+            try:
+                if future.result():
+                    total_deleted += 1
+            except helios.exceptions.ExceptionBase as some_exception:
+                reason = some_exception.what()
+            except Exception as some_exception:
+                reason = str(some_exception)
+
+            # Record it...
+            if reason is not None:
+                failures.append((key, reason))
+                progress_bar.write(_(F"Could not delete song {key}: {reason}"))
+            if journal:
+                journal.mark(
+                    key, DeletionJournal.state_deleted if reason is None else DeletionJournal.state_failed, reason)
+            progress_bar.update(1)
+
+    # Deletions in flight, and the most to allow before waiting on some...
+    futures         = {}
+    futures_maximum = threads * 4
+
+    # Submit each song as it is listed...
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=threads)
+    try:
+        for song in songs:
+            futures[executor.submit(delete, song)] = song
+            if len(futures) >= futures_maximum:
+                collect(futures, concurrent.futures.FIRST_COMPLETED)
+
+        # Wait for the rest...
+        if futures:
+            collect(futures, concurrent.futures.ALL_COMPLETED)
+
+    # Don't start any more if we're interrupted...
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    # Done...
+    return total_deleted, failures
+
 # Main function...
 def main():
 
@@ -123,6 +501,9 @@ def main():
         # A progress bar we may or may not construct later...
         progress_bar = None
 
+        # Journal of a bulk deletion, if we open one...
+        journal = None
+
         # If no host provided, use Zeroconf auto detection...
         if not arguments.host:
 
@@ -166,6 +547,76 @@ def main():
             # Note success...
             success = True
 
+        # User requested to delete songs listed in a file or matching a
+        #  filter, or to carry on deleting those an earlier run selected...
+        elif arguments.delete_matching or arguments.references_from is not None or arguments.resume:
+
+            # The server, so a journal or mirror of another is never used by
+            #  mistake...
+            server = F'{arguments.host}:{arguments.port}'
+
+            # Open the journal...
+            if arguments.journal_path is None:
+                arguments.journal_path = get_default_journal_path()
+            journal = DeletionJournal(arguments.journal_path)
+
+            # Carry on from where an earlier run left off, deleting whatever
+            #  it was deleting...
+            if arguments.resume:
+                journal_server = journal.get_property('server')
+                if journal_server is None:
+                    raise helios.exceptions.Validation(_(F"There is no deletion to resume in {arguments.journal_path}."))
+                if journal_server != server:
+                    raise helios.exceptions.Validation(
+                        _(F"Journal {arguments.journal_path} is of a deletion from {journal_server}, not {server}."))
+                arguments.delete_file_only = (journal.get_property('delete_file_only') == '1')
+
+            # Songs listed by reference don't need finding...
+            elif arguments.references_from is not None:
+                journal.begin(
+                    server, 'reference', arguments.delete_file_only, read_song_references(arguments.references_from))
+
+            # Otherwise find every song matching the filters and make sure the
+            #  user meant it...
+            else:
+
+                # Deleting everything has its own switch...
+                if all(value is None for value in [arguments.album, arguments.artist, arguments.genre, arguments.year]):
+                    raise helios.exceptions.Validation(
+                        _('--delete-matching needs at least one of --album, --artist, --genre, or --year. To delete every song, use --delete-all.'))
+
+                # Find them...
+                song_ids = find_matching_songs(client, arguments, server)
+
+                # Prompt user to make sure they are certain...
+                if len(song_ids) > 0:
+                    verification = input(_(F"About to delete {'the files of ' if arguments.delete_file_only else ''}{len(song_ids):,} songs. Type \'YES\': "))
+                    if verification != _('YES'):
+                        sys.exit(1)
+
+                # Record them before deleting any...
+                journal.begin(server, 'id', arguments.delete_file_only, song_ids)
+
+            # Delete every song the journal doesn't have as deleted yet...
+            song_keys       = journal.get_pending_keys()
+            progress_bar    = tqdm(
+                desc=_('Deleting files') if arguments.delete_file_only else _('Deleting metadata and files'),
+                total=len(song_keys),
+                unit=_(' songs'))
+            total_deleted, failures = delete_songs(
+                client,
+                song_keys,
+                delete_file_only=arguments.delete_file_only,
+                threads=arguments.threads,
+                progress_bar=progress_bar,
+                journal=journal)
+
+            # Done...
+            progress_bar.close()
+            if failures:
+                print(_(F"Could not delete {len(failures):,} songs. Run again with --resume to retry them."))
+            success = (len(failures) == 0)
+
         # User requested to delete all song files only, keeping metadata...
         elif arguments.delete_all and arguments.delete_file_only:
 
@@ -178,45 +629,25 @@ def main():
             # How many songs are currently in the database?
             system_status = client.get_system_status()
 
-            # Keep deleting songs while there are some...
-            songs_remaining = True
-            current_page    = 1
-            progress_bar    = tqdm(
+            # Prepare progress bar...
+            progress_bar = tqdm(
                 desc=_('Deleting files'),
                 total=system_status.songs,
                 unit=_(' songs'))
-            while songs_remaining:
 
-                # Get a batch of songs...
-                all_songs_list = client.get_all_songs(page=current_page, page_size=100)
-
-                # No more songs left...
-                if len(all_songs_list) == 0:
-                    songs_remaining = False
-
-                # Delete each one's song file...
-                for song in all_songs_list:
-
-                    # Submit request to server...
-                    song_deleted = delete_song(
-                        client,
-                        song_id=song.id,
-                        song_reference=song.reference,
-                        delete_file_only=True)
-
-                    # Update deletion counter...
-                    if song_deleted:
-                        total_deleted += 1
-
-                    # Update progress bar...
-                    progress_bar.update(1)
-
-                # Advance to next page...
-                current_page += 1
+            # Deleting a file doesn't change the catalogue's pagination, so
+            #  walk it with later pages fetched while earlier ones are being
+            #  processed. Each song listed already says whether it has a file...
+            total_deleted, failures = delete_songs(
+                client,
+                scan_all_songs(client, page_size=1000, ordered=False),
+                delete_file_only=True,
+                threads=arguments.threads,
+                progress_bar=progress_bar)
 
             # Done...
             progress_bar.close()
-            success = True
+            success = (len(failures) == 0)
 
         # User requested to delete all songs and their files...
         elif arguments.delete_all and not arguments.delete_file_only:
@@ -231,42 +662,43 @@ def main():
             system_status = client.get_system_status()
 
             # Keep deleting songs while there are some...
-            songs_remaining = True
-            progress_bar    = tqdm(
+            progress_bar = tqdm(
                 desc=_('Deleting metadata and files'),
                 total=system_status.songs,
                 unit=_(' songs'))
-            while songs_remaining:
+            failures = []
+            while True:
 
-                # Get a batch of songs. We can always start chomping at the
-                #  first page because everything after it is shifted up the
-                #  first page after being deleted...
-                all_songs_list = client.get_all_songs(page=1, page_size=100)
+                # Deleting songs shifts everything after them up the catalogue,
+                #  so take a snapshot of every song's ID first, compactly...
+                song_ids = array.array('q', (
+                    song.id for song in scan_all_songs(client, page_size=1000, ordered=False)))
 
                 # No more songs left...
-                if len(all_songs_list) == 0:
-                    songs_remaining = False
-
-                # Delete each one...
-                for song in all_songs_list:
+                if len(song_ids) == 0:
+                    break
 
-                    # Submit request to server...
-                    song_deleted = delete_song(
-                        client,
-                        song_id=song.id,
-                        song_reference=song.reference,
-                        delete_file_only=False)
+                # Now we know exactly how many there are to go...
+                progress_bar.total = progress_bar.n + len(song_ids)
+                progress_bar.refresh()
 
-                    # Update deletion counter...
-                    if song_deleted:
-                        total_deleted += 1
-
-                    # Update progress bar...
-                    progress_bar.update(1)
+                # Delete each one...
+                pass_deleted, failures = delete_songs(
+                    client,
+                    song_ids,
+                    delete_file_only=False,
+                    threads=arguments.threads,
+                    progress_bar=progress_bar)
+                total_deleted += pass_deleted
+
+                # Go around again in case any were added in the meantime,
+                #  unless none of them could be deleted...
+                if pass_deleted == 0:
+                    break
 
             # Done...
             progress_bar.close()
-            success = True
+            success = (len(failures) == 0)
 
     # User trying to abort...
     except KeyboardInterrupt:
@@ -290,6 +722,10 @@ def main():
         if progress_bar:
             progress_bar.close()
 
+        # Close the journal, if one was opened...
+        if journal:
+            journal.close()
+
     # Show deletion statistics...
     print(F'Deleted {total_deleted} successfully.')
 
@@ -6,14 +6,22 @@
 
 # System imports...
 import argparse
+import collections
+import concurrent.futures
+import csv
+import io
+import json
+import operator
 from pprint import pprint
 import os
 import sys
+import threading
 
 # Other imports
 import helios
 from helios.responses import StoredSongSchema
-from helios_client_utilities.common import add_common_arguments, zeroconf_find_server
+from helios_client_utilities.common import add_common_arguments, clone_client, scan_all_songs, zeroconf_find_server
+from tqdm import tqdm
 
 # i18n...
 import gettext
@@ -44,6 +52,39 @@ def add_arguments(argument_parser):
                'exactly one of an --id, --reference, --all, or --random.'),
         type=int)
 
+    # Define behaviour for --export...
+    argument_parser.add_argument(
+        '--export',
+        dest='export',
+        required=False,
+        help=_('Stream every song to <path> as it is fetched when requesting '
+               'all songs, or to standard output if -.'))
+
+    # Define behaviour for --export-columns...
+    argument_parser.add_argument(
+        '--export-columns',
+        dest='export_columns',
+        required=False,
+        help=_('Comma separated list of song fields to export or look up, in '
+               'order. Default is every field.'))
+
+    # Define behaviour for --export-format...
+    argument_parser.add_argument(
+        '--export-format',
+        choices=['auto', 'csv', 'ndjson', 'parquet'],
+        default='auto',
+        dest='export_format',
+        help=_('Format to export songs in. Default is to go by the export '
+               'path\'s extension, or ndjson for standard output.'))
+
+    # Define behaviour for --ids-from in song selection exclusion group...
+    song_selection_group.add_argument(
+        '--ids-from',
+        dest='ids_from',
+        required=False,
+        help=_('Look up every song whose numeric identifier is listed one per '
+               'line in <path>, or standard input if -.'))
+
     # Define behaviour for --random in song selection exclusion group...
     song_selection_group.add_argument(
         '--random',
@@ -56,6 +97,15 @@ def add_arguments(argument_parser):
                'provide exactly one of --id, --reference, --all, or --random.'),
         type=int)
 
+    # Define behaviour for --references-from in song selection exclusion
+    #  group...
+    song_selection_group.add_argument(
+        '--references-from',
+        dest='references_from',
+        required=False,
+        help=_('Look up every song whose reference is listed one per line in '
+               '<path>, or standard input if -.'))
+
     # Define behaviour for --reference in song selection exclusion group...
     song_selection_group.add_argument(
         '--reference',
@@ -75,6 +125,15 @@ def add_arguments(argument_parser):
                'By default there is no pause.'),
         type=int)
 
+    # Define behaviour for --threads...
+    argument_parser.add_argument(
+        '--threads',
+        default=8,
+        dest='threads',
+        type=int,
+        help=_('Number of songs to look up concurrently with --ids-from or '
+               '--references-from. Default is 8.'))
+
     # Define behaviour for --save-catalogue
     argument_parser.add_argument(
         '--save-catalogue',
@@ -83,6 +142,265 @@ def add_arguments(argument_parser):
         nargs='?',
         help=_('Save server response to disk when requesting all songs.'))
 
+# Formats songs can be exported in, by file extension...
+export_format_extensions = {
+    '.csv'      : 'csv',
+    '.json'     : 'ndjson',
+    '.jsonl'    : 'ndjson',
+    '.ndjson'   : 'ndjson',
+    '.parquet'  : 'parquet'
+}
+
+# Number of songs to serialize and write out at a time when exporting...
+export_batch_size = 10000
+
+# Writer of stored songs to a CSV, NDJSON, or Parquet file, or standard output,
+#  a batch at a time. Only the requested columns are serialized, straight from
+#  each song's attributes rather than through its schema...
+class SongExporter:
+
+    # Constructor...
+    def __init__(self, path, file_format, columns):
+
+        # Initialize...
+        self._columns       = columns
+        self._file          = sys.stdout.buffer if path == '-' else open(path, 'wb')
+        self._file_format   = file_format
+        self._get_row       = operator.attrgetter(*columns)
+        self._writer        = None
+
+        # A single attribute getter returns the value rather than a tuple...
+        if len(columns) == 1:
+            self._get_row = lambda song, get_value=self._get_row: (get_value(song),)
+
+        # CSV begins with a header...
+        if file_format == 'csv':
+            self._write_csv([columns])
+
+        # Newline delimited JSON is encoded compactly by the C encoder...
+        elif file_format == 'ndjson':
+            self._encoder = json.JSONEncoder(
+                ensure_ascii=False, check_circular=False, separators=(',', ':'))
+
+        # Parquet needs pyarrow, which is optional. Each column's type comes
+        #  from the stored song schema...
+        else:
+            try:
+                import pyarrow
+                import pyarrow.parquet
+            except ImportError:
+                raise helios.exceptions.Validation(_('Exporting to Parquet requires pyarrow to be installed.'))
+            schema_fields = StoredSongSchema().fields
+            column_types = {
+                'Float'     : pyarrow.float64(),
+                'Integer'   : pyarrow.int64()
+            }
+            self._pyarrow   = pyarrow
+            self._schema    = pyarrow.schema([
+                (column, column_types.get(type(schema_fields[column]).__name__, pyarrow.string()))
+                for column in columns])
+            self._writer    = pyarrow.parquet.ParquetWriter(self._file, self._schema)
+
+    # Write rows out as CSV...
+    def _write_csv(self, rows):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        self._file.write(buffer.getvalue().encode('utf-8'))
+
+    # Finish writing and close the file, unless it is standard output...
+    def close(self):
+        if self._writer:
+            self._writer.close()
+            self._writer = None
+        self._file.flush()
+        if self._file is not sys.stdout.buffer:
+            self._file.close()
+
+    # Write a batch of stored songs...
+    def write(self, songs):
+
+        # Nothing to do...
+        if not songs:
+            return
+
+        # Each song's requested fields...
+        rows = list(map(self._get_row, songs))
+
+        # CSV...
+        if self._file_format == 'csv':
+            self._write_csv(rows)
+
+        # Newline delimited JSON, one object per line...
+        elif self._file_format == 'ndjson':
+            encode  = self._encoder.encode
+            columns = self._columns
+            self._file.write(
+                ('\n'.join([encode(dict(zip(columns, row))) for row in rows]) + '\n').encode('utf-8'))
+
+        # Parquet, as a row group a batch...
+        else:
+            self._writer.write_batch(self._pyarrow.record_batch(
+                [list(values) for values in zip(*rows)], schema=self._schema))
+
+# Get the list of song fields requested with --export-columns, or every field
+#  by default...
+def get_export_columns(arguments):
+
+    # Every field by default...
+    schema_fields = list(StoredSongSchema().fields)
+    if not arguments.export_columns:
+        return schema_fields
+
+    # Otherwise make sure the requested ones exist...
+    columns = [column.strip() for column in arguments.export_columns.split(',') if column.strip()]
+    unknown_columns = [column for column in columns if column not in schema_fields]
+    if unknown_columns or not columns:
+        raise helios.exceptions.Validation(
+            _(F"Unknown export columns {', '.join(unknown_columns)}. Expected some of {', '.join(schema_fields)}."))
+    return columns
+
+# Look up every song listed one per line in the file at path, or standard input
+#  if -, by its key of either id or reference. Lookups are made concurrently by
+#  a pool of threads, each with its own client and so its own pooled
+#  connections. Results are written to standard output in the same order as
+#  newline delimited JSON as soon as they are ready. A song that could not be
+#  looked up gets a line with its key and the error instead. Returns the number
+#  of songs that couldn't be...
+def lookup_songs(client, path, key, columns, threads):
+
+    # Each worker thread lazily creates its own client...
+    thread_local = threading.local()
+
+    # Look up a single song...
+    def lookup(value):
+        if not hasattr(thread_local, 'client'):
+            thread_local.client = clone_client(client)
+        if key == 'id':
+            return thread_local.client.get_song(song_id=value)
+        return thread_local.client.get_song(song_reference=value)
+
+    # Encoder for each line...
+    encoder = json.JSONEncoder(ensure_ascii=False, check_circular=False, separators=(',', ':'))
+
+    # Write out the result of the oldest lookup...
+    def write_result(value, future):
+        try:
+            song = future.result()
+            line = encoder.encode({ column: getattr(song, column) for column in columns })
+            return_value = 0
+        except helios.exceptions.ExceptionBase as some_exception:
+            line = encoder.encode({ key: value, 'error': some_exception.what() })
+            return_value = 1
+        except Exception as some_exception:
+            line = encoder.encode({ key: value, 'error': str(some_exception) })
+            return_value = 1
+        sys.stdout.write(line + '\n')
+        return return_value
+
+    # Failures so far...
+    failures = 0
+
+    # Read from standard input or the file...
+    input_file  = sys.stdin if path == '-' else open(path, 'r', encoding='utf-8')
+    executor    = concurrent.futures.ThreadPoolExecutor(max_workers=threads)
+    try:
+
+        # Lookups in flight, oldest first, and the most to allow before
+        #  waiting on the oldest...
+        lookups         = collections.deque()
+        lookups_maximum = threads * 4
+
+        # Submit each song listed...
+        for line in input_file:
+
+            # Skip blank lines...
+            value = line.strip()
+            if not value:
+                continue
+
+            # An ID has to be a number...
+            if key == 'id' and not value.isdigit():
+                future = concurrent.futures.Future()
+                future.set_exception(ValueError(_(F"{value} is not a song ID.")))
+
+            # Otherwise look it up...
+            else:
+                if key == 'id':
+                    value = int(value)
+                future = executor.submit(lookup, value)
+            lookups.append((value, future))
+
+            # Write out every result that is ready in order, or wait for the
+            #  oldest if too many are in flight...
+            while lookups and (lookups[0][1].done() or len(lookups) > lookups_maximum):
+                failures += write_result(*lookups.popleft())
+
+            # Let whoever is reading have what we've got so far...
+            sys.stdout.flush()
+
+        # Write out the rest...
+        while lookups:
+            failures += write_result(*lookups.popleft())
+
+    # Cleanup...
+    finally:
+        sys.stdout.flush()
+        executor.shutdown(wait=False, cancel_futures=True)
+        if input_file is not sys.stdin:
+            input_file.close()
+
+    # Done...
+    return failures
+
+# Export every song on the server to the requested path as it is fetched,
+#  holding no more than a batch of them in memory...
+def export_songs(client, arguments):
+
+    # Fields to export...
+    columns = get_export_columns(arguments)
+
+    # Guess the format from the path, if not specified...
+    file_format = arguments.export_format
+    if file_format == 'auto':
+        if arguments.export == '-':
+            file_format = 'ndjson'
+        else:
+            file_format = export_format_extensions.get(os.path.splitext(arguments.export)[1].lower())
+        if file_format is None:
+            raise helios.exceptions.Validation(
+                _(F"Cannot tell what format to export {arguments.export} in. Use --export-format."))
+
+    # How many songs there are to export, for showing progress...
+    songs_total = client.get_system_status().songs
+
+    # Stream every song, with later pages fetched while earlier ones are
+    #  being written...
+    exporter        = SongExporter(arguments.export, file_format, columns)
+    progress_bar    = tqdm(desc=_('Exporting songs'), total=songs_total, unit=_(' songs'))
+    completed       = False
+    try:
+
+        # Write each full batch...
+        batch = []
+        for song in scan_all_songs(client, page_size=1000):
+            batch.append(song)
+            if len(batch) == export_batch_size:
+                exporter.write(batch)
+                progress_bar.update(len(batch))
+                batch = []
+
+        # And whatever is left...
+        exporter.write(batch)
+        progress_bar.update(len(batch))
+        completed = True
+
+    # Cleanup, removing a partial export which would look complete...
+    finally:
+        progress_bar.close()
+        exporter.close()
+        if not completed and arguments.export != '-':
+            os.remove(arguments.export)
+
 # Main function...
 def main():
 
@@ -105,6 +423,13 @@ def main():
     # Try to retrieve metadata...
     try:
 
+        # Exporting only makes sense for all songs, and replaces the other
+        #  ways of showing them...
+        if arguments.export and not arguments.all:
+            raise helios.exceptions.Validation(_('--export requires --all.'))
+        if arguments.export and (arguments.save_catalogue or arguments.paginate is not None):
+            raise helios.exceptions.Validation(_('--export cannot be combined with --save-catalogue or --paginate.'))
+
         # If no host provided, use Zeroconf auto detection...
         if not arguments.host:
 
@@ -145,6 +470,20 @@ def main():
             # Show stored song model...
             pprint(stored_song_schema.dump(stored_song))
 
+        # For a list of songs read from a file or standard input...
+        elif arguments.ids_from is not None or arguments.references_from is not None:
+
+            # Look them all up...
+            if arguments.ids_from is not None:
+                failures = lookup_songs(
+                    client, arguments.ids_from, 'id', get_export_columns(arguments), arguments.threads)
+            else:
+                failures = lookup_songs(
+                    client, arguments.references_from, 'reference', get_export_columns(arguments), arguments.threads)
+
+            # Only successful if every song was found...
+            success = (failures == 0)
+
         # For a randomly selected song or songs...
         elif arguments.random_size is not None:
 
@@ -183,7 +522,48 @@ def main():
                 # Line break after each song...
                 print('')
 
-        # For all songs...
+        # For all songs, exported to disk or standard output in a format
+        #  meant for other programs...
+        elif arguments.export:
+            export_songs(client, arguments)
+            success = True
+
+        # For all songs, streamed a page at a time with the next pages already
+        #  being fetched in the background. Pausing every so many if the user
+        #  requested pagination...
+        elif not arguments.save_catalogue:
+
+            # Fetch in pages the size of the user's pagination, if requested...
+            page_size = arguments.paginate if arguments.paginate is not None else 1000
+
+            # Dump each song...
+            songs_printed = 0
+            for song in scan_all_songs(client, page_size=page_size):
+
+                # Show it and end with a new line...
+                pprint(stored_song_schema.dump(song))
+                print('')
+                songs_printed += 1
+
+                # If user requested pagination, pause after every page...
+                if arguments.paginate is not None and songs_printed == arguments.paginate:
+
+                    # Wait for key press, or take note if user wishes to
+                    #  continue without pagination in the future...
+                    keep_pagination = (input(_('Press enter to continue, or C to continue without pagination...')) != 'C')
+                    print('')
+
+                    # If user requested not to keep paginating output, don't...
+                    if keep_pagination is False:
+                        arguments.paginate = None
+
+                    # Reset print count...
+                    songs_printed = 0
+
+            # Done...
+            success = True
+
+        # For all songs, saving the server's response to disk...
         else:
 
             # Number of results to retrieve per query if overridden by user,
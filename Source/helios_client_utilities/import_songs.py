@@ -6,19 +6,44 @@
 
 # System imports...
 import argparse
-import base64
+import array
+import asyncio
+import bz2
+import collections
 import concurrent.futures
+import copy
+import ctypes
+import ctypes.util
 from functools import partial
+import hashlib
+import gzip
+import heapq
+import http.server
+import io
+import itertools
+import json
 import logging
+import lzma
+import os
 import queue
+import random
+import re
+import select
+import signal
+import sqlite3
+import stat
+import struct
 import sys
 import threading
 import time
 import traceback
+import zlib
 
 # Other imports
 import helios
-from helios_client_utilities.common import add_common_arguments, zeroconf_find_server
+from helios_client_utilities.common import AsyncHeliosClient, CompactReferenceSet, ContentDigest, ServerReferenceLookup, StreamingSongUpload, TokenBucket, add_common_arguments, add_song_from_file, byte_rate_argument, byte_size_argument, format_catalogue_field, get_cache_directory, get_song_reference, scan_all_songs, song_file_extensions, zeroconf_find_server
+import magic
+import mutagen
 import numpy
 import pandas
 import simplejson
@@ -33,7 +58,31 @@ def add_arguments(argument_parser):
     # Define positional argument for catalogue file...
     argument_parser.add_argument(
         'catalogue_file',
-        help=_('Path to input catalogue file.'))
+        help=_('Path to input catalogue file, - to read it from standard '
+               'input, or with --watch, a directory of song files.'))
+
+    # Define behaviour for --benchmark...
+    argument_parser.add_argument(
+        '--benchmark',
+        action='store_true',
+        default=False,
+        dest='benchmark',
+        help=_('Benchmark the local import pipeline without contacting a '
+               'server. Every song is parsed, checked for duplicates, read, '
+               'and encoded as it would be for an upload, but never sent. '
+               'Reports the throughput and latency of each stage.'))
+
+    # Define behaviour for --check-existing...
+    argument_parser.add_argument(
+        '--check-existing',
+        choices=['auto', 'index', 'lookup'],
+        default='auto',
+        dest='check_existing',
+        help=_('How to check which songs are already on the server. The index '
+               'strategy retrieves every reference on the server up front. '
+               'The lookup strategy asks the server about each song in the '
+               'catalogue as it is reached. Default is to choose based on the '
+               'size of the catalogue relative to the server\'s.'))
 
     # Define behaviour for --delimiter...
     argument_parser.add_argument(
@@ -52,6 +101,76 @@ def add_arguments(argument_parser):
         help=_('Perform a dry run only. Do not actually make any modifications '
                'to the server.'))
 
+    # Define behaviour for --duplicates...
+    argument_parser.add_argument(
+        '--duplicates',
+        choices=['ignore', 'report', 'skip'],
+        default='ignore',
+        dest='duplicates',
+        help=_('What to do with songs whose audio is identical to another song '
+               'in the catalogue or one previously uploaded from this machine to '
+               'the same server and still there. '
+               'Default is to ignore and upload them anyway.'))
+
+    # Define behaviour for --engine...
+    argument_parser.add_argument(
+        '--engine',
+        choices=['asyncio', 'threads'],
+        default='threads',
+        dest='engine',
+        help=_('Import engine to use. The default, threads, uploads with a '
+               'pool of consumer threads. The asyncio engine runs every '
+               'upload on a single event loop, which scales to hundreds of '
+               'concurrent uploads given by --threads.'))
+
+    # Define behaviour for --fingerprint-index...
+    argument_parser.add_argument(
+        '--fingerprint-index',
+        default=None,
+        dest='fingerprint_index_path',
+        nargs='?',
+        help=_('Path to local index of song file content fingerprints used by '
+               '--duplicates. Defaults to one in the user\'s cache '
+               'directory.'))
+
+    # Define behaviour for --format...
+    argument_parser.add_argument(
+        '--format',
+        choices=['arrow', 'auto', 'csv', 'ndjson', 'parquet'],
+        default='auto',
+        dest='format',
+        help=_('Format of the input catalogue. Defaults to auto, which guesses '
+               'from its file extension and otherwise assumes CSV.'))
+
+    # Define behaviour for --journal...
+    argument_parser.add_argument(
+        '--journal',
+        default=None,
+        dest='journal_path',
+        nargs='?',
+        help=_('Path to local journal recording the import state of each song. '
+               'Defaults to the catalogue path with a .journal suffix.'))
+
+    # Define behaviour for --limit-rate...
+    argument_parser.add_argument(
+        '--limit-rate',
+        default=None,
+        dest='limit_rate',
+        nargs='?',
+        type=byte_rate_argument,
+        help=_('Maximum bytes per second to upload, shared by all consumers. '
+               'Accepts a K, M, or G suffix. Defaults to unlimited.'))
+
+    # Define behaviour for --limit-requests...
+    argument_parser.add_argument(
+        '--limit-requests',
+        default=None,
+        dest='limit_requests',
+        nargs='?',
+        type=float,
+        help=_('Maximum songs per second to begin uploading, shared by all '
+               'consumers. Defaults to unlimited.'))
+
     # Define behaviour for --maximum-errors...
     argument_parser.add_argument(
         '--maximum-errors',
@@ -62,6 +181,53 @@ def add_arguments(argument_parser):
         help=_('Maximum number of errors to tolerate before exiting. Defaults '
                'to one. Set to zero for unlimited non-fatal.'))
 
+    # Define behaviour for --metrics-address...
+    argument_parser.add_argument(
+        '--metrics-address',
+        default='127.0.0.1',
+        dest='metrics_address',
+        nargs='?',
+        help=_('Address to serve live metrics on when --metrics-port is '
+               'given. Defaults to 127.0.0.1, the local host only.'))
+
+    # Define behaviour for --metrics-file...
+    argument_parser.add_argument(
+        '--metrics-file',
+        default=None,
+        dest='metrics_file',
+        nargs='?',
+        help=_('Periodically write a JSON snapshot of live import metrics to '
+               'this file.'))
+
+    # Define behaviour for --metrics-interval...
+    argument_parser.add_argument(
+        '--metrics-interval',
+        default=10.0,
+        dest='metrics_interval',
+        nargs='?',
+        type=float,
+        help=_('Seconds between each snapshot written to --metrics-file. '
+               'Defaults to 10.'))
+
+    # Define behaviour for --metrics-port...
+    argument_parser.add_argument(
+        '--metrics-port',
+        default=None,
+        dest='metrics_port',
+        nargs='?',
+        type=int,
+        help=_('Serve live import metrics in Prometheus text format over HTTP '
+               'on this port.'))
+
+    # Define behaviour for --no-journal...
+    argument_parser.add_argument(
+        '--no-journal',
+        action='store_false',
+        default=True,
+        dest='journal',
+        help=_('Do not keep a local journal of import state. An interrupted '
+               'import will not be resumable with --resume.'))
+
     # Define behaviour for --no-store, defaults store to true...
     argument_parser.add_argument(
         '--no-store',
@@ -81,62 +247,3157 @@ def add_arguments(argument_parser):
         help=_('Row offset to begin processing on with 1 being first after '
                'column header line.'))
 
-    # Define behaviour for --threads...
-    argument_parser.add_argument(
-        '--threads',
-        default=0,
-        dest='threads',
-        nargs='?',
-        type=int,
-        help=_('Number of concurrent import threads. Defaults to number of '
-               'logical cores on server.'))
+    # Define behaviour for --placement...
+    argument_parser.add_argument(
+        '--placement',
+        choices=['hash', 'least-loaded'],
+        default='hash',
+        dest='placement',
+        help=_('How to choose which server each song is imported into when '
+               'more than one --host is given. Defaults to hash, which always '
+               'sends the same reference to the same server. Use '
+               'least-loaded to favour whichever is least busy.'))
+
+    # Define behaviour for --preflight...
+    argument_parser.add_argument(
+        '--preflight',
+        action='store_true',
+        default=False,
+        dest='preflight',
+        help=_('Check every song in the catalogue could be imported without '
+               'contacting a server, then write a clean catalogue of those '
+               'that passed and a rejects file of those that didn\'t.'))
+
+    # Define behaviour for --preflight-clean...
+    argument_parser.add_argument(
+        '--preflight-clean',
+        default=None,
+        dest='preflight_clean',
+        nargs='?',
+        help=_('Path to write the clean catalogue to with --preflight. '
+               'Defaults to the catalogue path with a .clean.csv suffix.'))
+
+    # Define behaviour for --preflight-rejects...
+    argument_parser.add_argument(
+        '--preflight-rejects',
+        default=None,
+        dest='preflight_rejects',
+        nargs='?',
+        help=_('Path to write the rejects file to with --preflight. Defaults '
+               'to the catalogue path with a .rejects.csv suffix.'))
+
+    # Define behaviour for --read-ahead...
+    argument_parser.add_argument(
+        '--read-ahead',
+        default=0,
+        dest='read_ahead',
+        nargs='?',
+        type=byte_size_argument,
+        help=_('Most bytes of upcoming song files to read into memory ahead of '
+               'the consumers, so reading overlaps with uploading. Accepts a '
+               'K, M, or G suffix. Defaults to 0, which reads each file only '
+               'as it is uploaded.'))
+
+    # Define behaviour for --read-ahead-files...
+    argument_parser.add_argument(
+        '--read-ahead-files',
+        default=32,
+        dest='read_ahead_files',
+        nargs='?',
+        type=int,
+        help=_('Most songs to look ahead of the consumers for files to read '
+               'with --read-ahead. Defaults to 32.'))
+
+    # Define behaviour for --resume...
+    argument_parser.add_argument(
+        '--resume',
+        action='store_true',
+        default=False,
+        dest='resume',
+        help=_('Resume an interrupted import using its journal. Songs the '
+               'journal records as already imported are skipped without '
+               'retrieving the server\'s catalogue. Failed or in-flight songs '
+               'are retried.'))
+
+    # Define behaviour for --retries...
+    argument_parser.add_argument(
+        '--retries',
+        default=5,
+        dest='retries',
+        nargs='?',
+        type=int,
+        help=_('Number of times to retry a song that failed for a reason '
+               'likely to be temporary, such as a connection problem or server '
+               'error, before counting it as an error. Defaults to 5.'))
+
+    # Define behaviour for --retry-delay...
+    argument_parser.add_argument(
+        '--retry-delay',
+        default=2.0,
+        dest='retry_delay',
+        nargs='?',
+        type=float,
+        help=_('Seconds to wait before the first retry of a song. Each further '
+               'retry waits twice as long, with some random jitter. Defaults '
+               'to 2.'))
+
+    # Define behaviour for --schedule...
+    argument_parser.add_argument(
+        '--schedule',
+        choices=['catalogue', 'directory', 'largest-first'],
+        default='catalogue',
+        dest='schedule',
+        help=_('Order in which to upload songs. Default is catalogue order. '
+               'Use largest-first to upload the biggest files first so a few '
+               'large ones don\'t straggle at the end, or directory to read '
+               'files in directory and on-disk order for spinning disks.'))
+
+    # Define behaviour for --schedule-window...
+    argument_parser.add_argument(
+        '--schedule-window',
+        default=10000,
+        dest='schedule_window',
+        nargs='?',
+        type=int,
+        help=_('Number of catalogue rows to read ahead and reorder at a time '
+               'when using --schedule. Defaults to 10000.'))
+
+    # Define behaviour for --threads...
+    argument_parser.add_argument(
+        '--threads',
+        default=0,
+        dest='threads',
+        nargs='?',
+        type=threads_argument,
+        help=_('Number of concurrent import threads. Defaults to number of '
+               'logical cores on server. Use auto-adaptive to continuously '
+               'tune the number of active threads, up to --threads-max, for '
+               'the best sustained throughput.'))
+
+    # Define behaviour for --threads-max...
+    argument_parser.add_argument(
+        '--threads-max',
+        default=8,
+        dest='threads_maximum',
+        nargs='?',
+        type=int,
+        help=_('Spawn no more than at most this many concurrent import '
+               'threads. Defaults to 8.'))
+
+    # Define behaviour for --watch...
+    argument_parser.add_argument(
+        '--watch',
+        action='store_true',
+        default=False,
+        dest='watch',
+        help=_('Keep running, importing songs as they are appended to the '
+               'catalogue or, if it is a directory, as song files arrive in '
+               'it.'))
+
+    # Define behaviour for --watch-interval...
+    argument_parser.add_argument(
+        '--watch-interval',
+        default=2.0,
+        dest='watch_interval',
+        nargs='?',
+        type=float,
+        help=_('Seconds between checks for changes when polling, and how long '
+               'a song file found by scanning must go unmodified before it is '
+               'considered complete. Defaults to 2.'))
+
+    # Define behaviour for --watch-method...
+    argument_parser.add_argument(
+        '--watch-method',
+        choices=['auto', 'inotify', 'poll'],
+        default='auto',
+        dest='watch_method',
+        help=_('How to notice changes with --watch. Defaults to auto, which '
+               'uses inotify where available and otherwise polls.'))
+
+# Parse the value of --threads, which is either a thread count or the string
+#  auto-adaptive...
+def threads_argument(value):
+
+    # Adaptive concurrency requested...
+    if value == 'auto-adaptive':
+        return value
+
+    # Otherwise it should be a number...
+    try:
+        return int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(_(F"expected a number or auto-adaptive, but got {value}"))
+
+# Every column field an input catalogue may contain and its type. Note that
+#  for beats_per_minute and year, these should be integral types, but nullable
+#  integers weren't added until Pandas 0.24.0...
+catalogue_field_types = {
+    'reference'         : 'str',
+    'album'             : 'str',
+    'artist'            : 'str',
+    'title'             : 'str',
+    'genre'             : 'str',
+    'isrc'              : 'str',
+    'beats_per_minute'  : 'float',
+    'year'              : 'float',
+    'path'              : 'str'
+}
+
+# These column fields are always required...
+catalogue_required_field_names = [
+    'reference',
+    'path'
+]
+
+# Verify a catalogue's column fields are acceptable, raising an exception if
+#  not...
+def validate_catalogue_field_names(detected_field_names):
+
+    # Check for any extraneous column fields and raise error if any...
+    extraneous_fields = list(set(detected_field_names) - set(catalogue_field_types))
+    if len(extraneous_fields) > 0:
+        raise helios.exceptions.Validation(_(F"Input catalogue contained unrecognized column: {extraneous_fields}"))
+
+    # Check for minimum required column fields and raise error if missing any...
+    missing_fields = set(catalogue_required_field_names) - set(detected_field_names)
+    if len(missing_fields) > 0:
+        raise helios.exceptions.Validation(_(F"Input catalogue missing column field: {missing_fields}"))
+
+# Convert a pandas data frame of catalogue rows into a list of vanilla
+#  dictionaries ready to be injected into the consumer threads' work queue.
+#  Pandas has a number of issues we need to provide a workaround for, so this
+#  is done a column at a time over the whole chunk rather than row by row.
+#  Stripping quotes is only needed for data frames parsed from CSV...
+def catalogue_data_frame_to_rows(data_frame, strip_quotes=True):
+
+    # Clean up each column...
+    for key in data_frame.columns:
+
+        # Column as parsed...
+        series = data_frame[key]
+
+        # Because pandas struggles to distinguish a field ommitted from an
+        #  empty "" string field, we need to clean up what it generated.
+        #  Replace quoted strings with their quoted contents...
+        if catalogue_field_types.get(key) == 'str':
+            if not strip_quotes:
+                continue
+            strings = series.where(series.notna(), '').astype(str)
+            quoted = (strings.str.len() >= 2) & strings.str.startswith('"') & strings.str.endswith('"')
+            if quoted.any():
+                data_frame[key] = series.where(~quoted, strings.str[1:-1])
+
+        # Nullable integers weren't added until Panda 0.24.0. Type cast the
+        #  fields that were really suppose to be integers from floats to
+        #  integers...
+        elif key in ("beats_per_minute", "year"):
+            data_frame[key] = pandas.Series(
+                [int(value) if value == value else None for value in series.tolist()],
+                index=data_frame.index,
+                dtype=object)
+
+    # Replace NaNs and NAs with None's so we can distinguish from fields that
+    #  were intentionally ommitted versus ones that the user explicitly wanted
+    #  a value of an empty string...
+    data_frame = data_frame.astype(object)
+    data_frame = data_frame.where(data_frame.notna(), None)
+
+    # Return list of row dictionaries...
+    return data_frame.to_dict(orient='records')
+
+# Parse a CSV input catalogue with pandas from the given path or file object.
+#  If column field names are given, there is no header line to read them from,
+#  such as after seeking past it. Any other keyword arguments are passed through
+#  to pandas...
+def read_catalogue_csv(filepath_or_buffer, delimiter=',', names=None, **options):
+    return pandas.read_csv(
+        filepath_or_buffer=filepath_or_buffer,
+        comment='#',
+        delimiter=delimiter,
+        dtype=catalogue_field_types,
+        header=0 if names is None else None,
+        names=names,
+        skipinitialspace=True,
+        skip_blank_lines=True,
+        na_values=[],
+        quotechar='"',
+        quoting=0, # csv.QUOTE_MINIMAL
+        doublequote=False,
+        escapechar='\\',
+        encoding='utf-8',
+        **options)
+
+# Incremental scanner for where each record of a CSV input catalogue begins and
+#  ends, following the same quoting, escaping, and comment rules that
+#  read_catalogue_csv() gives pandas, but without parsing any fields. Data can
+#  be fed in pieces of any size, so a quoted field may span them. A record that
+#  is blank or begins with a comment is not a row...
+class CsvRecordScanner:
+
+    # Constructor...
+    def __init__(self, delimiter=','):
+
+        # Characters that matter outside and inside of a quoted field...
+        self._quoted_pattern    = re.compile(b'["\\\\]')
+        self._unquoted_pattern  = re.compile(b'[\n"\\\\#' + re.escape(delimiter.encode('utf-8')) + b']')
+
+        # Initialize...
+        self._at_field_start    = True
+        self._in_comment        = False
+        self._in_escape         = False
+        self._in_quotes         = False
+        self._is_row            = False
+        self._position          = 0
+        self._record_start      = 0
+
+    # End the current record at the given position...
+    def _end_record(self, records, end):
+        records.append((self._record_start, end, self._is_row))
+        self._at_field_start    = True
+        self._is_row            = False
+        self._record_start      = end
+
+    # Scan the next piece of the catalogue. Returns a list of tuples of the
+    #  start and end byte offsets from the beginning of the catalogue, and
+    #  whether it is a row, of each record that the piece completes...
+    def feed(self, data):
+
+        # Records completed so far and position within the piece...
+        records     = []
+        position    = 0
+
+        # Scan the whole piece...
+        while position < len(data):
+
+            # Escaped character is part of the field, whatever it is...
+            if self._in_escape:
+                self._in_escape = False
+                if not self._in_quotes:
+                    self._at_field_start = False
+                position += 1
+
+            # A comment runs to the end of the line...
+            elif self._in_comment:
+                line_end = data.find(b'\n', position)
+                if line_end < 0:
+                    break
+                self._in_comment = False
+                position = line_end + 1
+                self._end_record(records, self._position + position)
+
+            # Within a quoted field, only an escape or closing quote matter...
+            elif self._in_quotes:
+                match = self._quoted_pattern.search(data, position)
+                if match is None:
+                    break
+                position = match.end()
+                if match.group() == b'\\':
+                    self._in_escape = True
+                else:
+                    self._in_quotes = False
+
+            # Otherwise look for whatever comes next that matters...
+            else:
+
+                # Anything before it other than blanks makes a row, and
+                #  anything other than the spaces skipped before a field is
+                #  its value...
+                match = self._unquoted_pattern.search(data, position)
+                skipped = data[position:match.start() if match else len(data)]
+                if skipped.strip(b' '):
+                    self._at_field_start = False
+                if skipped.strip(b' \t\r'):
+                    self._is_row = True
+                if match is None:
+                    break
+                character   = match.group()
+                position    = match.end()
+
+                # End of the record...
+                if character == b'\n':
+                    self._end_record(records, self._position + position)
+
+                # A comment, which makes a row of a record that had anything
+                #  before it, even whitespace...
+                elif character == b'#':
+                    self._in_comment = True
+                    if self._position + position - 1 > self._record_start:
+                        self._is_row = True
+
+                # A quotation mark only opens a quoted field at its start...
+                elif character == b'"':
+                    self._in_quotes         = self._at_field_start
+                    self._at_field_start    = False
+                    self._is_row            = True
+
+                # An escape...
+                elif character == b'\\':
+                    self._in_escape         = True
+                    self._is_row            = True
+
+                # Delimiter begins the next field...
+                else:
+                    self._at_field_start    = True
+                    self._is_row            = True
+
+        # Done with this piece...
+        self._position += len(data)
+        return records
+
+    # Finish scanning at the end of the catalogue. Returns a list of the tuple
+    #  for the final record if it had no line feed, or an empty one if not...
+    def finish(self):
+        records = []
+        if self._position > self._record_start:
+            self._end_record(records, self._position)
+        return records
+
+# Buffer for a CSV input catalogue arriving in pieces. Each piece added returns
+#  whatever complete records it finished after the column header line, holding
+#  back any incomplete record, such as one with a quoted field still open, until
+#  the rest of it arrives...
+class CsvRecordBuffer:
+
+    # Constructor...
+    def __init__(self, delimiter=','):
+
+        # Initialize...
+        self._buffer        = b''
+        self._buffer_start  = 0
+        self._header_line   = None
+        self._scanner       = CsvRecordScanner(delimiter)
+
+    # Take the given records out of the buffer, keeping the first row as the
+    #  column header line. Returns the bytes of the rest...
+    def _take(self, records):
+
+        # Nothing completed...
+        if not records:
+            return b''
+
+        # The column header is the first row...
+        data_start = records[0][0]
+        if self._header_line is None:
+            for start, end, is_row in records:
+                data_start = end
+                if is_row:
+                    self._header_line = self._buffer[start - self._buffer_start:end - self._buffer_start]
+                    break
+
+        # Everything after it up to the end of the last complete record...
+        data_end    = records[-1][1]
+        data        = self._buffer[data_start - self._buffer_start:data_end - self._buffer_start]
+
+        # Keep whatever is left...
+        self._buffer        = self._buffer[data_end - self._buffer_start:]
+        self._buffer_start  = data_end
+        return data
+
+    # Add the next piece of the catalogue. Returns the bytes of every complete
+    #  record not yet returned after the column header line...
+    def add(self, data):
+        self._buffer += data
+        return self._take(self._scanner.feed(data))
+
+    # Finish at the end of the catalogue. Returns the bytes of any final
+    #  record, which may be incomplete...
+    def finish(self):
+        return self._take(self._scanner.finish())
+
+    # Get the column header line, or None if it hasn't arrived yet...
+    def get_header_line(self):
+        return self._header_line
+
+# Reader for a CSV input catalogue. The file is parsed exactly once, in large
+#  chunks, and each song is yielded as a row dictionary. Headers are validated
+#  from the first chunk and rows before the requested offset are skipped. If an
+#  offset index is given, parsing starts from the nearest row it knows the
+#  position of instead of the beginning...
+class CsvCatalogueReader:
+
+    # Number of rows pandas parses at a time...
+    chunk_size = 10000
+
+    # Constructor...
+    def __init__(self, path, delimiter=',', offset=1, offset_index=None):
+
+        # Initialize...
+        self._delimiter         = delimiter
+        self._offset            = max(offset, 1)
+        self._path              = path
+        self._songs_read        = 0
+        self._songs_total       = None
+        self._start_position    = None
+
+        # Start with an estimate of how many songs there are...
+        self._songs_estimate = estimate_catalogue_lines(path)
+
+        # Look up where to start reading if we're not starting at the
+        #  beginning of an uncompressed catalogue...
+        if offset_index and self._offset > 1 and self._songs_estimate is not None:
+
+            # Try to look it up...
+            try:
+                self._start_position = offset_index.get_position(path, self._offset, delimiter)
+
+            # Failed, but we can still get there the slow way...
+            except (OSError, sqlite3.Error) as some_exception:
+                logging.warning(_(F"Could not index {path} ({str(some_exception)}). Parsing from the beginning instead..."))
+
+            # Now we know exactly how many songs there are too...
+            if self._start_position is not None:
+                self._songs_total = self._start_position[3]
+
+    # Iterator method...
+    def __iter__(self):
+
+        # Catalogue file, if we seek within it ourselves...
+        file = None
+
+        # Start from the beginning...
+        if self._start_position is None:
+            reader = read_catalogue_csv(
+                self._path,
+                delimiter=self._delimiter,
+                compression='infer',
+                iterator=True,
+                chunksize=self.chunk_size,
+                low_memory=True)
+
+        # Or seek to the start of the nearest indexed row before the offset,
+        #  taking the column field names from the header line instead...
+        else:
+            header_line, byte_offset, self._songs_read, songs_total = self._start_position
+            if self._songs_read > 0:
+                logging.info(_(F"Seeking to song {self._songs_read + 1:,} using offset index..."))
+            file = open(self._path, 'rb')
+            file.seek(byte_offset)
+            reader = read_catalogue_csv(
+                file,
+                delimiter=self._delimiter,
+                names=read_catalogue_csv(io.BytesIO(header_line), delimiter=self._delimiter).columns.tolist(),
+                iterator=True,
+                chunksize=self.chunk_size,
+                low_memory=True)
+
+        # Parse each chunk...
+        try:
+            for chunk_index, data_frame in enumerate(reader):
+
+                # For the first chunk only, check headers since we only need to
+                #  do this once...
+                if chunk_index == 0:
+                    validate_catalogue_field_names(data_frame.columns.tolist())
+
+                # Row offset of the first song in this chunk, with 1 being
+                #  first after column header line...
+                first_song_offset = self._songs_read + 1
+                self._songs_read += len(data_frame)
+
+                # User requested to seek to given song offset, so skip
+                #  whatever part of this chunk is before it...
+                if self._songs_read < self._offset:
+                    continue
+                if first_song_offset < self._offset:
+                    data_frame = data_frame.iloc[self._offset - first_song_offset:]
+
+                # Hand each row to the caller...
+                for csv_row in catalogue_data_frame_to_rows(data_frame):
+                    yield csv_row
+
+        # Close the catalogue if we opened it...
+        finally:
+            if file is not None:
+                file.close()
+
+        # Now we know exactly how many songs there were...
+        self._songs_total = self._songs_read
+
+    # Get the total number of songs in the catalogue. This is an estimate
+    #  until the whole catalogue has been read, or None if it could not be
+    #  estimated...
+    def get_songs_total(self):
+
+        # Known exactly...
+        if self._songs_total is not None:
+            return self._songs_total
+
+        # Otherwise estimate, but never less than we've already seen...
+        if self._songs_estimate is None:
+            return None
+        return max(self._songs_estimate, self._songs_read)
+
+# Compression formats of a catalogue that can be read as a stream, by file
+#  extension...
+catalogue_stream_openers = {
+    '.bz2'  : bz2.open,
+    '.gz'   : gzip.open,
+    '.xz'   : lzma.open
+}
+
+# Guess the format of an input catalogue from its file extension, ignoring any
+#  compression, unless the user told us what it is. Standard input is assumed
+#  to be CSV...
+def get_catalogue_format(path, requested_format='auto'):
+
+    # User told us...
+    if requested_format != 'auto':
+        return requested_format
+
+    # Strip any compression extension...
+    root, extension = os.path.splitext(path.lower())
+    if extension in catalogue_stream_openers:
+        root, extension = os.path.splitext(root)
+
+    # Guess...
+    if extension in ('.parquet', '.pq'):
+        return 'parquet'
+    if extension in ('.arrow', '.feather', '.ipc'):
+        return 'arrow'
+    if extension in ('.jsonl', '.ndjson'):
+        return 'ndjson'
+    return 'csv'
+
+# Open an input catalogue for reading as a binary stream, decompressing it if
+#  necessary. A path of - is standard input...
+def open_catalogue_stream(path):
+
+    # Standard input...
+    if path == '-':
+        return os.fdopen(os.dup(sys.stdin.fileno()), 'rb')
+
+    # Compressed...
+    opener = catalogue_stream_openers.get(os.path.splitext(path)[1].lower())
+    if opener:
+        return opener(path, 'rb')
+
+    # Plain file...
+    return open(path, 'rb')
+
+# Read a binary stream and yield blocks of complete lines as soon as they
+#  arrive, rather than waiting to fill a buffer. This lets rows piped in from
+#  another process be imported while it is still producing them. Any final line
+#  without a line feed is yielded at the end...
+def read_line_blocks(stream, read_size=1048576):
+
+    # Any incomplete line at the end of what was read so far...
+    partial_line = b''
+
+    # Keep reading until the end of the stream...
+    while True:
+
+        # Read whatever is available, blocking only if nothing is...
+        data = stream.read1(read_size)
+
+        # End of stream...
+        if not data:
+            if partial_line.strip():
+                yield partial_line + b'\n'
+            return
+
+        # Yield every complete line...
+        partial_line += data
+        line_end = partial_line.rfind(b'\n') + 1
+        if line_end > 0:
+            yield partial_line[:line_end]
+            partial_line = partial_line[line_end:]
+
+# Reader for a CSV input catalogue arriving on standard input. Unlike a file,
+#  rows are parsed in whatever size blocks they arrive in so that each one can
+#  be imported without waiting for a whole chunk's worth. A row with a quoted
+#  field spanning blocks is held back until the rest of it arrives...
+class CsvStreamCatalogueReader:
+
+    # Constructor...
+    def __init__(self, path='-', delimiter=',', offset=1):
+
+        # Initialize...
+        self._delimiter         = delimiter
+        self._header_validated  = False
+        self._offset            = max(offset, 1)
+        self._path              = path
+        self._songs_read        = 0
+
+    # Iterator method...
+    def __iter__(self):
+
+        # Complete records after the column header line, holding back any row
+        #  with a quoted field that hasn't finished arriving yet...
+        record_buffer = CsvRecordBuffer(self._delimiter)
+
+        # Parse each block of lines as it arrives, and then whatever is left
+        #  at the end...
+        with open_catalogue_stream(self._path) as stream:
+            for lines in read_line_blocks(stream):
+                yield from self._parse_rows(record_buffer, record_buffer.add(lines))
+        yield from self._parse_rows(record_buffer, record_buffer.finish())
+
+    # Parse the given complete records, skipping any before the requested
+    #  offset...
+    def _parse_rows(self, record_buffer, records):
+
+        # Check the column header as soon as it arrives...
+        header_line = record_buffer.get_header_line()
+        if header_line is not None and not self._header_validated:
+            validate_catalogue_field_names(
+                read_catalogue_csv(io.BytesIO(header_line), delimiter=self._delimiter).columns.tolist())
+            self._header_validated = True
+
+        # Nothing but the header so far...
+        if header_line is None or not records.strip():
+            return
+
+        # Parse rows...
+        data_frame = read_catalogue_csv(io.BytesIO(header_line + records), delimiter=self._delimiter)
+
+        # Skip whatever part is before the requested offset...
+        first_song_offset = self._songs_read + 1
+        self._songs_read += len(data_frame)
+        if self._songs_read < self._offset:
+            return
+        if first_song_offset < self._offset:
+            data_frame = data_frame.iloc[self._offset - first_song_offset:]
+
+        # Hand each row to the caller...
+        yield from catalogue_data_frame_to_rows(data_frame)
+
+    # Get the total number of songs in the catalogue, which isn't known until
+    #  the stream ends...
+    def get_songs_total(self):
+        return None
+
+# Reader for an input catalogue of newline delimited JSON objects, one per
+#  song, from a file or standard input. A field that is absent from an object
+#  is treated the same as one omitted from a CSV catalogue...
+class NdjsonCatalogueReader:
+
+    # Constructor...
+    def __init__(self, path, offset=1):
+
+        # Initialize...
+        self._offset        = max(offset, 1)
+        self._path          = path
+        self._songs_read    = 0
+        self._songs_total   = None
+
+        # Start with an estimate of how many songs there are...
+        self._songs_estimate = None if path == '-' else estimate_catalogue_lines(path, header_lines=0)
+
+    # Iterator method...
+    def __iter__(self):
+
+        # Line number, for error messages...
+        line_number = 0
+
+        # Parse each block of lines as it arrives...
+        with open_catalogue_stream(self._path) as stream:
+            for lines in read_line_blocks(stream):
+                for line in lines.splitlines():
+
+                    # Skip blank lines...
+                    line_number += 1
+                    if not line.strip():
+                        continue
+
+                    # Count the song, skipping it if before the requested
+                    #  offset...
+                    self._songs_read += 1
+                    if self._songs_read < self._offset:
+                        continue
+
+                    # Parse and hand to the caller...
+                    yield self._parse_row(line, line_number)
+
+        # Now we know exactly how many songs there were...
+        self._songs_total = self._songs_read
+
+    # Parse a single line into a row dictionary, raising an exception if it
+    #  isn't a valid song...
+    def _parse_row(self, line, line_number):
+
+        # Parse the JSON object...
+        try:
+            song = simplejson.loads(line)
+        except simplejson.JSONDecodeError as some_exception:
+            raise helios.exceptions.Validation(_(F"Input catalogue line {line_number} is not valid JSON: {str(some_exception)}"))
+        if not isinstance(song, dict):
+            raise helios.exceptions.Validation(_(F"Input catalogue line {line_number} is not a JSON object."))
+
+        # Check its fields...
+        validate_catalogue_field_names(song.keys())
+
+        # Coerce each to the type a CSV catalogue would have given it, with
+        #  null the same as omitted...
+        csv_row = {}
+        for key, value in song.items():
+            if value is None:
+                csv_row[key] = None
+            elif catalogue_field_types[key] == 'str':
+                csv_row[key] = str(value)
+            else:
+                try:
+                    csv_row[key] = int(float(value))
+                except (TypeError, ValueError):
+                    raise helios.exceptions.Validation(_(F"Input catalogue line {line_number} field {key} is not a number: {value}"))
+
+        # Done...
+        return csv_row
+
+    # Get the total number of songs in the catalogue. This is an estimate
+    #  until the whole catalogue has been read, or None if it could not be
+    #  estimated...
+    def get_songs_total(self):
+
+        # Known exactly...
+        if self._songs_total is not None:
+            return self._songs_total
+
+        # Otherwise estimate, but never less than we've already seen...
+        if self._songs_estimate is None:
+            return None
+        return max(self._songs_estimate, self._songs_read)
+
+# Reader for a columnar input catalogue in Apache Parquet or Arrow IPC format,
+#  from a file or, for an Arrow stream, standard input. Only the columns an
+#  input catalogue may contain are read, so any others the catalogue was built
+#  with cost nothing. For Parquet, whole row groups before the requested offset
+#  are skipped without being read. This needs the optional pyarrow module...
+class ColumnarCatalogueReader:
+
+    # Number of rows to convert at a time...
+    batch_size = 10000
+
+    # Constructor...
+    def __init__(self, path, file_format, offset=1):
+
+        # This is an optional dependency...
+        try:
+            import pyarrow
+            import pyarrow.ipc
+            import pyarrow.parquet
+        except ImportError:
+            raise helios.exceptions.Validation(_(F"Reading {file_format} catalogues requires the pyarrow module."))
+        self._pyarrow = pyarrow
+
+        # Parquet needs to be able to seek to its footer...
+        if file_format == 'parquet' and path == '-':
+            raise helios.exceptions.Validation(_("Parquet catalogues cannot be read from standard input. Use the Arrow IPC stream format instead."))
+
+        # Initialize...
+        self._file_format   = file_format
+        self._offset        = max(offset, 1)
+        self._path          = path
+        self._songs_read    = 0
+        self._songs_total   = None
+
+        # Open the catalogue. The number of songs is in its metadata, except
+        #  for a stream...
+        if file_format == 'parquet':
+            self._reader        = pyarrow.parquet.ParquetFile(path)
+            schema              = self._reader.schema_arrow
+            self._songs_total   = self._reader.metadata.num_rows
+        elif path == '-':
+            self._reader        = pyarrow.ipc.open_stream(open_catalogue_stream(path))
+            schema              = self._reader.schema
+        else:
+            self._reader        = pyarrow.ipc.open_file(pyarrow.memory_map(path))
+            schema              = self._reader.schema
+            self._songs_total   = sum(
+                self._reader.get_batch(batch_index).num_rows
+                for batch_index in range(self._reader.num_record_batches))
+
+        # Project only the columns we know about, checking required ones are
+        #  present...
+        self._columns = [name for name in schema.names if name in catalogue_field_types]
+        validate_catalogue_field_names(self._columns)
+
+    # Iterator method...
+    def __iter__(self):
+
+        # Convert each batch...
+        for batch in self._get_batches():
+
+            # Skip whatever part is before the requested offset...
+            first_song_offset = self._songs_read + 1
+            self._songs_read += batch.num_rows
+            if self._songs_read < self._offset:
+                continue
+            if first_song_offset < self._offset:
+                batch = batch.slice(self._offset - first_song_offset)
+
+            # Cast each column to the type a CSV catalogue would have given
+            #  it, then convert the whole batch at once...
+            table = self._pyarrow.Table.from_batches([batch]).select(self._columns)
+            for column_index, name in enumerate(self._columns):
+                table = table.set_column(
+                    column_index,
+                    name,
+                    table.column(column_index).cast(
+                        self._pyarrow.string() if catalogue_field_types[name] == 'str' else self._pyarrow.float64()))
+
+            # Hand each row to the caller...
+            yield from catalogue_data_frame_to_rows(table.to_pandas(), strip_quotes=False)
+
+        # Now we know exactly how many songs there were...
+        self._songs_total = self._songs_read
+
+    # Yield each record batch, skipping whole Parquet row groups before the
+    #  requested offset...
+    def _get_batches(self):
+
+        # Parquet...
+        if self._file_format == 'parquet':
+
+            # Find the first row group containing the requested offset...
+            row_groups = []
+            for row_group_index in range(self._reader.num_row_groups):
+                row_group_rows = self._reader.metadata.row_group(row_group_index).num_rows
+                if not row_groups and self._songs_read + row_group_rows < self._offset:
+                    self._songs_read += row_group_rows
+                    continue
+                row_groups.append(row_group_index)
+
+            # Read the rest...
+            if row_groups:
+                yield from self._reader.iter_batches(
+                    batch_size=self.batch_size, row_groups=row_groups, columns=self._columns)
+
+        # Arrow stream...
+        elif self._path == '-':
+            yield from self._reader
+
+        # Arrow file...
+        else:
+            for batch_index in range(self._reader.num_record_batches):
+                yield self._reader.get_batch(batch_index)
+
+    # Get the total number of songs in the catalogue, or None if it isn't
+    #  known until the end of a stream...
+    def get_songs_total(self):
+        return self._songs_total
+
+# Create a reader for the given input catalogue in the given format. The
+#  offset index, if given, is only used to seek within a CSV file...
+def create_catalogue_reader(path, file_format='auto', delimiter=',', offset=1, offset_index=None):
+
+    # Figure out what kind of catalogue it is...
+    file_format = get_catalogue_format(path, file_format)
+
+    # Columnar...
+    if file_format in ('arrow', 'parquet'):
+        return ColumnarCatalogueReader(path, file_format, offset)
+
+    # Newline delimited JSON...
+    if file_format == 'ndjson':
+        return NdjsonCatalogueReader(path, offset)
+
+    # CSV arriving on standard input...
+    if path == '-':
+        return CsvStreamCatalogueReader(path, delimiter, offset)
+
+    # CSV file...
+    return CsvCatalogueReader(path, delimiter, offset, offset_index)
+
+# Reader which reads the first song from another reader as soon as it is
+#  constructed and then yields it along with the rest. Readers only check a
+#  catalogue's columns once they start parsing it, so this rejects one with
+#  unrecognized or missing columns before any server is contacted...
+class PrimedCatalogueReader:
+
+    # Constructor...
+    def __init__(self, catalogue_reader):
+        self._catalogue_reader  = catalogue_reader
+        self._rows              = iter(catalogue_reader)
+        self._first_rows        = list(itertools.islice(self._rows, 1))
+
+    # Iterator method...
+    def __iter__(self):
+        yield from self._first_rows
+        self._first_rows = []
+        yield from self._rows
+
+    # Get the total number of songs in the catalogue, or an estimate or None
+    #  if not known yet...
+    def get_songs_total(self):
+        return self._catalogue_reader.get_songs_total()
+
+# Linux inotify instance, used through the C library directly so that no other
+#  dependency is needed. The constructor raises an OSError where inotify isn't
+#  available, such as on other platforms...
+class InotifyWatcher:
+
+    # Event masks from <sys/inotify.h>...
+    IN_MODIFY       = 0x00000002
+    IN_CLOSE_WRITE  = 0x00000008
+    IN_MOVED_TO     = 0x00000080
+    IN_CREATE       = 0x00000100
+    IN_Q_OVERFLOW   = 0x00004000
+    IN_IGNORED      = 0x00008000
+    IN_ISDIR        = 0x40000000
+
+    # Fixed size part of each event, followed by a null padded name...
+    event_header = struct.Struct('iIII')
+
+    # Constructor...
+    def __init__(self):
+
+        # Find inotify in the C library...
+        try:
+            self._libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+            self._libc.inotify_init1
+        except (AttributeError, OSError) as some_exception:
+            raise OSError(_(F"inotify is not available ({str(some_exception)}).")) from some_exception
+
+        # Create an instance...
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+
+        # Path being watched for each watch descriptor...
+        self._paths = {}
+
+    # Start watching the given file or directory for the given events...
+    def add_watch(self, path, mask):
+        watch_descriptor = self._libc.inotify_add_watch(self._fd, os.fsencode(path), mask)
+        if watch_descriptor < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error), path)
+        self._paths[watch_descriptor] = path
+
+    # Stop watching everything...
+    def close(self):
+        if getattr(self, '_fd', -1) >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    # Wait up to timeout seconds for events and return a list of pairs of each
+    #  event's mask and the path it concerns. The path is None if events were
+    #  lost because too many arrived at once...
+    def read_events(self, timeout):
+
+        # Wait for something to read...
+        if not select.select([self._fd], [], [], timeout)[0]:
+            return []
+
+        # Read as many events as are ready...
+        try:
+            data = os.read(self._fd, 65536)
+        except BlockingIOError:
+            return []
+
+        # Unpack each...
+        events = []
+        offset = 0
+        while offset + self.event_header.size <= len(data):
+
+            # Fixed size part, then the name, if any...
+            watch_descriptor, mask, cookie, name_length = self.event_header.unpack_from(data, offset)
+            offset += self.event_header.size
+            name = data[offset:offset + name_length].rstrip(b'\0')
+            offset += name_length
+
+            # Watch was removed, such as when its directory was deleted...
+            if mask & self.IN_IGNORED:
+                self._paths.pop(watch_descriptor, None)
+                continue
+
+            # Events were lost...
+            if mask & self.IN_Q_OVERFLOW or watch_descriptor not in self._paths:
+                events.append((mask, None))
+                continue
+
+            # Event about a watched file or something in a watched directory...
+            path = self._paths[watch_descriptor]
+            if name:
+                path = os.path.join(path, os.fsdecode(name))
+            events.append((mask, path))
+
+        # Done...
+        return events
+
+# Create an inotify instance for the requested --watch-method, or return None
+#  if the file system should be polled instead...
+def create_inotify_watcher(method):
+
+    # User asked to poll...
+    if method == 'poll':
+        return None
+
+    # Otherwise try inotify, falling back to polling unless it was asked for
+    #  explicitly...
+    try:
+        return InotifyWatcher()
+    except OSError as some_exception:
+        if method == 'inotify':
+            raise
+        logging.info(_(F"Could not use inotify ({str(some_exception)}). Polling instead..."))
+        return None
+
+# Reader which follows a growing CSV catalogue, yielding rows already in it and
+#  then each one appended to it until interrupted. Only complete rows are
+#  parsed, so a writer can append a row in pieces, even within a quoted field
+#  spanning lines. If the catalogue is replaced
+#  or truncated, it is read again from the beginning. Rows read before catching
+#  up with the end of the catalogue each time it is opened have found_by_scan
+#  set, since those already on the server are then reported as conflicts and
+#  skipped. None is yielded whenever nothing new arrives within the interval so
+#  that the caller can decide whether to keep waiting...
+class WatchedCsvCatalogueReader:
+
+    # Largest number of bytes to parse at a time...
+    read_size = 16777216
+
+    # Constructor...
+    def __init__(self, path, delimiter=',', offset=1, interval=2.0, method='auto'):
+
+        # A compressed file can't be followed as it grows...
+        if estimate_catalogue_lines(path) is None:
+            raise helios.exceptions.Validation(_(F"Cannot --watch {path}. It must be an uncompressed catalogue or a directory."))
+
+        # Initialize...
+        self._delimiter     = delimiter
+        self._interval      = interval
+        self._method        = method
+        self._offset        = max(offset, 1)
+        self._path          = path
+        self._songs_read    = 0
+
+    # Iterator method...
+    def __iter__(self):
+
+        # Watch the catalogue's directory so that it is noticed if the file is
+        #  replaced as well as when it is appended to...
+        watcher = create_inotify_watcher(self._method)
+        if watcher:
+            watcher.add_watch(
+                os.path.dirname(os.path.abspath(self._path)),
+                InotifyWatcher.IN_CLOSE_WRITE | InotifyWatcher.IN_CREATE |
+                InotifyWatcher.IN_MODIFY | InotifyWatcher.IN_MOVED_TO)
+
+        # Catalogue file, its identity, complete records after its column
+        #  header line holding back any still being written, and whether we
+        #  have caught up with its end since opening it...
+        caught_up       = False
+        file            = None
+        file_identity   = None
+        record_buffer   = None
+
+        try:
+
+            # Keep following the catalogue until interrupted...
+            while True:
+
+                # Check on the catalogue, which may not exist yet...
+                try:
+                    file_stat = os.stat(self._path)
+                except FileNotFoundError:
+                    file_stat = None
+
+                # Open it, or open it again if it was replaced or truncated...
+                if file_stat is not None and (
+                    file is None or
+                    file_identity != (file_stat.st_dev, file_stat.st_ino) or
+                    file_stat.st_size < file.tell()):
+
+                    # Start over...
+                    if file is not None:
+                        logging.info(_(F"Catalogue {self._path} was replaced or truncated. Reading it again from the beginning..."))
+                        file.close()
+                    caught_up           = False
+                    file                = open(self._path, 'rb')
+                    file_identity       = (file_stat.st_dev, file_stat.st_ino)
+                    record_buffer       = CsvRecordBuffer(self._delimiter)
+                    self._songs_read    = 0
+
+                # Read whatever has been appended since last time...
+                data = file.read(self.read_size) if file is not None else b''
+
+                # Hand each new complete row to the caller...
+                if data:
+                    records = record_buffer.add(data)
+                    if records.strip():
+                        yield from self._parse_rows(record_buffer.get_header_line() + records, not caught_up)
+
+                # More is waiting to be read...
+                if len(data) == self.read_size:
+                    continue
+
+                # Anything read from now on was appended while we watched...
+                caught_up = True
+
+                # Otherwise wait for something to change...
+                if watcher:
+                    watcher.read_events(self._interval)
+                else:
+                    time.sleep(self._interval)
+
+                # Let caller know nothing arrived...
+                yield None
+
+        # Clean up...
+        finally:
+            if file is not None:
+                file.close()
+            if watcher:
+                watcher.close()
+
+    # Parse the given column header line and rows, skipping any before the
+    #  requested offset, and noting whether they were found by reading what was
+    #  already there...
+    def _parse_rows(self, data, found_by_scan):
+
+        # Parse and check columns...
+        data_frame = read_catalogue_csv(io.BytesIO(data), delimiter=self._delimiter)
+        validate_catalogue_field_names(data_frame.columns.tolist())
+
+        # Skip whatever part is before the requested offset...
+        first_song_offset = self._songs_read + 1
+        self._songs_read += len(data_frame)
+        if self._songs_read < self._offset:
+            return
+        if first_song_offset < self._offset:
+            data_frame = data_frame.iloc[self._offset - first_song_offset:]
+
+        # Hand each row to the caller...
+        for csv_row in catalogue_data_frame_to_rows(data_frame):
+            csv_row['found_by_scan'] = found_by_scan
+            yield csv_row
+
+    # Get the total number of songs in the catalogue, which is never known...
+    def get_songs_total(self):
+        return None
+
+# Reader which watches a directory tree for new song files, yielding a row for
+#  each one already there and then for each one that arrives until interrupted.
+#  A song's reference is formed from its path relative to the directory, the
+#  same way helios-catalogue-songs(1) does, and rows for songs already there
+#  have found_by_scan set. With inotify, a
+#  file is ready as soon as whatever wrote it closes it or it is moved in.
+#  Otherwise it is ready once it hasn't been modified for the interval. None is
+#  yielded whenever nothing new arrives within the interval so that the caller
+#  can decide whether to keep waiting...
+class WatchedDirectoryReader:
+
+    # Events of interest in each watched directory...
+    watch_mask = InotifyWatcher.IN_CLOSE_WRITE | InotifyWatcher.IN_CREATE | InotifyWatcher.IN_MOVED_TO
+
+    # Constructor...
+    def __init__(self, path, interval=2.0, method='auto'):
+
+        # Initialize...
+        self._interval      = interval
+        self._method        = method
+        self._path          = path
+        self._paths_pending = {}
+        self._paths_seen    = set()
+
+    # Iterator method...
+    def __iter__(self):
+
+        # Try to use inotify...
+        watcher = create_inotify_watcher(self._method)
+
+        try:
+
+            # Start with whatever is already there...
+            ready_paths = self._scan(self._path, watcher)
+            scanned_paths = set(ready_paths)
+            last_checked = time.monotonic()
+
+            # Keep watching until interrupted...
+            while True:
+
+                # Hand each new song to the caller...
+                for path in sorted(set(ready_paths) - self._paths_seen):
+                    self._paths_seen.add(path)
+                    self._paths_pending.pop(path, None)
+                    yield {
+                        'reference'     : get_song_reference('', os.path.relpath(path, self._path)),
+                        'path'          : path,
+                        'found_by_scan' : path in scanned_paths
+                    }
+                scanned_paths = set()
+
+                # Nothing new arrived...
+                if not ready_paths:
+                    yield None
+                ready_paths = []
+
+                # Polling, so wait and then look for anything new...
+                if not watcher:
+                    time.sleep(self._interval)
+                    ready_paths = self._scan(self._path, None)
+                    continue
+
+                # Otherwise deal with each event...
+                for mask, path in watcher.read_events(self._interval):
+
+                    # Events were lost, so look at everything again...
+                    if path is None:
+                        ready_paths.extend(self._scan(self._path, watcher))
+
+                    # A directory arrived. Watch it and anything in it...
+                    elif mask & InotifyWatcher.IN_ISDIR:
+                        ready_paths.extend(self._scan(path, watcher))
+
+                    # A song finished being written or was moved in...
+                    elif mask & (InotifyWatcher.IN_CLOSE_WRITE | InotifyWatcher.IN_MOVED_TO):
+                        if path.lower().endswith(song_file_extensions):
+                            ready_paths.append(path)
+
+                # Every interval, check on songs that were found by scanning
+                #  while still being written...
+                if self._paths_pending and time.monotonic() - last_checked >= self._interval:
+                    for path in list(self._paths_pending):
+                        if self._is_ready(path):
+                            ready_paths.append(path)
+                    last_checked = time.monotonic()
+
+        # Clean up...
+        finally:
+            if watcher:
+                watcher.close()
+
+    # Check whether a song file found by scanning has finished being written.
+    #  It has if it hasn't changed since it was last seen and was last modified
+    #  at least an interval ago...
+    def _is_ready(self, path):
+
+        # Get its size and modification time...
+        try:
+            file_stat = os.stat(path)
+        except FileNotFoundError:
+            self._paths_pending.pop(path, None)
+            return False
+        file_state = (file_stat.st_size, file_stat.st_mtime_ns)
+
+        # Has not changed and has not for a while...
+        if self._paths_pending.get(path, file_state) == file_state and time.time() - file_stat.st_mtime >= self._interval:
+            return True
+
+        # Otherwise check again later...
+        self._paths_pending[path] = file_state
+        return False
+
+    # Look for songs under the given directory, watching each directory found
+    #  for further changes, if inotify is in use. Returns the paths to those
+    #  that are ready...
+    def _scan(self, directory, watcher):
+
+        # Songs that are ready...
+        ready_paths = []
+
+        # Visit each directory...
+        for parent, directory_names, file_names in os.walk(directory):
+
+            # Watch it...
+            if watcher:
+                watcher.add_watch(parent, self.watch_mask)
+
+            # Check each song not already handed to the caller...
+            for file_name in file_names:
+                path = os.path.join(parent, file_name)
+                if file_name.lower().endswith(song_file_extensions) and path not in self._paths_seen and self._is_ready(path):
+                    ready_paths.append(path)
+
+        # Done...
+        return ready_paths
+
+    # Get the total number of songs, which is never known...
+    def get_songs_total(self):
+        return None
+
+# Generator which reorders catalogue rows according to the requested schedule.
+#  Rows are read window rows at a time and each song file in the window is
+#  stat'd in parallel, which also warms the file system's metadata cache before
+#  the consumers get to them. Largest-first yields the biggest files first so
+#  the import doesn't end with most consumers idle waiting on a few large
+#  uploads. Directory yields files grouped by directory, then in inode order,
+#  which roughly follows their layout on disk. Files that can't be stat'd are
+#  yielded last and left to fail as they normally would during upload...
+def schedule_catalogue_rows(rows, schedule, window):
+
+    # Nothing to reorder...
+    if schedule == 'catalogue':
+        yield from rows
+        return
+
+    # Stat a file, if we can...
+    def stat_song(csv_row):
+        try:
+            return os.stat(csv_row['path'])
+        except OSError:
+            return None
+
+    # Stat files several at a time...
+    with concurrent.futures.ThreadPoolExecutor(max_workers=16) as executor:
+
+        # Keep reading windows of rows until the catalogue is exhausted...
+        rows = iter(rows)
+        while True:
+
+            # Get the next window...
+            window_rows = list(itertools.islice(rows, max(window, 1)))
+            if len(window_rows) == 0:
+                break
+
+            # Stat each song...
+            window_stats = list(executor.map(stat_song, window_rows))
+
+            # Construct a sort key for each song...
+            if schedule == 'largest-first':
+                sort_keys = [
+                    (file_stat is None, -(file_stat.st_size if file_stat else 0))
+                    for file_stat in window_stats]
+            else:
+                sort_keys = [
+                    (file_stat is None, os.path.dirname(os.path.abspath(csv_row['path'])), file_stat.st_ino if file_stat else 0)
+                    for csv_row, file_stat in zip(window_rows, window_stats)]
+
+            # Yield them in order...
+            for index in sorted(range(len(window_rows)), key=sort_keys.__getitem__):
+                yield window_rows[index]
+
+# Cheaply estimate the number of song lines in an uncompressed catalogue
+#  without parsing it by sampling the average line length from the beginning of
+#  the file. Returns None for compressed catalogues whose size on disk says
+#  little about how many lines they have...
+def estimate_catalogue_lines(path, sample_size=1048576, header_lines=1):
+
+    # Compressed, so no reasonable estimate is possible...
+    if os.path.splitext(path)[1].lower() in ('.bz2', '.gz', '.xz', '.zip', '.zst'):
+        return None
+
+    # Try to sample the beginning of the file...
+    try:
+        file_size = os.path.getsize(path)
+        with open(path, 'rb') as file:
+            sample = file.read(sample_size)
+
+    # Not a regular file, such as a pipe...
+    except OSError:
+        return None
+
+    # Count lines in the sample...
+    sample_lines = sample.count(b'\n')
+
+    # Whole file fit in the sample, so don't count any header line...
+    if len(sample) >= file_size:
+        return max(sample_lines - header_lines, 0)
+
+    # Otherwise extrapolate from average line length...
+    return max(int(file_size * sample_lines / max(len(sample), 1)) - header_lines, 0)
+
+# Local cache of sparse offset indexes for CSV input catalogues, kept in an
+#  SQLite database. Each records the byte offset of every so many rows so that
+#  an import can begin at a given --offset by seeking close to it rather than
+#  parsing every row before it. An index is only valid while its catalogue's
+#  size and modification time are unchanged, and is rebuilt otherwise...
+class CatalogueOffsetIndex:
+
+    # Number of rows between each indexed byte offset...
+    interval = 1000
+
+    # Number of bytes to scan at a time...
+    read_size = 1048576
+
+    # Constructor...
+    def __init__(self, path):
+
+        # Initialize...
+        self._path = path
+
+        # Create the directory to hold it, if necessary...
+        directory = os.path.dirname(os.path.abspath(path))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        # Open or create the database...
+        self._connection = sqlite3.connect(database=path)
+        self._connection.execute('PRAGMA journal_mode=WAL;')
+        self._connection.execute('PRAGMA synchronous=NORMAL;')
+
+        # Indexes made before the delimiter was recorded may have found rows
+        #  in the wrong places, so forget them...
+        catalogue_columns = [row[1] for row in self._connection.execute('PRAGMA table_info(catalogues);')]
+        if catalogue_columns and 'delimiter' not in catalogue_columns:
+            self._connection.execute('DROP TABLE catalogues;')
+
+        # Create schema if this is a new index...
+        self._connection.execute(
+        """
+            CREATE TABLE IF NOT EXISTS catalogues (
+                path        TEXT PRIMARY KEY NOT NULL,
+                size        INTEGER NOT NULL,
+                mtime       INTEGER NOT NULL,
+                interval    INTEGER NOT NULL,
+                delimiter   TEXT NOT NULL,
+                songs       INTEGER NOT NULL,
+                header      BLOB NOT NULL,
+                offsets     BLOB NOT NULL
+            );
+        """)
+
+    # Scan a catalogue for the start of every row, the same way pandas would
+    #  find them, without parsing any. Returns a tuple of the number of songs,
+    #  the column header line, and the packed byte offsets of every interval'th
+    #  row...
+    def _index_catalogue(self, path, delimiter):
+
+        # Initialize...
+        header_record   = None
+        offsets         = array.array('Q')
+        scanner         = CsvRecordScanner(delimiter)
+        songs           = 0
+
+        # Scan the whole catalogue...
+        with open(path, 'rb') as file:
+            while True:
+
+                # Find every record completed by the next block, or the final
+                #  one at the end...
+                data = file.read(self.read_size)
+                records = scanner.feed(data) if data else scanner.finish()
+
+                # Check each...
+                for record_start, record_end, is_row in records:
+
+                    # Not a row...
+                    if not is_row:
+                        continue
+
+                    # The first row is the column header...
+                    if header_record is None:
+                        header_record = (record_start, record_end)
+                        continue
+
+                    # Index every interval'th song...
+                    if songs % self.interval == 0:
+                        offsets.append(record_start)
+                    songs += 1
+
+                # Done...
+                if not data:
+                    break
+
+            # Read back the column header line...
+            header_line = b''
+            if header_record is not None:
+                file.seek(header_record[0])
+                header_line = file.read(header_record[1] - header_record[0])
+
+        # Done...
+        return songs, header_line, offsets.tobytes()
+
+    # Close the index...
+    def close(self):
+        if self._connection:
+            self._connection.close()
+            self._connection = None
+
+    # Get the position to begin parsing the given catalogue with the given
+    #  delimiter from in order to reach the given song offset, indexing the
+    #  catalogue first if necessary.
+    #  Returns a tuple of the column header line, the byte offset of the
+    #  nearest indexed row at or before the song, the number of songs before
+    #  that row, and the total number of songs in the catalogue. Returns None if
+    #  the offset is beyond the end of the catalogue...
+    def get_position(self, path, offset, delimiter=','):
+
+        # Identify the catalogue by its absolute path, size, and modification
+        #  time...
+        path = os.path.abspath(path)
+        file_stat = os.stat(path)
+
+        # Check the index...
+        row = self._connection.execute(
+            'SELECT songs, header, offsets FROM catalogues WHERE path = ? AND size = ? AND mtime = ? AND interval = ? AND delimiter = ?;',
+            (path, file_stat.st_size, file_stat.st_mtime_ns, self.interval, delimiter)).fetchone()
+
+        # Not there or stale, so index it and remember it...
+        if row is None:
+            logging.info(_(F"Indexing {path} to find song {offset:,}..."))
+            row = self._index_catalogue(path, delimiter)
+            with self._connection:
+                self._connection.execute(
+                    'INSERT OR REPLACE INTO catalogues (path, size, mtime, interval, delimiter, songs, header, offsets) VALUES (?, ?, ?, ?, ?, ?, ?, ?);',
+                    (path, file_stat.st_size, file_stat.st_mtime_ns, self.interval, delimiter, *row))
+        songs_total, header_line, offsets_data = row
+
+        # Find the nearest indexed row...
+        offsets = array.array('Q')
+        offsets.frombytes(offsets_data)
+        offset_index = (offset - 1) // self.interval
+        if not header_line or offset_index >= len(offsets):
+            return None
+        return header_line, offsets[offset_index], offset_index * self.interval, songs_total
+
+    # Get path to index on disk...
+    def get_path(self):
+        return self._path
+
+# Get the default path of the catalogue offset index...
+def get_default_offset_index_path():
+    return os.path.join(get_cache_directory(), 'offsets.db')
+
+# MIME types libmagic may report for a song file other than audio/*, since some
+#  containers are shared with video and some MPEG streams have no signature it
+#  recognizes. These are left to the header decode to decide...
+preflight_container_mime_types = {
+    'application/octet-stream',
+    'application/ogg',
+    'video/mp4',
+    'video/ogg',
+    'video/quicktime',
+    'video/webm',
+    'video/x-matroska'
+}
+
+# Check each of the given song files could be imported. This runs in a worker
+#  process. Each is a tuple of its path and any cached result, itself a tuple of
+#  size, modification time, MIME type, and rejection reason. A cached result is
+#  reused if the file's size and modification time haven't changed. Returns a
+#  list of tuples of size, modification time, MIME type, rejection reason or
+#  None if it passed, and whether the result came from the cache...
+def check_song_files(files):
+
+    # Results for each file...
+    results = []
+
+    # Check each...
+    for path, cached_result in files:
+
+        # Stat it...
+        try:
+            file_stat = os.stat(path)
+        except FileNotFoundError:
+            results.append((None, None, None, _("not found"), False))
+            continue
+        except OSError as some_exception:
+            results.append((None, None, None, _(F"cannot access ({some_exception.strerror})"), False))
+            continue
+
+        # Unchanged since it was last checked...
+        if cached_result and cached_result[0] == file_stat.st_size and cached_result[1] == file_stat.st_mtime_ns:
+            results.append((*cached_result, True))
+            continue
+
+        # Otherwise check it properly...
+        mime_type   = None
+        reason      = None
+        try:
+
+            # Must be a regular file with something in it...
+            if not stat.S_ISREG(file_stat.st_mode):
+                reason = _("not a regular file")
+            elif file_stat.st_size == 0:
+                reason = _("empty file")
+
+            # Must be readable and look like audio...
+            else:
+                with open(path, 'rb') as file:
+                    header = file.read(8192)
+                mime_type = magic.from_buffer(header, mime=True)
+                if not mime_type.startswith('audio/') and mime_type not in preflight_container_mime_types:
+                    reason = _(F"not audio ({mime_type})")
+
+                # And its header must decode...
+                elif mutagen.File(path) is None:
+                    reason = _("unrecognized audio format")
+
+        # Couldn't read it...
+        except OSError as some_exception:
+            reason = _(F"unreadable ({some_exception.strerror or str(some_exception)})")
+
+        # Header didn't decode...
+        except Exception as some_exception:
+            reason = _(F"corrupt header ({str(some_exception)})")
+
+        # Add to list...
+        results.append((file_stat.st_size, file_stat.st_mtime_ns, mime_type, reason, False))
+
+    # Done...
+    return results
+
+# Local cache of preflight results for song files, kept in an SQLite database.
+#  A file's result is only valid while its size and modification time are
+#  unchanged, which the worker processes check for themselves...
+class PreflightCache:
+
+    # Constructor...
+    def __init__(self, path):
+
+        # Initialize...
+        self._path = path
+
+        # Create the directory to hold it, if necessary...
+        directory = os.path.dirname(os.path.abspath(path))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        # Open or create the database...
+        self._connection = sqlite3.connect(database=path)
+        self._connection.execute('PRAGMA journal_mode=WAL;')
+        self._connection.execute('PRAGMA synchronous=NORMAL;')
+
+        # Create schema if this is a new cache...
+        self._connection.execute(
+        """
+            CREATE TABLE IF NOT EXISTS files (
+                path        TEXT PRIMARY KEY NOT NULL,
+                size        INTEGER NOT NULL,
+                mtime       INTEGER NOT NULL,
+                mime_type   TEXT,
+                reason      TEXT
+            );
+        """)
+
+    # Close the cache...
+    def close(self):
+        if self._connection:
+            self._connection.close()
+            self._connection = None
+
+    # Get cached results for the given absolute paths. Returns a dictionary of
+    #  tuples of size, modification time, MIME type, and rejection reason...
+    def get_results(self, paths):
+        cursor = self._connection.execute(
+            F"SELECT path, size, mtime, mime_type, reason FROM files WHERE path IN ({', '.join('?' * len(paths))});",
+            paths)
+        return { row[0]: row[1:] for row in cursor }
+
+    # Get path to cache on disk...
+    def get_path(self):
+        return self._path
+
+    # Store results for a list of tuples of absolute path, size, modification
+    #  time, MIME type, and rejection reason...
+    def put_results(self, results):
+        with self._connection:
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO files (path, size, mtime, mime_type, reason) VALUES (?, ?, ?, ?, ?);',
+                results)
+
+# Get the default path of the preflight result cache...
+def get_default_preflight_cache_path():
+    return os.path.join(get_cache_directory(), 'preflight.db')
+
+# Check every song in the catalogue could be imported without contacting a
+#  server, then write out a clean catalogue of those that passed and a rejects
+#  file of those that didn't, with why. Files are checked in parallel worker
+#  processes and results cached, so checking an unchanged catalogue again only
+#  costs a stat of each file. Returns True if the check completed...
+def preflight_catalogue(arguments):
+
+    # Number of songs handed to a worker process at a time...
+    batch_size = 64
+
+    # Result cache, if one is kept...
+    cache = None
+
+    # Output files...
+    clean_file      = None
+    rejects_file    = None
+
+    # Statistics...
+    songs_cached    = 0
+    songs_checked   = 0
+    reasons         = collections.Counter()
+    started         = time.monotonic()
+
+    try:
+
+        # Songs are checked as they are read and never uploaded...
+        if arguments.watch or arguments.benchmark:
+            raise helios.exceptions.Validation(_("--preflight cannot be combined with --watch or --benchmark."))
+
+        # Output goes next to the catalogue by default...
+        if arguments.preflight_clean is None or arguments.preflight_rejects is None:
+
+            # Can't put it next to standard input...
+            if arguments.catalogue_file == '-':
+                raise helios.exceptions.Validation(_("--preflight on standard input needs --preflight-clean and --preflight-rejects."))
+
+            # Strip any compression extension as well as the format's...
+            root, extension = os.path.splitext(arguments.catalogue_file)
+            if extension.lower() in catalogue_stream_openers or extension.lower() in ('.zip', '.zst'):
+                root = os.path.splitext(root)[0]
+
+            # Use whichever weren't given...
+            if arguments.preflight_clean is None:
+                arguments.preflight_clean = F"{root}.clean.csv"
+            if arguments.preflight_rejects is None:
+                arguments.preflight_rejects = F"{root}.rejects.csv"
+
+        # Open the catalogue...
+        reader = create_catalogue_reader(
+            path=arguments.catalogue_file,
+            file_format=arguments.format,
+            delimiter=arguments.delimiter,
+            offset=arguments.offset)
+
+        # Open the result cache. We can still check every file without it...
+        try:
+            cache = PreflightCache(get_default_preflight_cache_path())
+        except (OSError, sqlite3.Error) as some_exception:
+            logging.warning(_(F"Could not open preflight cache ({str(some_exception)}). Every file will be checked."))
+
+        # Open the outputs and begin each with its column fields...
+        clean_file      = open(arguments.preflight_clean, 'w', encoding='utf-8')
+        rejects_file    = open(arguments.preflight_rejects, 'w', encoding='utf-8')
+        print(','.join(catalogue_field_types), file=clean_file)
+        print('reference,path,reason', file=rejects_file)
+
+        # Number of worker processes, and the most batches to have in flight
+        #  before writing out the oldest...
+        processes = arguments.threads if isinstance(arguments.threads, int) and arguments.threads > 0 else os.cpu_count() or 1
+        batches_maximum = processes * 4
+
+        # Write out the songs in a batch once they have all been checked...
+        def write_batch(csv_rows, future):
+
+            # Statistics need updating...
+            nonlocal songs_cached
+
+            # Remember new results...
+            new_results = []
+            for csv_row, (size, mtime, mime_type, reason, cached) in zip(csv_rows, future.result()):
+
+                # Tally...
+                if cached:
+                    songs_cached += 1
+                elif size is not None:
+                    new_results.append((os.path.abspath(csv_row['path'] or ''), size, mtime, mime_type, reason))
+
+                # Passed...
+                if reason is None:
+                    print(','.join(format_catalogue_field(csv_row.get(key)) for key in catalogue_field_types), file=clean_file)
+
+                # Rejected...
+                else:
+                    reasons[reason] += 1
+                    logging.debug(_(F"{csv_row['reference']} Rejected: {reason}."))
+                    print(','.join(format_catalogue_field(value) for value in (csv_row['reference'], csv_row['path'], reason)), file=rejects_file)
+
+            # Cache them...
+            if cache and new_results:
+                cache.put_results(new_results)
+
+        # Check songs in a pool of worker processes...
+        logging.info(_(F"Checking catalogue with {processes} worker processes..."))
+        with concurrent.futures.ProcessPoolExecutor(max_workers=processes) as executor:
+
+            # Batches still being checked, oldest first...
+            batches = collections.deque()
+
+            # Divide the catalogue into batches...
+            rows = iter(reader)
+            while True:
+
+                # Get the next batch...
+                csv_rows = list(itertools.islice(rows, batch_size))
+                if not csv_rows:
+                    break
+                songs_checked += len(csv_rows)
+
+                # Find what we already know about each song's file...
+                paths = [os.path.abspath(csv_row['path'] or '') for csv_row in csv_rows]
+                cached_results = cache.get_results(paths) if cache else {}
+
+                # Check them in a worker process...
+                future = executor.submit(
+                    check_song_files, [(path, cached_results.get(path)) for path in paths])
+                batches.append((csv_rows, future))
+
+                # Write out the oldest batch if we have enough in flight...
+                if len(batches) > batches_maximum:
+                    write_batch(*batches.popleft())
+
+            # Write out the rest...
+            while batches:
+                write_batch(*batches.popleft())
+
+        # Summarize...
+        songs_rejected = sum(reasons.values())
+        logging.info(_(F"Checked {songs_checked:,} songs, {songs_cached:,} from cache, in {time.monotonic() - started:.1f} seconds."))
+        logging.info(_(F"Wrote {songs_checked - songs_rejected:,} songs to {arguments.preflight_clean} and {songs_rejected:,} to {arguments.preflight_rejects}."))
+        for reason, count in reasons.most_common():
+            logging.info(_(F"  {count:,} {reason}"))
+
+        # Done...
+        return True
+
+    # User trying to abort...
+    except KeyboardInterrupt:
+        print(_('\rAborting, please wait a moment...'))
+
+    # Helios exception...
+    except helios.exceptions.ExceptionBase as some_exception:
+        print(some_exception.what())
+
+    # Some other kind of exception...
+    except Exception as some_exception:
+        print(_(F"An exception occurred: {str(some_exception)}"))
+
+    # Cleanup...
+    finally:
+
+        # Close outputs...
+        if clean_file:
+            clean_file.close()
+        if rejects_file:
+            rejects_file.close()
+
+        # Close cache...
+        if cache:
+            cache.close()
+
+    # Didn't complete...
+    return False
+
+# Local journal of the import state of each song in a catalogue, kept in an
+#  SQLite database so that an interrupted import can be resumed without having
+#  to retrieve the server's catalogue again. Every change is committed as it
+#  happens and the database is safe to share between consumer threads...
+class ImportJournal:
+
+    # States a song's journal entry can be in...
+    state_duplicate = 'duplicate'
+    state_exists    = 'exists'
+    state_failed    = 'failed'
+    state_queued    = 'queued'
+    state_uploaded  = 'uploaded'
+
+    # Constructor...
+    def __init__(self, path):
+
+        # Initialize...
+        self._path          = path
+        self._thread_lock   = threading.Lock()
+
+        # Open or create the database. We manage our own locking, and each
+        #  statement is its own transaction...
+        self._connection = sqlite3.connect(
+            database=path,
+            check_same_thread=False,
+            isolation_level=None)
+
+        # Write-ahead logging keeps commits cheap while still surviving a
+        #  crash of the importer...
+        self._connection.execute('PRAGMA journal_mode=WAL;')
+        self._connection.execute('PRAGMA synchronous=NORMAL;')
+
+        # Create schema if this is a new journal...
+        self._connection.execute(
+        """
+            CREATE TABLE IF NOT EXISTS songs (
+                reference   TEXT PRIMARY KEY NOT NULL,
+                state       TEXT NOT NULL,
+                path        TEXT,
+                fingerprint TEXT,
+                reason      TEXT,
+                updated     REAL NOT NULL
+            );
+        """)
+
+    # Close the journal...
+    def close(self):
+        with self._thread_lock:
+            if self._connection:
+                self._connection.close()
+                self._connection = None
+
+    # Get a set of the references of every song the journal knows is already
+    #  on the server, either because we uploaded it or found it already
+    #  there, or that was skipped as a duplicate of one that is...
+    def get_completed_references(self):
+        with self._thread_lock:
+            query = self._connection.execute(
+                'SELECT reference FROM songs WHERE state IN (?, ?, ?);',
+                (ImportJournal.state_duplicate, ImportJournal.state_exists, ImportJournal.state_uploaded))
+            return set(reference for (reference, ) in query)
+
+    # Get path to journal on disk...
+    def get_path(self):
+        return self._path
+
+    # Get a dictionary of the number of songs in each state...
+    def get_state_counts(self):
+        with self._thread_lock:
+            query = self._connection.execute(
+                'SELECT state, COUNT(*) FROM songs GROUP BY state;')
+            return dict(query.fetchall())
+
+    # Record that a song was skipped because its contents are identical to
+    #  those of the song with the given reference...
+    def mark_duplicate(self, reference, duplicate_of):
+        self._upsert(
+            """
+                INSERT INTO songs (reference, state, reason, updated) VALUES (?, ?, ?, ?)
+                ON CONFLICT (reference) DO UPDATE SET
+                    state=excluded.state, reason=excluded.reason, updated=excluded.updated;
+            """,
+            (reference, ImportJournal.state_duplicate, duplicate_of, time.time()))
+
+    # Record that a song was found to already be on the server. A song we
+    #  uploaded ourselves keeps that state...
+    def mark_exists(self, reference):
+        self._upsert(
+            """
+                INSERT INTO songs (reference, state, updated) VALUES (?, ?, ?)
+                ON CONFLICT (reference) DO UPDATE SET
+                    state=excluded.state, reason=NULL, updated=excluded.updated
+                WHERE state != ?;
+            """,
+            (reference, ImportJournal.state_exists, time.time(), ImportJournal.state_uploaded))
+
+    # Record that a song failed to import and why...
+    def mark_failed(self, reference, reason):
+        self._upsert(
+            """
+                INSERT INTO songs (reference, state, reason, updated) VALUES (?, ?, ?, ?)
+                ON CONFLICT (reference) DO UPDATE SET
+                    state=excluded.state, reason=excluded.reason, updated=excluded.updated;
+            """,
+            (reference, ImportJournal.state_failed, reason, time.time()))
+
+    # Record that a song has been handed to a consumer for upload...
+    def mark_queued(self, reference, path):
+        self._upsert(
+            """
+                INSERT INTO songs (reference, state, path, updated) VALUES (?, ?, ?, ?)
+                ON CONFLICT (reference) DO UPDATE SET
+                    state=excluded.state, path=excluded.path, reason=NULL, updated=excluded.updated;
+            """,
+            (reference, ImportJournal.state_queued, path, time.time()))
+
+    # Record that a song was uploaded along with a fingerprint of its
+    #  contents...
+    def mark_uploaded(self, reference, fingerprint):
+        self._upsert(
+            """
+                INSERT INTO songs (reference, state, fingerprint, updated) VALUES (?, ?, ?, ?)
+                ON CONFLICT (reference) DO UPDATE SET
+                    state=excluded.state, fingerprint=excluded.fingerprint, reason=NULL, updated=excluded.updated;
+            """,
+            (reference, ImportJournal.state_uploaded, fingerprint, time.time()))
+
+    # Execute a single statement which modifies the journal...
+    def _upsert(self, statement, parameters):
+        with self._thread_lock:
+            self._connection.execute(statement, parameters)
+
+# Persistent local index of song file content fingerprints, kept in an SQLite
+#  database. A file's SHA-256 is cached against its path, size, and
+#  modification time so it is only hashed again when it changes. The index also
+#  remembers which reference each fingerprint was uploaded as on each server so
+#  duplicate content can be recognized across catalogues and runs. Files are
+#  hashed by whichever consumer needs them, so hashing happens in parallel
+#  across them...
+class FingerprintIndex:
+
+    # Size of each read when hashing a file...
+    read_size = 1048576
+
+    # Largest file whose contents are kept after hashing it so that its upload
+    #  doesn't have to read it again...
+    keep_size = 33554432
+
+    # Constructor...
+    def __init__(self, path):
+
+        # Initialize...
+        self._claims        = {}
+        self._path          = path
+        self._thread_lock   = threading.Lock()
+
+        # Create the directory to hold it, if necessary...
+        directory = os.path.dirname(os.path.abspath(path))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        # Open or create the database. We manage our own locking, and each
+        #  statement is its own transaction...
+        self._connection = sqlite3.connect(
+            database=path,
+            check_same_thread=False,
+            isolation_level=None)
+        self._connection.execute('PRAGMA journal_mode=WAL;')
+        self._connection.execute('PRAGMA synchronous=NORMAL;')
+
+        # Create schema if this is a new index...
+        self._connection.execute(
+        """
+            CREATE TABLE IF NOT EXISTS files (
+                path        TEXT PRIMARY KEY NOT NULL,
+                size        INTEGER NOT NULL,
+                mtime       INTEGER NOT NULL,
+                fingerprint TEXT NOT NULL
+            );
+        """)
+
+        # Uploads recorded before they were kept per server can't be
+        #  attributed to one, so forget them...
+        upload_columns = [row[1] for row in self._connection.execute('PRAGMA table_info(uploads);')]
+        if upload_columns and 'server' not in upload_columns:
+            self._connection.execute('DROP TABLE uploads;')
+        self._connection.execute(
+        """
+            CREATE TABLE IF NOT EXISTS uploads (
+                server      TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                reference   TEXT NOT NULL,
+                updated     REAL NOT NULL,
+                PRIMARY KEY (server, fingerprint)
+            );
+        """)
+
+    # Claim the given content fingerprint for a song reference about to be
+    #  uploaded to the given server. If the same content was already uploaded
+    #  there, or is claimed by another song for it in this run, return that
+    #  song's reference instead. A previous upload only counts if calling
+    #  is_on_server with its reference says it is still there, since it may
+    #  have been deleted since. That is done outside of the lock since it may
+    #  need to ask the server...
+    def claim(self, fingerprint, reference, server, is_on_server):
+
+        # Check for a claim in this run or a previous upload...
+        with self._thread_lock:
+
+            # Already claimed in this run...
+            claimed_reference = self._claims.get((server, fingerprint))
+            if claimed_reference is not None and claimed_reference != reference:
+                return claimed_reference
+
+            # Previously uploaded...
+            row = self._connection.execute(
+                'SELECT reference FROM uploads WHERE server = ? AND fingerprint = ?;',
+                (server, fingerprint)).fetchone()
+            uploaded_reference = row[0] if row is not None and row[0] != reference else None
+
+        # Still on the server...
+        if uploaded_reference is not None and is_on_server(uploaded_reference):
+            return uploaded_reference
+
+        # Otherwise it's ours, unless another song claimed it in the
+        #  meantime...
+        with self._thread_lock:
+
+            # Claimed while we were checking...
+            claimed_reference = self._claims.get((server, fingerprint))
+            if claimed_reference is not None and claimed_reference != reference:
+                return claimed_reference
+
+            # Forget the previous upload that is no longer there...
+            if uploaded_reference is not None:
+                self._connection.execute(
+                    'DELETE FROM uploads WHERE server = ? AND fingerprint = ? AND reference = ?;',
+                    (server, fingerprint, uploaded_reference))
+
+            # Ours...
+            self._claims[(server, fingerprint)] = reference
+            return None
+
+    # Close the index...
+    def close(self):
+        with self._thread_lock:
+            if self._connection:
+                self._connection.close()
+                self._connection = None
+
+    # Get the fingerprint of the file at the given path, hashing it only if it
+    #  isn't already indexed or has changed since it was. If its contents were
+    #  already read ahead, they are hashed instead of reading it again. Returns
+    #  a tuple of the fingerprint and the file's contents if they were given or
+    #  had to be read and are small enough to keep, or None otherwise, so that
+    #  the upload can use them rather than reading the file again...
+    def get_fingerprint(self, path, content=None):
+
+        # Identify the file by its absolute path, size, and modification
+        #  time...
+        path = os.path.abspath(path)
+        file_stat = os.stat(path)
+
+        # Check the index...
+        with self._thread_lock:
+            row = self._connection.execute(
+                'SELECT fingerprint FROM files WHERE path = ? AND size = ? AND mtime = ?;',
+                (path, file_stat.st_size, file_stat.st_mtime_ns)).fetchone()
+        if row is not None:
+            return (row[0], content)
+
+        # Not there or stale, so hash it outside of the lock, keeping what we
+        #  read if it's small enough...
+        if content is None:
+            with open(path, 'rb') as song_file:
+                if file_stat.st_size <= FingerprintIndex.keep_size:
+                    content = song_file.read()
+                else:
+                    content_hash = hashlib.sha256()
+                    while True:
+                        data = song_file.read(FingerprintIndex.read_size)
+                        if not data:
+                            break
+                        content_hash.update(data)
+        if content is not None:
+            content_hash = hashlib.sha256(content)
+        fingerprint = content_hash.hexdigest()
+
+        # Remember it...
+        with self._thread_lock:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO files (path, size, mtime, fingerprint) VALUES (?, ?, ?, ?);',
+                (path, file_stat.st_size, file_stat.st_mtime_ns, fingerprint))
+
+        # Return it to caller...
+        return (fingerprint, content)
+
+    # Get path to index on disk...
+    def get_path(self):
+        return self._path
+
+    # Record that content with the given fingerprint is on the given server as
+    #  the given song reference...
+    def mark_uploaded(self, fingerprint, reference, server):
+        with self._thread_lock:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO uploads (server, fingerprint, reference, updated) VALUES (?, ?, ?, ?);',
+                (server, fingerprint, reference, time.time()))
+
+    # Release a claim on a fingerprint for the given server because the upload
+    #  didn't succeed, so that a later song with the same content can be
+    #  uploaded instead...
+    def release(self, fingerprint, reference, server):
+        with self._thread_lock:
+            if self._claims.get((server, fingerprint)) == reference:
+                del self._claims[(server, fingerprint)]
+
+# Get the default path of the fingerprint index...
+def get_default_fingerprint_index_path():
+    return os.path.join(get_cache_directory(), 'fingerprints.db')
+
+# Adaptive concurrency controller for the consumer thread pool. Every consumer
+#  thread is spawned up front, but only those with an index below the current
+#  limit take new work. Periodically the controller compares throughput, upload
+#  latency, error rate, and the server's CPU load over the last sampling window
+#  against the previous one and hill climbs the limit towards the most songs per
+#  minute that doesn't cause errors or saturate the server. The time spent
+#  waiting on the server's response once a song is sent is what --timeout-read
+#  bounds, so threads are only added while it stays flat and removed as it
+#  approaches the timeout...
+class AdaptiveConcurrencyController:
+
+    # Seconds between adjustments...
+    adjust_interval         = 20.0
+
+    # Error rate in a window above which we back off sharply...
+    error_rate_maximum      = 0.05
+
+    # Fraction of the read timeout that the 95th percentile of waiting on the
+    #  server's response may reach before we back off sharply...
+    latency_timeout_ratio   = 0.5
+
+    # Relative rise in mean response wait we still consider flat...
+    latency_tolerance       = 0.10
+
+    # Fraction of server CPU capacity above which we stop adding consumers, and
+    #  above which we begin removing them...
+    server_load_high        = 0.95
+    server_load_target      = 0.85
+
+    # Relative change in throughput we consider meaningful rather than noise...
+    throughput_tolerance    = 0.05
+
+    # Constructor. The read timeout defaults to that of helios-client...
+    def __init__(self, initial_limit, maximum_limit, status_client_factory, timeout_read=None):
+
+        # Initialize...
+        self._condition                 = threading.Condition()
+        self._direction                 = 1
+        self._limit                     = max(min(initial_limit, maximum_limit), 1)
+        self._maximum_limit             = max(maximum_limit, 1)
+        self._previous_response_latency = None
+        self._previous_throughput       = None
+        self._status_client             = None
+        self._status_client_factory     = status_client_factory
+        self._stop_event                = threading.Event()
+        self._thread                    = None
+        self._timeout_read              = timeout_read if timeout_read is not None else 300
+
+        # Samples gathered during the current window...
+        self._window_errors             = 0
+        self._window_latency            = 0.0
+        self._window_response_latencies = []
+        self._window_songs              = 0
+        self._window_start              = time.monotonic()
+
+    # Get the number of consumers currently allowed to take work...
+    def get_limit(self):
+        return self._limit
+
+    # Check whether the given consumer thread may take new work...
+    def is_active(self, consumer_thread_index):
+        return consumer_thread_index < self._limit
+
+    # Record the outcome of one upload attempt, how long it took, and how long
+    #  of that was spent waiting on the server's response after the song was
+    #  sent, if it got that far...
+    def record(self, latency, error, response_latency=None):
+        with self._condition:
+            self._window_songs      += 1
+            self._window_latency    += latency
+            self._window_errors     += int(error)
+            if response_latency is not None:
+                self._window_response_latencies.append(response_latency)
+
+    # Start periodically adjusting the limit in a background thread...
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._adjust_thread, name='adaptive-concurrency', daemon=True)
+        self._thread.start()
+
+    # Stop adjusting and release any idle consumers...
+    def stop(self):
+        self._stop_event.set()
+        with self._condition:
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    # Block an inactive consumer until it may take work, the controller is
+    #  stopped, or the timeout elapses...
+    def wait_until_active(self, consumer_thread_index, timeout):
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self.is_active(consumer_thread_index) or self._stop_event.is_set(),
+                timeout=timeout)
+
+    # Background thread which adjusts the limit every interval...
+    def _adjust_thread(self):
+        while not self._stop_event.wait(self.adjust_interval):
+            try:
+                self._adjust()
+            except Exception as some_exception:
+                logging.debug(_(F"concurrency: Adjustment skipped ({str(some_exception)})."))
+
+    # Take the samples of the window that just ended and decide on a new
+    #  limit...
+    def _adjust(self):
+
+        # Swap out the window's samples...
+        with self._condition:
+            elapsed             = max(time.monotonic() - self._window_start, 1e-6)
+            songs               = self._window_songs
+            errors              = self._window_errors
+            latency_total       = self._window_latency
+            response_latencies  = self._window_response_latencies
+            self._window_songs              = 0
+            self._window_errors             = 0
+            self._window_latency            = 0.0
+            self._window_response_latencies = []
+            self._window_start              = time.monotonic()
+
+        # Nothing completed yet, such as when every consumer is still busy with
+        #  a very large file. Wait for more information...
+        if songs == 0:
+            return
+
+        # Summarize window...
+        throughput      = songs * 60.0 / elapsed
+        error_rate      = errors / songs
+        latency         = latency_total / songs
+        server_load     = self._get_server_load()
+
+        # Summarize waiting on the server's response, if any song got that
+        #  far...
+        response_latency        = None
+        response_latency_p95    = None
+        if response_latencies:
+            response_latency        = sum(response_latencies) / len(response_latencies)
+            response_latency_p95    = numpy.percentile(response_latencies, 95)
+
+        # Whether responses are getting close to timing out, and whether they
+        #  are taking no longer than they did in the last window...
+        near_timeout = (
+            response_latency_p95 is not None and
+            response_latency_p95 > self._timeout_read * self.latency_timeout_ratio)
+        latency_flat = (
+            response_latency is None or self._previous_response_latency is None or
+            response_latency <= self._previous_response_latency * (1.0 + self.latency_tolerance))
+
+        # Whether adding a consumer would add load to a server already as busy
+        #  as we want it or slow its responses down further...
+        may_grow = latency_flat and not (server_load is not None and server_load > self.server_load_target)
+
+        # New limit starts where it is...
+        limit = self._limit
+
+        # Too many errors, or responses about to time out. Back off sharply...
+        if error_rate > self.error_rate_maximum or near_timeout:
+            limit = max(limit * 3 // 4, 1)
+            self._direction = 1
+
+        # Server saturated. Back off gently...
+        elif server_load is not None and server_load > self.server_load_high:
+            limit -= 1
+            self._direction = 1
+
+        # First window. Probe upwards...
+        elif self._previous_throughput is None:
+            limit += self._direction
+
+        # Last change helped. Keep going in the same direction, unless that
+        #  means growing when we shouldn't...
+        elif throughput > self._previous_throughput * (1.0 + self.throughput_tolerance):
+            if self._direction < 0 or may_grow:
+                limit += self._direction
+
+        # Last change hurt. Reverse it and head the other way...
+        elif throughput < self._previous_throughput * (1.0 - self.throughput_tolerance):
+            self._direction = -self._direction
+            limit += self._direction
+
+        # Plateau. Hold, but favour fewer consumers for the same throughput
+        #  since they cost the server less...
+        else:
+            self._direction = 1 if (server_load is not None and server_load < self.server_load_target and latency_flat) else -1
+
+        # Clamp to permitted range...
+        limit = max(min(limit, self._maximum_limit), 1)
+
+        # Log summary of window and decision...
+        server_load_string = F'{server_load:.0%}' if server_load is not None else _('unknown')
+        response_latency_string = F'{response_latency_p95:.1f}s' if response_latency_p95 is not None else _('unknown')
+        logging.info(_(
+            F"concurrency: {throughput:.1f} songs/min, {latency:.1f}s mean latency, "
+            F"{response_latency_string} p95 response wait, "
+            F"{error_rate:.0%} errors, server load {server_load_string}, "
+            F"{self._limit} -> {limit} threads."))
+
+        # Remember for next window...
+        self._previous_throughput = throughput
+        if response_latency is not None:
+            self._previous_response_latency = response_latency
+
+        # Apply and wake any consumers that may now take work...
+        with self._condition:
+            self._limit = limit
+            self._condition.notify_all()
+
+    # Sample the server's CPU load as a fraction of its capacity, or None if it
+    #  could not be determined...
+    def _get_server_load(self):
+
+        # Try to query the server...
+        try:
+
+            # Construct a client the first time we need one...
+            if self._status_client is None:
+                self._status_client = self._status_client_factory()
+
+            # Query...
+            return get_server_load(self._status_client.get_system_status())
+
+        # Server too busy to answer is a useful signal in itself, but treat it
+        #  as unknown and let latency and errors speak for it...
+        except Exception as some_exception:
+            logging.debug(_(F"concurrency: Could not sample server load ({str(some_exception)})."))
+            return None
+
+# Get a server's CPU load as a fraction of its capacity from its system status.
+#  The server reports it as a percentage of all of its cores...
+def get_server_load(system_status):
+    return system_status.cpu.load.all / 100.0
+
+# Live metrics of an import in progress. Counters and histograms are updated by
+#  the importer as songs are processed and can be exposed to Prometheus on a
+#  local HTTP endpoint, written periodically to a JSON snapshot file, or both.
+#  Upload time runs from the start of a song's upload until its last byte is
+#  sent, and analysis time from then until the server responds...
+class ImportMetrics:
+
+    # Upper bounds of histogram buckets, in seconds...
+    histogram_buckets = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+    # Seconds over which throughput rates are averaged...
+    rate_window = 60
+
+    # Constructor...
+    def __init__(self):
+
+        # Initialize...
+        self._bytes_uploaded    = 0
+        self._errors            = {}
+        self._gauges            = {}
+        self._histograms        = {
+            'analysis_seconds'  : self._create_histogram(),
+            'upload_seconds'    : self._create_histogram()
+        }
+        self._http_server       = None
+        self._retries           = 0
+        self._samples           = collections.deque(maxlen=ImportMetrics.rate_window + 1)
+        self._snapshot_interval = None
+        self._snapshot_path     = None
+        self._songs             = {}
+        self._songs_in_progress = 0
+        self._started           = time.time()
+        self._stop_event        = threading.Event()
+        self._thread            = None
+        self._thread_lock       = threading.Lock()
+
+    # Count bytes of song files sent to the server...
+    def count_bytes(self, count):
+        with self._thread_lock:
+            self._bytes_uploaded += count
+
+    # Count a failed attempt at a song by the class of error...
+    def count_error(self, error_class):
+        with self._thread_lock:
+            self._errors[error_class] = self._errors.get(error_class, 0) + 1
+
+    # Count a song put in the retry lane...
+    def count_retry(self):
+        with self._thread_lock:
+            self._retries += 1
+
+    # Count a song that is done with, by its outcome...
+    def count_song(self, outcome):
+        with self._thread_lock:
+            self._songs[outcome] = self._songs.get(outcome, 0) + 1
+
+    # Get a dictionary snapshot of every metric...
+    def get_snapshot(self):
+
+        # Sample gauges outside of the lock since they may take their own...
+        gauges = { name: gauge_callback() for name, (description, gauge_callback) in self._gauges.items() }
+
+        # Copy everything else...
+        with self._thread_lock:
+            (songs_per_second, bytes_per_second) = self._get_rates()
+            return {
+                'timestamp'         : time.time(),
+                'elapsed_seconds'   : time.time() - self._started,
+                'songs'             : dict(self._songs),
+                'songs_in_progress' : self._songs_in_progress,
+                'songs_per_second'  : songs_per_second,
+                'bytes_uploaded'    : self._bytes_uploaded,
+                'bytes_per_second'  : bytes_per_second,
+                'retries'           : self._retries,
+                'errors'            : dict(self._errors),
+                'histograms'        : {
+                    name: {
+                        'buckets'   : dict(zip(ImportMetrics.histogram_buckets, histogram['buckets'])),
+                        'count'     : histogram['count'],
+                        'sum'       : histogram['sum'] }
+                    for name, histogram in self._histograms.items() },
+                'gauges'            : gauges
+            }
+
+    # Get every metric in Prometheus text exposition format...
+    def get_prometheus_text(self):
+
+        # Take a snapshot...
+        snapshot = self.get_snapshot()
+
+        # Format each metric...
+        lines = []
+        def add_metric(name, metric_type, description, samples):
+            lines.append(F'# HELP helios_import_{name} {description}')
+            lines.append(F'# TYPE helios_import_{name} {metric_type}')
+            for labels, value in samples:
+                lines.append(F'helios_import_{name}{labels} {value}')
+
+        # Counters...
+        add_metric('songs_total', 'counter', 'Songs done with, by outcome.',
+            [(F'{{outcome="{outcome}"}}', count) for outcome, count in sorted(snapshot['songs'].items())])
+        add_metric('bytes_uploaded_total', 'counter', 'Bytes of song files sent to the server.',
+            [('', snapshot['bytes_uploaded'])])
+        add_metric('retries_total', 'counter', 'Songs put in the retry lane after a temporary failure.',
+            [('', snapshot['retries'])])
+        add_metric('errors_total', 'counter', 'Failed attempts at a song, by class of error.',
+            [(F'{{class="{error_class}"}}', count) for error_class, count in sorted(snapshot['errors'].items())])
+
+        # Histograms...
+        for name, description in (
+            ('upload_seconds', 'Time spent sending each song to the server.'),
+            ('analysis_seconds', 'Time spent waiting on the server to analyse each song once sent.')):
+            histogram = snapshot['histograms'][name]
+            samples = [(F'_bucket{{le="{bound}"}}', count) for bound, count in histogram['buckets'].items()]
+            samples.append(('_bucket{le="+Inf"}', histogram['count']))
+            samples.append(('_sum', histogram['sum']))
+            samples.append(('_count', histogram['count']))
+            add_metric(name, 'histogram', description, samples)
+
+        # Gauges...
+        add_metric('songs_in_progress', 'gauge', 'Songs currently being processed.',
+            [('', snapshot['songs_in_progress'])])
+        add_metric('songs_per_second', 'gauge', F'Songs done with per second over the last {ImportMetrics.rate_window} seconds.',
+            [('', snapshot['songs_per_second'])])
+        add_metric('bytes_per_second', 'gauge', F'Bytes uploaded per second over the last {ImportMetrics.rate_window} seconds.',
+            [('', snapshot['bytes_per_second'])])
+        for name, (description, gauge_callback) in sorted(self._gauges.items()):
+            add_metric(name, 'gauge', description, [('', snapshot['gauges'][name])])
+
+        # Done...
+        return '\n'.join(lines) + '\n'
+
+    # Record how long a song took to upload and then be analysed...
+    def observe_song_timing(self, upload_seconds, analysis_seconds):
+        with self._thread_lock:
+            self._observe(self._histograms['upload_seconds'], upload_seconds)
+            self._observe(self._histograms['analysis_seconds'], analysis_seconds)
+
+    # Add a gauge whose value is sampled from the given callback...
+    def set_gauge(self, name, description, gauge_callback):
+        self._gauges[name] = (description, gauge_callback)
+
+    # Note a song is now being processed...
+    def song_started(self):
+        with self._thread_lock:
+            self._songs_in_progress += 1
+
+    # Note a song is no longer being processed...
+    def song_stopped(self):
+        with self._thread_lock:
+            self._songs_in_progress -= 1
+
+    # Serve metrics to Prometheus on the given local address and port...
+    def start_http_server(self, address, port):
+
+        # Handler which serves the metrics...
+        metrics = self
+        class MetricsRequestHandler(http.server.BaseHTTPRequestHandler):
+
+            # Serve a GET request...
+            def do_GET(self):
+
+                # Only one endpoint...
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+
+                # Send the metrics...
+                body = metrics.get_prometheus_text().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            # Don't interleave access logs with the import's...
+            def log_message(self, format, *arguments):
+                pass
+
+        # Start serving in the background...
+        self._http_server = http.server.ThreadingHTTPServer((address, port), MetricsRequestHandler)
+        self._http_server.daemon_threads = True
+        threading.Thread(target=self._http_server.serve_forever, daemon=True).start()
+
+    # Start sampling throughput every second, writing a JSON snapshot to the
+    #  given path every interval seconds if requested...
+    def start_sampling(self, snapshot_path=None, snapshot_interval=10.0):
+        self._snapshot_interval = snapshot_interval
+        self._snapshot_path     = snapshot_path
+        self._thread            = threading.Thread(target=self._sample_thread, daemon=True)
+        self._thread.start()
+
+    # Stop serving and sampling, writing a final snapshot if requested...
+    def stop(self):
+
+        # Stop sampling...
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+        # Stop serving...
+        if self._http_server:
+            self._http_server.shutdown()
+            self._http_server.server_close()
+            self._http_server = None
+
+    # Create an empty histogram...
+    def _create_histogram(self):
+        return { 'buckets': [0] * len(ImportMetrics.histogram_buckets), 'count': 0, 'sum': 0.0 }
+
+    # Calculate songs and bytes per second over the sampling window. Caller
+    #  must hold the lock...
+    def _get_rates(self):
+        if len(self._samples) < 2:
+            return (0.0, 0.0)
+        (first_time, first_songs, first_bytes) = self._samples[0]
+        (last_time, last_songs, last_bytes) = self._samples[-1]
+        elapsed = max(last_time - first_time, 1e-9)
+        return ((last_songs - first_songs) / elapsed, (last_bytes - first_bytes) / elapsed)
+
+    # Add an observation to a cumulative histogram. Caller must hold the
+    #  lock...
+    def _observe(self, histogram, value):
+        for index, bound in enumerate(ImportMetrics.histogram_buckets):
+            if value <= bound:
+                histogram['buckets'][index] += 1
+        histogram['count'] += 1
+        histogram['sum'] += value
+
+    # Sampling thread...
+    def _sample_thread(self):
+
+        # Keep sampling every second until asked to stop...
+        last_snapshot = time.monotonic()
+        while True:
+
+            # Take a sample...
+            with self._thread_lock:
+                self._samples.append((time.monotonic(), sum(self._songs.values()), self._bytes_uploaded))
+
+            # Write a snapshot when one is due, and a final one on exit...
+            stopping = self._stop_event.wait(1.0)
+            if self._snapshot_path and (stopping or time.monotonic() - last_snapshot >= self._snapshot_interval):
+                self._write_snapshot()
+                last_snapshot = time.monotonic()
+
+            # Done...
+            if stopping:
+                break
+
+    # Write a JSON snapshot, replacing the previous one atomically so readers
+    #  never see a partial file...
+    def _write_snapshot(self):
+        try:
+            temporary_path = F'{self._snapshot_path}.tmp'
+            with open(temporary_path, 'w') as snapshot_file:
+                json.dump(self.get_snapshot(), snapshot_file, indent=4)
+            os.replace(temporary_path, self._snapshot_path)
+        except OSError as some_exception:
+            logging.warning(_(F"Could not write metrics snapshot to {self._snapshot_path} ({str(some_exception)})."))
+
+# Check if an exception raised while adding a song is likely to be temporary
+#  and so worth retrying. Connection problems, including timeouts, and server
+#  errors are. Anything the server has told us is wrong with the request, or
+#  running out of storage, isn't...
+def is_transient_failure(exception):
+
+    # Connection problems and timeouts...
+    if isinstance(exception, (helios.exceptions.Connection, ConnectionError, TimeoutError)):
+        return True
+
+    # Server out of storage won't fix itself...
+    if isinstance(exception, helios.exceptions.InsufficientStorage):
+        return False
+
+    # Any other server error...
+    if isinstance(exception, helios.exceptions.ResponseExceptionBase):
+        return exception.get_code() is not None and int(exception.get_code()) >= 500
+
+    # Anything else is permanent...
+    return False
+
+# A song file requested from a ReadAheadBuffer. It starts out pending, is
+#  reading once budget has been reserved for it, and is then ready until a
+#  consumer takes its contents. A pending file may instead be cancelled if a
+#  consumer gets to it first or it could never fit in the budget...
+class ReadAheadFile:
+
+    # Constructor...
+    def __init__(self, path):
+        self.content    = None
+        self.path       = path
+        self.size       = 0
+        self.state      = 'pending'
+
+# Read-ahead stage for the consumer threads. Song files are requested as their
+#  rows are queued and a few background threads read them into memory in order,
+#  so disk or network file system latency overlaps with uploads already in
+#  progress. The bytes held in memory, including those being read, never exceed
+#  the budget. A file is held until a consumer takes it, and one that is too
+#  large for the budget or not yet begun when its consumer arrives is simply
+#  read from disk during upload as usual...
+class ReadAheadBuffer:
+
+    # Constructor...
+    def __init__(self, budget, reader_threads=4):
+
+        # Initialize...
+        self._budget            = budget
+        self._buffered_bytes    = 0
+        self._condition         = threading.Condition()
+        self._pending           = collections.deque()
+        self._stopped           = False
+
+        # Start the readers...
+        self._threads = [
+            threading.Thread(target=self._reader_thread, daemon=True)
+            for reader_index in range(reader_threads)]
+        for thread in self._threads:
+            thread.start()
+
+    # Reader thread which reads each pending file in turn once there is room for
+    #  it in the budget...
+    def _reader_thread(self):
+
+        # Keep reading until stopped...
+        while True:
+
+            # Wait for the next pending file...
+            with self._condition:
+                while not self._pending and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+                read_ahead_file = self._pending.popleft()
+
+            # Find out how big it is, outside of the lock since this can be
+            #  slow on a network file system...
+            try:
+                size = os.path.getsize(read_ahead_file.path)
+            except OSError:
+                size = None
+
+            # Wait for room in the budget, unless a consumer gets to it first.
+            #  A file that could never fit, or can't be read, is left for the
+            #  consumer to read itself...
+            with self._condition:
+                if size is None or size > self._budget:
+                    read_ahead_file.state = 'cancelled'
+                    self._condition.notify_all()
+                    continue
+                while (self._buffered_bytes + size > self._budget and
+                       read_ahead_file.state == 'pending' and not self._stopped):
+                    self._condition.wait()
+                if read_ahead_file.state != 'pending' or self._stopped:
+                    continue
+                read_ahead_file.size    = size
+                read_ahead_file.state   = 'reading'
+                self._buffered_bytes   += size
+
+            # Read the whole file...
+            try:
+                with open(read_ahead_file.path, 'rb') as file:
+                    content = file.read()
+
+            # Couldn't. The consumer will find out why when it tries...
+            except OSError:
+                content = None
+
+            # Hand it over. If its size changed since we measured it, let the
+            #  consumer read it again itself rather than upload something stale...
+            with self._condition:
+                if content is None or len(content) != size or self._stopped:
+                    self._buffered_bytes   -= size
+                    read_ahead_file.state   = 'cancelled'
+                else:
+                    read_ahead_file.content = content
+                    read_ahead_file.state   = 'ready'
+                self._condition.notify_all()
+
+    # Get the number of bytes currently held or being read...
+    def get_buffered_bytes(self):
+        with self._condition:
+            return self._buffered_bytes
+
+    # Release a file's contents without using them, such as when its song was
+    #  skipped...
+    def release(self, read_ahead_file):
+        self.take(read_ahead_file)
+
+    # Request the given song file be read ahead. Returns a handle to later take
+    #  its contents with...
+    def request(self, path):
+        read_ahead_file = ReadAheadFile(path)
+        with self._condition:
+            self._pending.append(read_ahead_file)
+            self._condition.notify_all()
+        return read_ahead_file
+
+    # Stop reading ahead and release everything held...
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._pending.clear()
+            self._condition.notify_all()
+
+    # Take the contents of a requested file, waiting for it if it is being read
+    #  right now. Returns None if it wasn't read ahead, in which case the caller
+    #  should read it from disk itself...
+    def take(self, read_ahead_file):
+        with self._condition:
+
+            # Not begun yet, so there's no point waiting...
+            if read_ahead_file.state == 'pending':
+                read_ahead_file.state = 'cancelled'
+                self._condition.notify_all()
+                return None
+
+            # Being read right now...
+            while read_ahead_file.state == 'reading':
+                self._condition.wait()
+
+            # Not ready...
+            if read_ahead_file.state != 'ready':
+                return None
+
+            # Hand it over and free its part of the budget...
+            content                     = read_ahead_file.content
+            read_ahead_file.content     = None
+            read_ahead_file.state       = 'taken'
+            self._buffered_bytes       -= read_ahead_file.size
+            self._condition.notify_all()
+            return content
+
+# Recorder of how long each stage of the local import pipeline takes per song
+#  when benchmarking. Every song passes through each stage in turn. Parsing is
+#  done by the producer alone and the rest by every consumer in parallel. The
+#  queue stage is how long a parsed song waited for a free consumer. The read
+#  stage is how long a consumer waited to take a song file that was read ahead,
+#  and only songs that were have it. The stream stage is how long it took to
+#  stream the request body, reading the file from disk as it went if it wasn't
+#  read ahead. Safe to share between threads...
+class ImportBenchmark:
+
+    # Each stage, whether it is run by the consumers rather than the producer,
+    #  and whether it handles the song file's bytes...
+    stages = [
+        ('parse',   False,  False),
+        ('queue',   True,   False),
+        ('dedupe',  True,   False),
+        ('read',    True,   True),
+        ('stream',  True,   True)
+    ]
+
+    # Constructor...
+    def __init__(self, consumers):
+
+        # Initialize...
+        self._bytes         = collections.Counter()
+        self._consumers     = consumers
+        self._finished      = None
+        self._samples       = { stage: array.array('d') for stage, consumer, data in self.stages }
+        self._started       = time.monotonic()
+        self._thread_lock   = threading.Lock()
+
+    # Format a report of each stage's throughput and latency, and the pipeline
+    #  as a whole...
+    def get_report(self):
+
+        # Time taken overall, up until the last song was done with...
+        elapsed = max((self._finished or time.monotonic()) - self._started, 1e-9)
+
+        # Songs that made it all the way through, and their size...
+        songs       = len(self._samples['stream'])
+        mebibytes   = self._bytes['stream'] / 1048576
+
+        # Summary...
+        lines = [
+            _(F"Benchmarked {songs:,} songs, {mebibytes:,.1f} MiB, in {elapsed:.1f} seconds: {songs / elapsed:,.1f} songs/s, {mebibytes / elapsed:,.1f} MiB/s."),
+            _(F"{'Stage':<8} {'Songs/s':>10} {'MiB/s':>9} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+        ]
+
+        # Stage with the least capacity, ignoring time spent waiting in the
+        #  queue...
+        slowest_stage       = None
+        slowest_capacity    = None
+
+        # Each stage...
+        for stage, consumer, data in self.stages:
+
+            # Not reached...
+            samples = self._samples[stage]
+            if not samples:
+                continue
+
+            # Latency percentiles in milliseconds...
+            p50, p90, p99, maximum = numpy.percentile(numpy.frombuffer(samples, dtype=numpy.float64), [50, 90, 99, 100]) * 1000
+
+            # How many songs a second the stage could handle alone given its
+            #  time busy and how many workers run it...
+            busy_seconds    = sum(samples) / (self._consumers if consumer else 1)
+            capacity        = len(samples) / busy_seconds if busy_seconds > 0 else float('inf')
+            throughput      = F"{self._bytes[stage] / 1048576 / busy_seconds:,.1f}" if data and busy_seconds > 0 else '-'
+
+            # The queue stage only measures waiting...
+            if stage == 'queue':
+                lines.append(F"{stage:<8} {'-':>10} {'-':>9} {p50:>9.2f} {p90:>9.2f} {p99:>9.2f} {maximum:>9.2f}")
+                continue
+
+            # Add the line...
+            lines.append(F"{stage:<8} {capacity:>10,.1f} {throughput:>9} {p50:>9.2f} {p90:>9.2f} {p99:>9.2f} {maximum:>9.2f}")
+
+            # Remember the slowest...
+            if slowest_capacity is None or capacity < slowest_capacity:
+                slowest_stage       = stage
+                slowest_capacity    = capacity
+
+        # Point out the bottleneck...
+        if slowest_stage:
+            lines.append(_(F"Slowest local stage with {self._consumers} consumers is {slowest_stage}."))
+
+        # Done...
+        return '\n'.join(lines)
+
+    # Record how long a song took in the given stage, and how many bytes of
+    #  its file it handled...
+    def record(self, stage, seconds, byte_count=0):
+        with self._thread_lock:
+            self._samples[stage].append(seconds)
+            self._bytes[stage] += byte_count
+            self._finished = time.monotonic()
+
+# Benchmark the local import pipeline on the catalogue without contacting a
+#  server. Every song is parsed, checked for duplicates, and streamed into a
+#  request body exactly as it would be for an upload, by the same consumer
+#  threads, but the body is discarded instead of being sent. Reports each stage's throughput and latency. Returns
+#  True if the benchmark completed...
+def benchmark_catalogue(arguments):
+
+    # Batch importer will be constructed within try block...
+    batch_importer = None
+
+    # Content fingerprint index, if duplicates are being looked for...
+    fingerprint_index = None
+
+    try:
+
+        # Nothing about a server can be benchmarked without one...
+        if arguments.dry_run or arguments.resume or arguments.watch:
+            raise helios.exceptions.Validation(_("--benchmark cannot be combined with --dry-run, --resume, or --watch."))
+        if arguments.engine == 'asyncio' or arguments.threads == 'auto-adaptive':
+            raise helios.exceptions.Validation(_("--benchmark only supports --engine=threads with a fixed number of --threads."))
+
+        # Without a server to ask, default to a consumer per logical core...
+        if arguments.threads == 0:
+            arguments.threads = min(os.cpu_count() or 1, arguments.threads_maximum)
+
+        # Open the catalogue...
+        reader = create_catalogue_reader(
+            path=arguments.catalogue_file,
+            file_format=arguments.format,
+            delimiter=arguments.delimiter,
+            offset=arguments.offset)
+
+        # Open the fingerprint index if we're looking for duplicate content...
+        if arguments.duplicates != 'ignore':
+            if arguments.fingerprint_index_path is None:
+                arguments.fingerprint_index_path = get_default_fingerprint_index_path()
+            fingerprint_index = FingerprintIndex(arguments.fingerprint_index_path)
+
+        # Run the pipeline, treating no songs as already on the server...
+        logging.info(_(F"Benchmarking local pipeline with {arguments.threads} consumers..."))
+        benchmark = ImportBenchmark(arguments.threads)
+        batch_importer = BatchSongImporter(
+            arguments,
+            CompactReferenceSet(),
+            fingerprint_index=fingerprint_index,
+            benchmark=benchmark)
+        batch_importer.start(reader)
+
+        # Report...
+        print(benchmark.get_report())
+
+        # Failures mean the benchmark didn't measure what it should have...
+        if len(batch_importer.get_failures()) > 0:
+            print(_(F"Could not benchmark {len(batch_importer.get_failures()):,} songs: "))
+            for reference, failure_message in batch_importer.get_failures():
+                print(_(F"  {reference}: {failure_message}"))
+            return False
+
+        # Done...
+        return True
+
+    # User trying to abort...
+    except KeyboardInterrupt:
+        print(_('\rAborting, please wait a moment...'))
+
+    # Helios exception...
+    except helios.exceptions.ExceptionBase as some_exception:
+        print(some_exception.what())
+
+    # Some other kind of exception...
+    except Exception as some_exception:
+        print(_(F"An exception occurred: {str(some_exception)}"))
 
-    # Define behaviour for --threads-max...
-    argument_parser.add_argument(
-        '--threads-max',
-        default=8,
-        dest='threads_maximum',
-        nargs='?',
-        type=int,
-        help=_('Spawn no more than at most this many concurrent import '
-               'threads. Defaults to 8.'))
+    # Cleanup...
+    finally:
+
+        # Stop the importer, if it hasn't already...
+        if batch_importer:
+            batch_importer.stop()
+            batch_importer.get_metrics().stop()
+
+        # Close fingerprint index...
+        if fingerprint_index:
+            fingerprint_index.close()
+
+    # Didn't complete...
+    return False
 
 # Class to batch import a bunch of songs at once. Uses multiple synchronized
 #  processes...
 class BatchSongImporter:
 
+    # Longest to wait before retrying a song, in seconds...
+    retry_delay_maximum = 300.0
+
     # Constructor...
-    def __init__(self, arguments, songs_total, existing_song_references):
+    def __init__(
+        self, arguments, existing_song_references, journal=None, concurrency_controller=None, fingerprint_index=None,
+        metrics=None, benchmark=None):
 
         self._arguments                 = arguments
+        self._bandwidth_limiter         = None
+        self._benchmark                 = benchmark
+        self._catalogue_reader          = None
+        self._concurrency_controller    = concurrency_controller
+        self._duplicates                = []
         self._errors_remaining          = arguments.maximum_errors
         self._executor                  = None
         self._existing_song_references  = existing_song_references
         self._failures                  = []
+        self._fingerprint_index         = fingerprint_index
+        self._journal                   = journal
+        self._metrics                   = metrics or ImportMetrics()
+        self._producer_exception        = None
         self._queue                     = queue.Queue(self._arguments.threads) # maxsize=1
+        self._read_ahead                = None
+        self._request_limiter           = None
+        self._retries                   = []
+        self._retry_count               = 0
+        self._retry_sequence            = itertools.count()
+        self._songs_outstanding         = 0
         self._songs_processed           = arguments.offset - 1
-        self._songs_total               = songs_total
         self._songs_uploaded            = 0
         self._stop_event                = threading.Event()
+        self._stopped                   = False
         self._thread_lock               = threading.Lock()
 
+        # Limit upload bandwidth and rate of new uploads across all consumers,
+        #  if requested...
+        if arguments.limit_rate:
+            self._bandwidth_limiter = TokenBucket(arguments.limit_rate)
+        if arguments.limit_requests:
+            self._request_limiter = TokenBucket(arguments.limit_requests, burst=1)
+
+        # Read song files ahead of the consumers, if requested. The work queue
+        #  then needs room for the songs being read ahead too, but a dry run
+        #  never reads them...
+        if arguments.read_ahead and not arguments.dry_run:
+            self._read_ahead    = ReadAheadBuffer(arguments.read_ahead)
+            self._queue         = queue.Queue(self._arguments.threads + self._arguments.read_ahead_files)
+
+        # Gauges to sample for live metrics...
+        self._metrics.set_gauge('consumers_active', 'Consumers allowed to take new work.', self.get_active_consumers)
+        self._metrics.set_gauge('queue_depth', 'Songs read from the catalogue and waiting for a consumer.', self.get_queue_depth)
+        self._metrics.set_gauge('retry_lane_depth', 'Songs waiting to be retried.', self.get_retry_lane_depth)
+        self._metrics.set_gauge('read_ahead_bytes', 'Bytes of song files read ahead for consumers.', self.get_read_ahead_bytes)
+
     # Consumer thread which submits music to server...
     def _add_song_consumer_thread(self, consumer_thread_index):
 
         logging.debug(_(F"consumer {consumer_thread_index}: Spawned."))
 
-        # Create a client...
-        client = helios.Client(
-            api_key=self._arguments.api_key,
-            host=self._arguments.host,
-            port=self._arguments.port,
-            timeout_connect=self._arguments.timeout_connect,
-            timeout_read=self._arguments.timeout_read,
-            tls=self._arguments.tls,
-            tls_ca_file=self._arguments.tls_ca_file,
-            tls_certificate=self._arguments.tls_certificate,
-            tls_key=self._arguments.tls_key,
-            verbose=self._arguments.verbose)
+        # Create a client, unless benchmarking which never talks to a server...
+        client = None if self._benchmark else self._create_client()
 
         try:
 
@@ -149,20 +3410,64 @@ class BatchSongImporter:
                 # On a failure for this song, log this message...
                 failure_message = ""
 
+                # When the upload began, if it did...
+                upload_started = None
+
+                # Content fingerprint this song claimed in the index, if any...
+                claimed_fingerprint = None
+
+                # Song file's contents, if already read...
+                content = None
+
+                # Whether the failure, if any, was likely temporary...
+                transient_failure = False
+
+                # Class of error the song failed with, if any...
+                failure_class = None
+
+                # How the song was dealt with, if not simply uploaded...
+                outcome = None
+
+                # When the last byte of the song was sent, once it has been...
+                song_timing = {}
+
+                # Number of times this song has already been tried, and whether
+                #  it came off the work queue rather than the retry lane...
+                attempt = 0
+                from_queue = False
+
+                # Song file being read ahead, if it is...
+                read_ahead_file = None
+
+                # If adaptive concurrency has this consumer idle, wait until
+                #  it is needed again or we are asked to stop...
+                if self._concurrency_controller and not self._concurrency_controller.is_active(consumer_thread_index):
+                    csv_row = None
+                    self._concurrency_controller.wait_until_active(consumer_thread_index, timeout=1)
+                    continue
+
                 # Try to submit a song...
                 try:
 
-                    # Retrieve a csv_row, or block for at most one second before
-                    #  checking to see if bail requested...
+                    # Take a song that is due to be retried, if there is one,
+                    #  otherwise retrieve a csv_row, or block for at most one
+                    #  second before checking to see if bail requested...
                     try:
                         logging.debug(_(F"consumer {consumer_thread_index}: Waiting for a job."))
                         csv_row = None
-                        csv_row = self._queue.get(timeout=1)
+                        (csv_row, attempt) = self._get_due_retry()
+                        if csv_row is None:
+                            csv_row, read_ahead_file, time_queued = self._queue.get(timeout=1)
+                            from_queue = True
+                            if self._benchmark:
+                                self._benchmark.record('queue', time.monotonic() - time_queued)
                         reference = csv_row['reference']
+                        self._metrics.song_started()
                         logging.debug(_(F"consumer {consumer_thread_index}: {reference} Got a job."))
-                        with self._thread_lock:
-                            self._songs_processed += 1
-                            logging.debug(_(F"consumer {consumer_thread_index}: {reference} Processing song {self._songs_processed} of {self._songs_total}."))
+                        if attempt == 0:
+                            with self._thread_lock:
+                                self._songs_processed += 1
+                                logging.debug(_(F"consumer {consumer_thread_index}: {reference} Processing song {self._songs_processed} of {self.get_songs_total()}."))
 
                     # Queue is empty. Try again...
                     except queue.Empty:
@@ -172,6 +3477,9 @@ class BatchSongImporter:
                     # Get song reference...
                     song_reference=csv_row['reference']
 
+                    # Time the checks for songs we already have...
+                    dedupe_started = time.monotonic()
+
                     # Checking to see if song already exists on server, and skip
                     #  if it does...
                     logging.debug(_(F"consumer {consumer_thread_index}: {reference} Checking if already exists."))
@@ -180,11 +3488,38 @@ class BatchSongImporter:
                         # Notify user it already does...
                         logging.debug(_(F"consumer {consumer_thread_index}: {reference} Already known to server, skipping."))
 
+                        # Record in journal, if we're keeping one...
+                        if self._journal:
+                            self._journal.mark_exists(song_reference)
+
                         # Treat this as a success and go to next song...
+                        outcome = 'exists'
                         success = True
                         continue
 
-                    # Construct new song...
+                    # Check if the same audio is already on the server or about
+                    #  to be under another reference. Any contents read ahead or
+                    #  read to fingerprint it are kept for its upload...
+                    if self._fingerprint_index:
+                        if read_ahead_file:
+                            content = self._read_ahead.take(read_ahead_file)
+                            read_ahead_file = None
+                        (claimed_fingerprint, content) = self._fingerprint_index.get_fingerprint(csv_row['path'], content)
+                        duplicate_of = self._fingerprint_index.claim(
+                            claimed_fingerprint, song_reference, self.get_server(), self._is_on_server)
+                        if duplicate_of is not None:
+                            claimed_fingerprint = None
+                            if self._handle_duplicate(song_reference, duplicate_of):
+                                outcome = 'duplicate'
+                                success = True
+                                continue
+
+                    # Record how long checking took...
+                    if self._benchmark:
+                        self._benchmark.record('dedupe', time.monotonic() - dedupe_started)
+
+                    # Construct new song. The file itself is streamed from
+                    #  disk during upload...
                     new_song_dict = {
 
                         'album' : csv_row.get('album'),
@@ -194,25 +3529,69 @@ class BatchSongImporter:
                         'isrc' : csv_row.get('isrc'),
                         'beats_per_minute' : csv_row.get('beats_per_minute'),
                         'year' : csv_row.get('year'),
-                        'file' : base64.b64encode(open(csv_row['path'], 'rb').read()).decode('ascii'),
                         'reference' : csv_row.get('reference')
                     }
 
+                    # Benchmarking, so prepare the upload exactly as we would
+                    #  otherwise, but don't send it...
+                    if self._benchmark:
+                        self._benchmark_song(csv_row, new_song_dict, read_ahead_file, content)
+                        read_ahead_file = None
+                        outcome = 'benchmark'
+
                     # Upload if not a dry run...
-                    if not self._arguments.dry_run:
+                    elif not self._arguments.dry_run:
 
                         # Otherwise log adding new song...
                         logging.info(_(F"consumer {consumer_thread_index}: {reference} Uploading..."))
 
+                        # Note in journal that the song is now in flight...
+                        if self._journal:
+                            self._journal.mark_queued(song_reference, csv_row['path'])
+
+                        # Fingerprint of the song's contents, computed as it
+                        #  is uploaded...
+                        content_hash = ContentDigest()
+
+                        # Wait our turn if the rate of new uploads is limited...
+                        if self._request_limiter:
+                            self._request_limiter.consume()
+
+                        # Take the song file's contents if they were read
+                        #  ahead and not already taken to fingerprint it,
+                        #  otherwise it is read during the upload...
+                        if read_ahead_file:
+                            content = self._read_ahead.take(read_ahead_file)
+                            read_ahead_file = None
+
+                        # Time the upload and analysis...
+                        upload_started = time.monotonic()
+
                         # Perform upload...
-                        client.add_song(
+                        add_song_from_file(
+                            client,
                             new_song_dict=new_song_dict,
+                            song_path=csv_row['path'],
                             store=self._arguments.store,
                             progress_callback=partial(
-                                self._current_song_progress_callback, consumer_thread_index, reference))
+                                self._current_song_progress_callback, consumer_thread_index, reference, song_timing),
+                            content_hash=content_hash,
+                            rate_limiter=self._bandwidth_limiter,
+                            content=content)
+
+                        # Record success in journal...
+                        if self._journal:
+                            self._journal.mark_uploaded(song_reference, content_hash.hexdigest())
+
+                        # Remember the content is now on the server...
+                        if claimed_fingerprint:
+                            self._fingerprint_index.mark_uploaded(claimed_fingerprint, song_reference, self.get_server())
 
-                    # Otherwise log the pretend upload dry run...
+                    # Otherwise log the pretend upload dry run, but still make
+                    #  sure the file could have been read...
                     else:
+                        open(csv_row['path'], 'rb').close()
+                        outcome = 'dry_run'
                         logging.info(_(F"consumer {consumer_thread_index}: {reference} Would have uploaded, if not for dry run."))
 
                     # Increment upload tracker...
@@ -221,38 +3600,71 @@ class BatchSongImporter:
                 # JSON decoder error...
                 except simplejson.errors.JSONDecodeError as some_exception:
                     failure_message = _(F"{str(some_exception)}")
+                    failure_class = type(some_exception).__name__
                     logging.info(_(F"consumer {consumer_thread_index}: {reference} JSON decode error: {str(some_exception)}."))
 
-                # Conflict...
+                # Conflict. When resuming, the server's catalogue was never
+                #  retrieved, so this just means the song was uploaded by the
+                #  interrupted run or was already there before it. Likewise
+                #  when watching, for a song found by reading what was already
+                #  there, since what we know of the server is only as recent as
+                #  when we started. A song that arrived since then is a real
+                #  conflict. On a retry, the server most likely stored the song
+                #  on an earlier attempt whose response we never got...
                 except helios.exceptions.Conflict as some_exception:
-                    failure_message = _(F"{str(some_exception)}")
-                    logging.info(_(F"consumer {consumer_thread_index}: {reference} Conflict error: {str(some_exception)}."))
+                    if self._arguments.resume or csv_row.get('found_by_scan') or attempt > 0:
+                        logging.debug(_(F"consumer {consumer_thread_index}: {reference} Already known to server, skipping."))
+                        if self._journal:
+                            self._journal.mark_exists(song_reference)
+                        if claimed_fingerprint:
+                            self._fingerprint_index.mark_uploaded(claimed_fingerprint, song_reference, self.get_server())
+                        outcome = 'exists'
+                        success = True
+                    else:
+                        failure_message = _(F"{str(some_exception)}")
+                        failure_class = type(some_exception).__name__
+                        logging.info(_(F"consumer {consumer_thread_index}: {reference} Conflict error: {str(some_exception)}."))
 
                 # Bad input...
                 except helios.exceptions.Validation as some_exception:
                     failure_message = _(F"{str(some_exception)}")
+                    failure_class = type(some_exception).__name__
                     logging.info(_(F"consumer {consumer_thread_index}: {reference} Validation failed: {str(some_exception)}."))
 
                 # Connection failed...
                 except helios.exceptions.Connection as some_exception:
                     failure_message = _(F"{str(some_exception)}")
+                    failure_class = type(some_exception).__name__
+                    transient_failure = True
                     logging.info(_(F"consumer {consumer_thread_index}: {reference} Connection problem ({str(some_exception)})."))
 
                 # Server complained about request...
                 except helios.exceptions.BadRequest as some_exception:
                     failure_message = _(F"Server said: {str(some_exception)}")
+                    failure_class = type(some_exception).__name__
                     logging.info(_(F"consumer {consumer_thread_index}: {reference} Server said: {str(some_exception)}"))
 
                 # Server internal error...
                 except helios.exceptions.InternalServer as some_exception:
                     failure_message = _(F"Server internal error: {str(some_exception)}")
+                    failure_class = type(some_exception).__name__
+                    transient_failure = True
                     logging.info(_(F"consumer {consumer_thread_index}: {reference} Server internal error: {str(some_exception)}"))
 
+                # Some other error response from the server...
+                except helios.exceptions.ResponseExceptionBase as some_exception:
+                    failure_message = _(F"Server said: {str(some_exception)}")
+                    failure_class = type(some_exception).__name__
+                    transient_failure = is_transient_failure(some_exception)
+                    logging.info(_(F"consumer {consumer_thread_index}: {reference} Server said: {str(some_exception)}"))
+
                 # Some other exception occured...
                 except Exception as some_exception:
 
                     # Notify user...
                     failure_message = _(F"{str(some_exception)} ({type(some_exception)})")
+                    failure_class = type(some_exception).__name__
+                    transient_failure = is_transient_failure(some_exception)
                     logging.info(_(F"consumer {consumer_thread_index}: {reference} {str(some_exception)} ({type(some_exception)})."))
 
                     # Dump stack trace...
@@ -267,18 +3679,60 @@ class BatchSongImporter:
                 finally:
 
                     # Notify thread formerly enqueued task is complete...
-                    if csv_row is not None:
+                    if from_queue:
                         logging.debug(_(F"consumer {consumer_thread_index}: {reference} Moving to next song."))
                         self._queue.task_done()
 
+                    # Free anything read ahead for a song that was skipped...
+                    if read_ahead_file:
+                        self._read_ahead.release(read_ahead_file)
+
+                    # Let another song with the same content have a go if this
+                    #  one didn't make it...
+                    if claimed_fingerprint and not success:
+                        self._fingerprint_index.release(claimed_fingerprint, song_reference, self.get_server())
+
+                    # Let adaptive concurrency controller know how it went,
+                    #  including how long the server took to respond once the
+                    #  song was sent...
+                    if self._concurrency_controller and upload_started is not None:
+                        self._concurrency_controller.record(
+                            time.monotonic() - upload_started,
+                            not success,
+                            time.monotonic() - song_timing['upload_finished'] if 'upload_finished' in song_timing else None)
+
+                    # Whether the song should be retried...
+                    retrying = not success and csv_row is not None and transient_failure and attempt < self._arguments.retries
+
+                    # Update live metrics...
+                    if csv_row is not None:
+                        self._record_song_metrics(success, outcome, failure_class, retrying, upload_started, song_timing)
+
+                    # If the failure was likely temporary and the song has
+                    #  retries left, put it in the retry lane instead of
+                    #  counting it as an error...
+                    if retrying:
+                        retry_delay = self._schedule_retry(csv_row, attempt + 1)
+                        logging.info(_(F"consumer {consumer_thread_index}: {reference} Will retry in {retry_delay:.1f} seconds (attempt {attempt + 2} of {self._arguments.retries + 1})."))
+
+                    # Otherwise this song is done with, one way or another...
+                    elif csv_row is not None:
+                        with self._thread_lock:
+                            self._songs_outstanding -= 1
+
                     # If we were not successful processing an actual song,
                     #  handle accordingly. But not when the work work queue is
-                    #  simply empty which is not a meaningful failure...
-                    if not success and csv_row is not None:
+                    #  simply empty which is not a meaningful failure, or the
+                    #  song is going to be retried...
+                    if not success and csv_row is not None and not retrying:
 
                         # Remember that this song created a problem...
                         self._failures.append((reference, failure_message))
 
+                        # Record in journal so it can be retried with --resume...
+                        if self._journal:
+                            self._journal.mark_failed(reference, failure_message)
+
                         # Decrement remaining permissible errors...
                         self._errors_remaining -= 1
 
@@ -299,16 +3753,147 @@ class BatchSongImporter:
         # Log when we are exiting a consumer thread...
         logging.debug(_(F'consumer {consumer_thread_index}: Thread exited.'))
 
+    # Stream a song's request body exactly as an upload would, timing it, but
+    #  discard each chunk instead of sending it...
+    def _benchmark_song(self, csv_row, new_song_dict, read_ahead_file, content=None):
+
+        # Take the song file's contents if they were read ahead and not
+        #  already taken, timing how long we waited for them...
+        if read_ahead_file:
+            read_started = time.monotonic()
+            content = self._read_ahead.take(read_ahead_file)
+            if content is not None:
+                self._benchmark.record('read', time.monotonic() - read_started, len(content))
+
+        # Stream the request body, fingerprinting it as an upload would. If
+        #  the file wasn't read ahead, it is read from disk a chunk at a time
+        #  as it goes...
+        stream_started = time.monotonic()
+        body = StreamingSongUpload(
+            new_song_dict, 'file', csv_row['path'], content_hash=ContentDigest(), content=content)
+        file_size = os.path.getsize(csv_row['path']) if content is None else len(content)
+        collections.deque(body, maxlen=0)
+        self._benchmark.record('stream', time.monotonic() - stream_started, file_size)
+
+    # Create a client for talking to the server...
+    def _create_client(self):
+        return helios.Client(
+            api_key=self._arguments.api_key,
+            host=self._arguments.host,
+            port=self._arguments.port,
+            timeout_connect=self._arguments.timeout_connect,
+            timeout_read=self._arguments.timeout_read,
+            tls=self._arguments.tls,
+            tls_ca_file=self._arguments.tls_ca_file,
+            tls_certificate=self._arguments.tls_certificate,
+            tls_key=self._arguments.tls_key,
+            verbose=self._arguments.verbose)
+
     # Progress bar callback...
     def _current_song_progress_callback(
-        self, consumer_thread_index, reference, bytes_read, new_bytes, bytes_total):
+        self, consumer_thread_index, reference, song_timing, bytes_read, new_bytes, bytes_total):
+
+        # Count bytes sent...
+        self._metrics.count_bytes(new_bytes)
 
-        # If we're done uploading, update description to analysis stage...
+        # If we're done uploading, note when and update description to analysis
+        #  stage...
         if bytes_read == bytes_total:
+            song_timing['upload_finished'] = time.monotonic()
             logging.info(_(F'consumer {consumer_thread_index}: {reference} Awaiting server analysis...'))
 
        # time.sleep(0.001)
 
+    # Get a tuple of the next song in the retry lane whose delay has elapsed
+    #  and the number of times it has been tried, or (None, 0) if none are due...
+    def _get_due_retry(self):
+        with self._thread_lock:
+            if self._retries and self._retries[0][0] <= time.monotonic():
+                (due, sequence, csv_row, attempt) = heapq.heappop(self._retries)
+                return (csv_row, attempt)
+        return (None, 0)
+
+    # Get how long to wait before the given attempt at a song. The delay
+    #  doubles each attempt, up to a maximum, and is jittered so songs that
+    #  failed together don't all retry together...
+    def _get_retry_delay(self, attempt):
+        retry_delay = min(self._arguments.retry_delay * (2 ** (attempt - 1)), BatchSongImporter.retry_delay_maximum)
+        return random.uniform(retry_delay / 2, retry_delay)
+
+    # Note a song whose content duplicates that of another song reference and
+    #  return whether it should be skipped...
+    def _handle_duplicate(self, reference, duplicate_of):
+
+        # Remember it for the summary...
+        with self._thread_lock:
+            self._duplicates.append((reference, duplicate_of))
+
+        # Only reporting, so still upload it...
+        if self._arguments.duplicates != 'skip':
+            logging.info(_(F"{reference} Duplicates the contents of {duplicate_of}."))
+            return False
+
+        # Skipping it...
+        logging.info(_(F"{reference} Duplicates the contents of {duplicate_of}, skipping."))
+        if self._journal:
+            self._journal.mark_duplicate(reference, duplicate_of)
+        return True
+
+    # Check whether a song with the given reference is on the server, as far as
+    #  we know, for the fingerprint index to confirm a previous upload of the
+    #  same content is still there...
+    def _is_on_server(self, reference):
+        return reference in self._existing_song_references
+
+    # Update live metrics once a song has been dealt with, one way or another.
+    #  A successful upload's time is split into sending it and waiting on the
+    #  server to analyse it at the point its last byte was sent...
+    def _record_song_metrics(self, success, outcome, failure_class, retrying, upload_started, song_timing):
+
+        # No longer in progress...
+        self._metrics.song_stopped()
+
+        # Song is done with...
+        if success:
+            self._metrics.count_song(outcome or 'uploaded')
+
+        # Failed, whether for now or for good...
+        else:
+            self._metrics.count_error(failure_class or 'Unknown')
+            if retrying:
+                self._metrics.count_retry()
+            else:
+                self._metrics.count_song('failed')
+
+        # Record timing of a successful upload...
+        if success and upload_started is not None and 'upload_finished' in song_timing:
+            self._metrics.observe_song_timing(
+                song_timing['upload_finished'] - upload_started,
+                time.monotonic() - song_timing['upload_finished'])
+
+    # Put a song in the retry lane to be tried again after a delay, which is
+    #  returned. Consumers prefer due retries over fresh work, but fresh work
+    #  is never held up waiting for them...
+    def _schedule_retry(self, csv_row, attempt):
+        retry_delay = self._get_retry_delay(attempt)
+        with self._thread_lock:
+            heapq.heappush(
+                self._retries,
+                (time.monotonic() + retry_delay, next(self._retry_sequence), csv_row, attempt))
+            self._retry_count += 1
+        return retry_delay
+
+    # Get the number of consumers allowed to take new work...
+    def get_active_consumers(self):
+        if self._concurrency_controller:
+            return self._concurrency_controller.get_limit()
+        return self._arguments.threads
+
+    # Get list of pairs of song references and the reference of the song whose
+    #  content they duplicate...
+    def get_duplicates(self):
+        return self._duplicates
+
     # Get the number of errors remaining permitted...
     def get_errors_remaining(self):
         return self._errors_remaining
@@ -318,15 +3903,63 @@ class BatchSongImporter:
     def get_failures(self):
         return self._failures
 
+    # Get the live metrics of this import...
+    def get_metrics(self):
+        return self._metrics
+
+    # Get the exception that stopped the producer from reading the catalogue,
+    #  or None if it didn't...
+    def get_producer_exception(self):
+        return self._producer_exception
+
+    # Get the number of songs read from the catalogue and waiting for a
+    #  consumer...
+    def get_queue_depth(self):
+        return self._queue.qsize()
+
+    # Get the number of bytes of song files read ahead for consumers...
+    def get_read_ahead_bytes(self):
+        return self._read_ahead.get_buffered_bytes() if self._read_ahead else 0
+
+    # Get the number of times songs were retried...
+    def get_retry_count(self):
+        return self._retry_count
+
+    # Get the number of songs waiting to be retried...
+    def get_retry_lane_depth(self):
+        return len(self._retries)
+
+    # Get the total number of songs in the catalogue, or an estimate or None
+    #  if not known yet...
+    def get_songs_total(self):
+        if self._catalogue_reader is None:
+            return None
+        return self._catalogue_reader.get_songs_total()
+
+    # Get the host and port of the server songs are imported into...
+    def get_server(self):
+        return F'{self._arguments.host}:{self._arguments.port}'
+
     # Get the total number of successful uploads...
     def get_upload_count(self):
         return self._songs_uploaded
 
-    # Start batch import. This generates work for consumer threads...
-    def start(self, csv_reader):
+    # Check whether the import has stopped, or been asked to...
+    def is_stopped(self):
+        return self._stop_event.is_set()
+
+    # Start batch import. This generates work for consumer threads from each row
+    #  dictionary the catalogue reader yields...
+    def start(self, catalogue_reader):
+
+        # Remember the reader so we can query it for progress...
+        self._catalogue_reader = catalogue_reader
 
         logging.info(_(F"producer: Creating thread pool of {self._arguments.threads} threads."))
 
+        # Rows as scheduled, once we start reading them...
+        scheduled_rows = None
+
         # Construct consumer thread pool and run it...
         with concurrent.futures.ThreadPoolExecutor(
             max_workers=self._arguments.threads) as self._executor:
@@ -338,48 +3971,45 @@ class BatchSongImporter:
                         self._add_song_consumer_thread,
                         consumer_thread_index)
 
-                # Create a job, while there is still work to be done...
-                current_song_offset = 1
-                for current_song_offset, data_frame in enumerate(csv_reader, 1):
-
-                    # User requested to seek to given song offset, so do so.
-                    #  Note that this is one more than absolute line offset
-                    #  because first line are column headers...
-                    if current_song_offset < self._arguments.offset:
+                # Begin tuning how many of them are active, if requested...
+                if self._concurrency_controller:
+                    logging.info(_(F"producer: Adaptive concurrency starting with {self._concurrency_controller.get_limit()} active threads."))
+                    self._concurrency_controller.start()
+
+                # Create a job, while there is still work to be done. The
+                #  reader has already skipped to the requested offset. Note
+                #  that this is one more than absolute line offset because
+                #  first line are column headers...
+                current_song_offset = self._arguments.offset
+                scheduled_rows = schedule_catalogue_rows(
+                    catalogue_reader, self._arguments.schedule, self._arguments.schedule_window)
+                row_requested = time.monotonic()
+                for current_song_offset, csv_row in enumerate(scheduled_rows, self._arguments.offset):
+
+                    # Watched catalogue had nothing new for now. Keep waiting
+                    #  unless we were asked to stop in the meantime...
+                    if csv_row is None:
+                        if self._stop_event.is_set():
+                            break
                         continue
 
-                    # Convert pandas data frame to single record as a vanilla
-                    #  dictionary...
-                    csv_row = data_frame.to_dict(orient='records')[0]
-
-                    # Pandas has a number of issues we need to provide a
-                    #  workaround for the csv_row before we can inject into the
-                    #  consumer threads' work queue...
-                    for key in csv_row:
-
-                        # Because pandas struggles to distinguish a field
-                        #  ommitted from an empty "" string field, we need to
-                        #  clean up what it generated. Replace quoted strings
-                        #  with their quoted contents...
-                        if isinstance(csv_row[key], str) and len(csv_row[key]) >= 2:
-                            if csv_row[key][0] == '"' and csv_row[key][-1] == '"':
-                                csv_row[key] = csv_row[key][1:-1]
-
-                        # Replace NaNs and NAs with None's so we can distinguish
-                        #  from fields that were intentionally ommitted versus
-                        #  ones that the user explicitly wanted a value of an
-                        #  empty string...
-                        if isinstance(csv_row[key], float) and numpy.isnan(csv_row[key]):
-                            csv_row[key] = None
-
-                        # Nullable integers weren't added until Panda 0.24.0.
-                        #  Type cast the fields that were really suppose to be
-                        #  integers from floats to integers...
-                        if isinstance(csv_row[key], float) and (key in ("beats_per_minute", "year")):
-                            csv_row[key] = int(csv_row[key])
-
                     logging.debug(_(F"producer: Loaded {csv_row['reference']} record."))
 
+                    # Time taken to read this row from the catalogue...
+                    if self._benchmark:
+                        self._benchmark.record('parse', time.monotonic() - row_requested)
+
+                    # Start reading the song file ahead, unless we already know
+                    #  it won't be uploaded...
+                    read_ahead_file = None
+                    if self._read_ahead and (
+                        isinstance(self._existing_song_references, ServerReferenceLookup) or
+                        csv_row['reference'] not in self._existing_song_references):
+                        read_ahead_file = self._read_ahead.request(csv_row['path'])
+
+                    # When the song was ready for a consumer...
+                    time_queued = time.monotonic()
+
                     # Keep trying to add the job to the work queue until
                     #  successful or we are told to abort...
                     while not self._stop_event.is_set():
@@ -387,7 +4017,14 @@ class BatchSongImporter:
                         # Try to add job...
                         try:
                             logging.debug(_("producer: Waiting to add new work to work queue."))
-                            self._queue.put(csv_row, timeout=1)
+                            with self._thread_lock:
+                                self._songs_outstanding += 1
+                            try:
+                                self._queue.put((csv_row, read_ahead_file, time_queued), timeout=1)
+                            except queue.Full:
+                                with self._thread_lock:
+                                    self._songs_outstanding -= 1
+                                raise
                             logging.debug(_(F"producer: Added {csv_row['reference']} record to work queue."))
 
                         # Queue is full, try again...
@@ -401,10 +4038,13 @@ class BatchSongImporter:
                     if self._stop_event.is_set():
                         break
 
-                # Drain work queue, while there is still work waiting to
-                #  complete in consumer threads, and we have not been asked to
-                #  abort...
-                while not self._queue.empty() and not self._stop_event.is_set():
+                    # Start timing the next row...
+                    row_requested = time.monotonic()
+
+                # Wait while there is still work waiting to complete in
+                #  consumer threads, including songs waiting to be retried, and
+                #  we have not been asked to abort...
+                while self._songs_outstanding > 0 and not self._stop_event.is_set():
                     time.sleep(0.5)
 
                 # Wait for all current work on the queue to be retrieved from
@@ -416,37 +4056,61 @@ class BatchSongImporter:
                 # Log how many songs were actually uploaded...
                 logging.info(_(F"Completed uploading a total of {self.get_upload_count()} new songs..."))
 
-            # Parser error, treated as fatal...
+            # Parser error, treated as fatal. Remember it and let the caller
+            #  know the import failed...
             except ValueError as some_exception:
                 logging.error(_(F"producer: Song {current_song_offset}, parser error: {some_exception}."))
+                self._producer_exception = some_exception
+                raise
 
             # User trying to abort...
             except KeyboardInterrupt:
                 print(_(F'\rAborting. Draining work queue of {self._queue.qsize()} items. Please wait a moment...'))
                 self.stop()
 
+            # Anything else, such as a catalogue with bad columns, is fatal
+            #  too...
             except Exception as some_exception:
-                logging.error(_(F"producer: Exception: {str(some_exception)}."))
+                logging.debug(_(F"producer: Exception: {str(some_exception)}."))
+                self._producer_exception = some_exception
+                raise
 
             except:
                 logging.error(_("producer: Unhandled exception."))
+                raise
 
+            # Close the catalogue, which for a watched one also stops watching
+            #  it, rather than leaving that to whenever the reader is garbage
+            #  collected...
             finally:
                 logging.debug(_("producer: Done reading rows."))
+                if scheduled_rows is not None:
+                    scheduled_rows.close()
                 self.stop()
 
     # Gracefully stop all importation processes. Called from producer thread...
     def stop(self):
 
-        # If stop has already been requested, don't try to join twice...
-        if self._stop_event.is_set():
-            #logging.debug('Stop already called.')
-            return
+        # If stop has already been called, don't try to join twice. A consumer
+        #  that ran out of permissible errors only sets the stop event, so
+        #  that can't tell us whether everything has been cleaned up yet...
+        with self._thread_lock:
+            if self._stopped:
+                return
+            self._stopped = True
 
         # Signal to all consumer threads to stop...
         logging.debug(_('Signally to all pending transactions to complete.'))
         self._stop_event.set()
 
+        # Stop tuning concurrency and wake any idle consumers...
+        if self._concurrency_controller:
+            self._concurrency_controller.stop()
+
+        # Stop reading ahead. Consumers will read anything they still need...
+        if self._read_ahead:
+            self._read_ahead.stop()
+
         # Wait for all consumer threads to stop and work queue to drain...
         if self._executor:
             logging.debug(_(F'Waiting on work queue to drain {self._queue.qsize()} items.'))
@@ -459,49 +4123,875 @@ class BatchSongImporter:
         # Stop importation...
         self.stop()
 
-# Get a set of all of the existing song references on the Helios server...
-def get_existing_song_references(client):
+# Class to batch import a bunch of songs at once on a single asyncio event loop
+#  rather than a pool of consumer threads. The number of uploads in flight is
+#  bounded by a semaphore sized by --threads, so it can be set much higher than
+#  would be practical with one thread per upload...
+class AsyncBatchSongImporter(BatchSongImporter):
 
-    # Pagination tracker starts on page one and grabs songs in batches of a
-    #  thousand at a time...
-    current_page    = 1
-    page_size       = 1000
+    # Number of catalogue rows to pull from the reader at a time...
+    read_batch_size = 256
 
-    # Set of all song references on the Helios server...
-    existing_song_references = set()
+    # Constructor...
+    def __init__(self, arguments, existing_song_references, journal=None, fingerprint_index=None, metrics=None):
 
-    # Log that we are about to count the number of songs on server...
-    logging.info(_(F"Please wait while retrieving list of songs from server..."))
+        # Initialize base class...
+        super().__init__(arguments, existing_song_references, journal, fingerprint_index=fingerprint_index, metrics=metrics)
 
-    # Keep fetching songs while there are some...
-    while True:
+        # Number of songs waiting to be retried and for an upload slot, and
+        #  tasks for each song still in flight...
+        self._retries_waiting   = 0
+        self._songs_waiting     = 0
+        self._tasks             = set()
+
+    # Submit a single song to the server, bounded by the given semaphore...
+    async def _add_song(self, client, semaphore, csv_row, attempt=0):
+
+        # Flag on whether adding the song was successful or not...
+        success = False
+
+        # Whether the failure, if any, was likely temporary...
+        transient_failure = False
+
+        # On a failure for this song, log this message...
+        failure_message = ""
+
+        # Get song reference...
+        reference = csv_row['reference']
+
+        # Content fingerprint this song claimed in the index, if any...
+        claimed_fingerprint = None
+
+        # Song file's contents, if already read to fingerprint it...
+        content = None
+
+        # Class of error the song failed with, if any...
+        failure_class = None
+
+        # How the song was dealt with, if not simply uploaded...
+        outcome = None
+
+        # When the upload began and its last byte was sent, if they were...
+        song_timing = {}
+        upload_started = None
+
+        # Wait for a free upload slot...
+        self._songs_waiting += 1
+        async with semaphore:
+            self._songs_waiting -= 1
+            self._metrics.song_started()
 
-        # Try to get a batch of songs for current page...
-        page_songs_list = client.get_all_songs(
-            page=current_page,
-            page_size=page_size)
+            # Try to submit the song...
+            try:
+
+                # Count it, unless this is a retry...
+                if attempt == 0:
+                    self._songs_processed += 1
+                    logging.debug(_(F"{reference} Processing song {self._songs_processed} of {self.get_songs_total()}."))
+
+                # Checking to see if song already exists on server, and skip if
+                #  it does. If that means asking the server, do so without
+                #  blocking the event loop...
+                if isinstance(self._existing_song_references, ServerReferenceLookup):
+                    song_exists = await client.song_exists(reference)
+                else:
+                    song_exists = reference in self._existing_song_references
+                if song_exists:
+
+                    # Notify user it already does...
+                    logging.debug(_(F"{reference} Already known to server, skipping."))
+
+                    # Record in journal, if we're keeping one...
+                    if self._journal:
+                        self._journal.mark_exists(reference)
+
+                    # Treat this as a success...
+                    outcome = 'exists'
+                    success = True
+                    return
+
+                # Check if the same audio is already on the server or about to
+                #  be under another reference. Hashing happens off the event
+                #  loop, and anything read to do it is kept for the upload...
+                if self._fingerprint_index:
+                    (claimed_fingerprint, content) = await asyncio.get_running_loop().run_in_executor(
+                        None, self._fingerprint_index.get_fingerprint, csv_row['path'])
+                    duplicate_of = await asyncio.get_running_loop().run_in_executor(
+                        None, self._fingerprint_index.claim,
+                        claimed_fingerprint, reference, self.get_server(), self._is_on_server)
+                    if duplicate_of is not None:
+                        claimed_fingerprint = None
+                        if self._handle_duplicate(reference, duplicate_of):
+                            outcome = 'duplicate'
+                            success = True
+                            return
+
+                # Construct new song. The file itself is streamed from disk
+                #  during upload...
+                new_song_dict = {
+
+                    'album' : csv_row.get('album'),
+                    'artist' : csv_row.get('artist'),
+                    'title' : csv_row.get('title'),
+                    'genre' : csv_row.get('genre'),
+                    'isrc' : csv_row.get('isrc'),
+                    'beats_per_minute' : csv_row.get('beats_per_minute'),
+                    'year' : csv_row.get('year'),
+                    'reference' : csv_row.get('reference')
+                }
+
+                # Upload if not a dry run...
+                if not self._arguments.dry_run:
+
+                    # Log adding new song...
+                    logging.info(_(F"{reference} Uploading..."))
+
+                    # Note in journal that the song is now in flight...
+                    if self._journal:
+                        self._journal.mark_queued(reference, csv_row['path'])
+
+                    # Fingerprint of the song's contents, computed as it is
+                    #  uploaded...
+                    content_hash = ContentDigest()
+
+                    # Wait our turn if the rate of new uploads is limited...
+                    if self._request_limiter:
+                        await asyncio.sleep(self._request_limiter.reserve())
+
+                    # Perform upload. The body is read on the event loop's
+                    #  executor, so any bandwidth limit waits there...
+                    upload_started = time.monotonic()
+                    await client.add_song_from_file(
+                        new_song_dict=new_song_dict,
+                        song_path=csv_row['path'],
+                        store=self._arguments.store,
+                        progress_callback=partial(self._song_progress_callback, song_timing),
+                        content_hash=content_hash,
+                        rate_limiter=self._bandwidth_limiter,
+                        content=content)
+
+                    # Record success in journal...
+                    if self._journal:
+                        self._journal.mark_uploaded(reference, content_hash.hexdigest())
+
+                    # Remember the content is now on the server...
+                    if claimed_fingerprint:
+                        self._fingerprint_index.mark_uploaded(claimed_fingerprint, reference, self.get_server())
+
+                # Otherwise log the pretend upload dry run, but still make sure
+                #  the file could have been read...
+                else:
+                    open(csv_row['path'], 'rb').close()
+                    outcome = 'dry_run'
+                    logging.info(_(F"{reference} Would have uploaded, if not for dry run."))
+
+                # Increment upload tracker...
+                self._songs_uploaded += 1
+
+            # Conflict. When resuming, the server's catalogue was never
+            #  retrieved, so this just means the song was uploaded by the
+            #  interrupted run or was already there before it. On a retry, the
+            #  server most likely stored the song on an earlier attempt whose
+            #  response we never got...
+            except helios.exceptions.Conflict as some_exception:
+                if self._arguments.resume or attempt > 0:
+                    logging.debug(_(F"{reference} Already known to server, skipping."))
+                    if self._journal:
+                        self._journal.mark_exists(reference)
+                    if claimed_fingerprint:
+                        self._fingerprint_index.mark_uploaded(claimed_fingerprint, reference, self.get_server())
+                    outcome = 'exists'
+                    success = True
+                else:
+                    failure_message = _(F"{str(some_exception)}")
+                    failure_class = type(some_exception).__name__
+                    logging.info(_(F"{reference} Conflict error: {str(some_exception)}."))
+
+            # Bad input...
+            except helios.exceptions.Validation as some_exception:
+                failure_message = _(F"{str(some_exception)}")
+                failure_class = type(some_exception).__name__
+                logging.info(_(F"{reference} Validation failed: {str(some_exception)}."))
+
+            # Connection failed...
+            except helios.exceptions.Connection as some_exception:
+                failure_message = _(F"{str(some_exception)}")
+                failure_class = type(some_exception).__name__
+                transient_failure = True
+                logging.info(_(F"{reference} Connection problem ({str(some_exception)})."))
+
+            # Server complained about request...
+            except helios.exceptions.BadRequest as some_exception:
+                failure_message = _(F"Server said: {str(some_exception)}")
+                failure_class = type(some_exception).__name__
+                logging.info(_(F"{reference} Server said: {str(some_exception)}"))
+
+            # Server internal error...
+            except helios.exceptions.InternalServer as some_exception:
+                failure_message = _(F"Server internal error: {str(some_exception)}")
+                failure_class = type(some_exception).__name__
+                transient_failure = True
+                logging.info(_(F"{reference} Server internal error: {str(some_exception)}"))
+
+            # Some other error response from the server...
+            except helios.exceptions.ResponseExceptionBase as some_exception:
+                failure_message = _(F"Server said: {str(some_exception)}")
+                failure_class = type(some_exception).__name__
+                transient_failure = is_transient_failure(some_exception)
+                logging.info(_(F"{reference} Server said: {str(some_exception)}"))
+
+            # Some other exception occured...
+            except Exception as some_exception:
+                failure_message = _(F"{str(some_exception)} ({type(some_exception)})")
+                failure_class = type(some_exception).__name__
+                transient_failure = is_transient_failure(some_exception)
+                logging.info(_(F"{reference} {str(some_exception)} ({type(some_exception)})."))
+
+            # Song added successfully without any issues...
+            else:
+                success = True
+
+            # If we were not successful, handle accordingly. Cancellation
+            #  leaves the journal entry queued so the song is retried on
+            #  --resume...
+            finally:
+
+                # Let another song with the same content have a go if this one
+                #  didn't make it...
+                if claimed_fingerprint and not success:
+                    self._fingerprint_index.release(claimed_fingerprint, reference, self.get_server())
+
+                # Whether the song should be retried...
+                retrying = not success and transient_failure and attempt < self._arguments.retries and not self._stop_event.is_set()
+
+                # Update live metrics, unless the song was cancelled...
+                if success or failure_class is not None:
+                    self._record_song_metrics(success, outcome, failure_class, retrying, upload_started, song_timing)
+                else:
+                    self._metrics.song_stopped()
+
+                # If the failure was likely temporary and the song has retries
+                #  left, try it again later without holding an upload slot in
+                #  the meantime...
+                if retrying:
+                    retry_delay = self._get_retry_delay(attempt + 1)
+                    self._retries_waiting += 1
+                    self._retry_count += 1
+                    logging.info(_(F"{reference} Will retry in {retry_delay:.1f} seconds (attempt {attempt + 2} of {self._arguments.retries + 1})."))
+                    self._spawn_task(self._add_song_later(retry_delay, client, semaphore, csv_row, attempt + 1))
+
+                # Otherwise record failure...
+                elif not success and not self._stop_event.is_set():
+
+                    # Remember that this song created a problem...
+                    self._failures.append((reference, failure_message))
+
+                    # Record in journal so it can be retried with --resume...
+                    if self._journal:
+                        self._journal.mark_failed(reference, failure_message)
+
+                    # Decrement remaining permissible errors...
+                    self._errors_remaining -= 1
+
+                    # If no more permissible errors remaining, abort...
+                    if (self._errors_remaining == -1) and (self._arguments.maximum_errors != 0):
+                        logging.info(_(F'Maximum errors reached (set to {self._arguments.maximum_errors}). Aborting...'))
+                        self._stop_event.set()
+
+    # Submit a song to the server after the given delay...
+    async def _add_song_later(self, delay, client, semaphore, csv_row, attempt):
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            self._retries_waiting -= 1
+        await self._add_song(client, semaphore, csv_row, attempt)
+
+    # Cancel every song still in flight and wait for them to finish...
+    async def _cancel_tasks(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    # Create a client for talking to the server...
+    def _create_client(self):
+        return AsyncHeliosClient(
+            api_key=self._arguments.api_key,
+            host=self._arguments.host,
+            port=self._arguments.port,
+            timeout_connect=self._arguments.timeout_connect,
+            timeout_read=self._arguments.timeout_read,
+            tls=self._arguments.tls,
+            tls_ca_file=self._arguments.tls_ca_file,
+            tls_certificate=self._arguments.tls_certificate,
+            tls_key=self._arguments.tls_key)
+
+    # Read the next batch of rows from the catalogue in the default executor.
+    #  A reader with nothing new for now, such as one fed by a
+    #  ShardedSongImporter, yields a None placeholder instead of blocking. Stop
+    #  there, so the rows already read are uploaded without waiting for a whole
+    #  batch and we get a chance to notice if we were asked to stop...
+    def _read_rows(self, rows):
+        csv_rows = []
+        for csv_row in rows:
+            csv_rows.append(csv_row)
+            if csv_row is None or len(csv_rows) == self.read_batch_size:
+                break
+        return csv_rows
+
+    # Event loop's main coroutine. Pulls rows from the catalogue reader in the
+    #  default executor, so parsing never blocks uploads, and spawns a task for
+    #  each one...
+    async def _run(self, catalogue_reader):
+
+        # Initialize...
+        client      = self._create_client()
+        loop        = asyncio.get_running_loop()
+        rows        = schedule_catalogue_rows(
+            catalogue_reader, self._arguments.schedule, self._arguments.schedule_window)
+        semaphore   = asyncio.BoundedSemaphore(self._arguments.threads)
+
+        try:
+
+            # Keep reading the catalogue until exhausted or asked to stop...
+            while not self._stop_event.is_set():
+
+                # Don't read further ahead than a couple of batches of what is
+                #  already waiting for an upload slot...
+                while len(self._tasks) >= self._arguments.threads + 2 * self.read_batch_size:
+                    await asyncio.wait(self._tasks, return_when=asyncio.FIRST_COMPLETED)
+
+                # Get the next batch of rows...
+                csv_rows = await loop.run_in_executor(None, self._read_rows, rows)
+
+                # Done...
+                if len(csv_rows) == 0:
+                    break
+
+                # Spawn a task for each, skipping any placeholders for when the
+                #  catalogue had nothing new...
+                for csv_row in csv_rows:
+                    if csv_row is None:
+                        continue
+                    logging.debug(_(F"producer: Loaded {csv_row['reference']} record."))
+                    self._spawn_task(self._add_song(client, semaphore, csv_row))
+
+            # Wait for remaining songs to complete, unless asked to abort...
+            while self._tasks and not self._stop_event.is_set():
+                await asyncio.wait(self._tasks, timeout=0.5)
+
+        # Whatever the reason for leaving, don't leave any uploads behind...
+        finally:
+            self._stop_event.set()
+            await self._cancel_tasks()
+            await client.close()
+
+    # Progress callback, called from the executor as each chunk of a song is
+    #  read...
+    def _song_progress_callback(self, song_timing, bytes_read, new_bytes, bytes_total):
+        self._metrics.count_bytes(new_bytes)
+        if bytes_read == bytes_total:
+            song_timing['upload_finished'] = time.monotonic()
+
+    # Run a coroutine as a task, keeping track of it until it is done...
+    def _spawn_task(self, coroutine):
+        task = asyncio.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    # Get the number of songs waiting for an upload slot...
+    def get_queue_depth(self):
+        return self._songs_waiting
+
+    # Get the number of songs waiting to be retried...
+    def get_retry_lane_depth(self):
+        return self._retries_waiting
+
+    # Start batch import...
+    def start(self, catalogue_reader):
+
+        # Remember the reader so we can query it for progress...
+        self._catalogue_reader = catalogue_reader
+
+        logging.info(_(F"producer: Starting event loop with up to {self._arguments.threads} concurrent uploads."))
+
+        # Run the event loop until every song is done...
+        try:
+            asyncio.run(self._run(catalogue_reader))
+            logging.info(_(F"Completed uploading a total of {self.get_upload_count()} new songs..."))
+
+        # Parser error, treated as fatal. Remember it and let the caller know
+        #  the import failed...
+        except ValueError as some_exception:
+            logging.error(_(F"producer: Song {self._songs_processed}, parser error: {some_exception}."))
+            self._producer_exception = some_exception
+            raise
+
+        # User trying to abort. Uploads still in flight have already been
+        #  cancelled by the time we get here...
+        except KeyboardInterrupt:
+            print(_('\rAborted. Uploads still in flight were cancelled.'))
+
+        # Anything else, such as a catalogue with bad columns, is fatal too...
+        except Exception as some_exception:
+            logging.debug(_(F"producer: Exception: {str(some_exception)}."))
+            self._producer_exception = some_exception
+            raise
+
+        finally:
+            self.stop()
+
+# Reader which feeds one server's importer the songs placed on it by a
+#  ShardedSongImporter. None is yielded whenever nothing arrives within a
+#  second so that the importer can decide whether to keep waiting...
+class ShardCatalogueReader:
+
+    # Constructor...
+    def __init__(self, maximum_size):
+        self._closed    = threading.Event()
+        self._queue     = queue.Queue(maximum_size)
+
+    # Iterator method...
+    def __iter__(self):
+        while True:
+            try:
+                yield self._queue.get(timeout=1)
+            except queue.Empty:
+                if self._closed.is_set():
+                    return
+                yield None
+
+    # Note no more songs are coming...
+    def close(self):
+        self._closed.set()
+
+    # Get the total number of songs, which is never known...
+    def get_songs_total(self):
+        return None
+
+    # Check whether there is room for another song...
+    def is_full(self):
+        return self._queue.full()
+
+    # Add a song, raising queue.Full if there is no room after timeout
+    #  seconds...
+    def put(self, csv_row, timeout):
+        self._queue.put(csv_row, timeout=timeout)
+
+    # Get the number of songs waiting...
+    def qsize(self):
+        return self._queue.qsize()
+
+# Class to import a catalogue into several servers at once. Each server has its
+#  own batch importer, with its own consumers and set of existing references,
+#  running on its own thread. Songs are read from the catalogue once and placed
+#  on one of them. Hash placement chooses by a hash of the song's reference, so
+#  a song always goes to the same server. Least-loaded placement chooses the
+#  server with the lowest estimated load, being its CPU load as last sampled
+#  plus the number of songs waiting on it for each of its active consumers...
+class ShardedSongImporter:
+
+    # Seconds between samples of each server's CPU load...
+    load_sample_interval = 5.0
+
+    # Most songs to have waiting for each server's importer. With least-loaded
+    #  placement, only enough to keep its consumers busy is used instead, so
+    #  that songs are placed as late as possible...
+    shard_queue_size = 1024
+
+    # Constructor. Takes an importer for each server and a client for each
+    #  to sample its load with...
+    def __init__(self, arguments, batch_importers, clients, metrics):
+
+        self._arguments         = arguments
+        self._batch_importers   = batch_importers
+        self._catalogue_reader  = None
+        self._clients           = clients
+        self._metrics           = metrics
+        self._server_loads      = [0.0] * len(batch_importers)
+        self._shard_readers     = [
+            ShardCatalogueReader(
+                self.shard_queue_size if arguments.placement == 'hash'
+                else 2 * batch_importer.get_active_consumers())
+            for batch_importer in batch_importers]
+        self._stop_event        = threading.Event()
+        self._threads           = []
+
+        # Gauges for live metrics, summed over every server...
+        self._metrics.set_gauge('consumers_active', 'Consumers allowed to take new work.', self.get_active_consumers)
+        self._metrics.set_gauge('queue_depth', 'Songs read from the catalogue and waiting for a consumer.', self.get_queue_depth)
+        self._metrics.set_gauge('retry_lane_depth', 'Songs waiting to be retried.', self.get_retry_lane_depth)
+        self._metrics.set_gauge('read_ahead_bytes', 'Bytes of song files read ahead for consumers.', self.get_read_ahead_bytes)
+
+    # Choose which server a song should be placed on, or None if every
+    #  candidate is too busy for now...
+    def _choose_shard(self, csv_row):
+
+        # Always the same server for the same reference...
+        if self._arguments.placement == 'hash':
+            return zlib.crc32(csv_row['reference'].encode('utf-8')) % len(self._batch_importers)
+
+        # Otherwise the least loaded of those with room...
+        candidates = [
+            index for index, shard_reader in enumerate(self._shard_readers)
+            if not shard_reader.is_full()]
+        if not candidates:
+            return None
+        return min(candidates, key=self._get_estimated_load)
+
+    # Estimate how loaded a server is...
+    def _get_estimated_load(self, index):
+        batch_importer = self._batch_importers[index]
+        songs_waiting = self._shard_readers[index].qsize() + batch_importer.get_queue_depth()
+        return self._server_loads[index] + songs_waiting / max(batch_importer.get_active_consumers(), 1)
+
+    # Place a song on a server, waiting for room if necessary. Returns False if
+    #  the import stopped first...
+    def _place(self, csv_row):
+
+        # Keep trying until placed...
+        while not self._stop_event.is_set():
+
+            # If any server's importer stopped, such as from too many errors,
+            #  stop them all...
+            if any(batch_importer.is_stopped() for batch_importer in self._batch_importers):
+                self._stop_event.set()
+                break
+
+            # Choose a server...
+            index = self._choose_shard(csv_row)
+            if index is None:
+                time.sleep(0.1)
+                continue
+
+            # Hand song to it...
+            try:
+                self._shard_readers[index].put(csv_row, timeout=1)
+                return True
+
+            # Its queue is full. Try again...
+            except queue.Full:
+                continue
+
+        # Stopped...
+        return False
+
+    # Background thread which samples each server's CPU load...
+    def _sample_load_thread(self):
+        while not self._stop_event.wait(self.load_sample_interval):
+            for index, client in enumerate(self._clients):
+                try:
+                    self._server_loads[index] = get_server_load(client.get_system_status())
+                except Exception as some_exception:
+                    logging.debug(_(F"placement: Could not sample load of {self._batch_importers[index].get_server()} ({str(some_exception)})."))
+
+    # Thread which runs a server's importer. Anything that stops it early is
+    #  remembered by the importer and raised again once every thread is done...
+    def _start_importer(self, batch_importer, shard_reader):
+        try:
+            batch_importer.start(shard_reader)
+        except Exception:
+            pass
+
+    # Get the number of consumers allowed to take new work on every server...
+    def get_active_consumers(self):
+        return sum(batch_importer.get_active_consumers() for batch_importer in self._batch_importers)
+
+    # Get list of pairs of song references and the reference of the song whose
+    #  content they duplicate...
+    def get_duplicates(self):
+        return [duplicate for batch_importer in self._batch_importers for duplicate in batch_importer.get_duplicates()]
+
+    # Get the number of errors remaining permitted. Each server's importer
+    #  tolerates --maximum-errors on its own, so this is only meaningful when
+    #  compared with it...
+    def get_errors_remaining(self):
+        return self._arguments.maximum_errors - sum(
+            self._arguments.maximum_errors - batch_importer.get_errors_remaining()
+            for batch_importer in self._batch_importers)
+
+    # Get list of pairs of song references and failure messages for failed
+    #  imports...
+    def get_failures(self):
+        return [failure for batch_importer in self._batch_importers for failure in batch_importer.get_failures()]
+
+    # Get the live metrics of this import...
+    def get_metrics(self):
+        return self._metrics
+
+    # Get the number of songs read from the catalogue and waiting for a
+    #  consumer on any server...
+    def get_queue_depth(self):
+        return sum(
+            shard_reader.qsize() + batch_importer.get_queue_depth()
+            for shard_reader, batch_importer in zip(self._shard_readers, self._batch_importers))
+
+    # Get the number of bytes of song files read ahead for consumers of every
+    #  server...
+    def get_read_ahead_bytes(self):
+        return sum(batch_importer.get_read_ahead_bytes() for batch_importer in self._batch_importers)
+
+    # Get the number of times songs were retried...
+    def get_retry_count(self):
+        return sum(batch_importer.get_retry_count() for batch_importer in self._batch_importers)
+
+    # Get the number of songs waiting to be retried...
+    def get_retry_lane_depth(self):
+        return sum(batch_importer.get_retry_lane_depth() for batch_importer in self._batch_importers)
+
+    # Get the total number of songs in the catalogue, or an estimate or None
+    #  if not known yet...
+    def get_songs_total(self):
+        if self._catalogue_reader is None:
+            return None
+        return self._catalogue_reader.get_songs_total()
+
+    # Get the total number of successful uploads...
+    def get_upload_count(self):
+        return sum(batch_importer.get_upload_count() for batch_importer in self._batch_importers)
+
+    # Start sharded import, placing each row dictionary the catalogue reader
+    #  yields on one of the servers...
+    def start(self, catalogue_reader):
+
+        # Remember the reader so we can query it for progress...
+        self._catalogue_reader = catalogue_reader
+
+        logging.info(_(F"producer: Importing into {len(self._batch_importers)} servers with {self._arguments.placement} placement."))
+
+        # Start each server's importer on its own thread...
+        for batch_importer, shard_reader in zip(self._batch_importers, self._shard_readers):
+            thread = threading.Thread(
+                target=self._start_importer,
+                args=(batch_importer, shard_reader),
+                name=F'shard-{batch_importer.get_server()}',
+                daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+        # Sample each server's load, if we need to...
+        if self._arguments.placement == 'least-loaded':
+            threading.Thread(target=self._sample_load_thread, name='placement', daemon=True).start()
+
+        # Rows as scheduled, once we start reading them...
+        scheduled_rows = None
+
+        try:
+
+            # Place each song on a server. Stop early if asked to...
+            scheduled_rows = schedule_catalogue_rows(
+                catalogue_reader, self._arguments.schedule, self._arguments.schedule_window)
+            for csv_row in scheduled_rows:
+
+                # Watched catalogue had nothing new for now. Keep waiting
+                #  unless one of the importers stopped in the meantime...
+                if csv_row is None:
+                    if any(batch_importer.is_stopped() for batch_importer in self._batch_importers):
+                        break
+                    continue
+
+                # Place it...
+                if not self._place(csv_row):
+                    break
+
+            # Let each server's importer know there are no more songs coming,
+            #  then wait for them to finish...
+            for shard_reader in self._shard_readers:
+                shard_reader.close()
+            for thread in self._threads:
+                while thread.is_alive():
+                    thread.join(timeout=0.5)
+
+            # If any server's importer failed, so did the import...
+            for batch_importer in self._batch_importers:
+                if batch_importer.get_producer_exception() is not None:
+                    raise batch_importer.get_producer_exception()
+
+            # Log how many songs were uploaded to each...
+            for batch_importer in self._batch_importers:
+                logging.info(_(F"{batch_importer.get_server()}: Uploaded {batch_importer.get_upload_count():,} new songs."))
+
+        # Parser error, treated as fatal. Let the caller know the import
+        #  failed...
+        except ValueError as some_exception:
+            logging.error(_(F"producer: Parser error: {some_exception}."))
+            raise
+
+        # User trying to abort...
+        except KeyboardInterrupt:
+            print(_(F'\rAborting. Draining work queues of {self.get_queue_depth()} items. Please wait a moment...'))
+
+        # Whatever the reason for leaving, close the catalogue and stop every
+        #  server's importer...
+        finally:
+            if scheduled_rows is not None:
+                scheduled_rows.close()
+            self.stop()
+
+    # Gracefully stop every server's importer...
+    def stop(self):
+
+        # Stop placing songs and sampling load...
+        self._stop_event.set()
+
+        # Let each server's importer know no more songs are coming, so none is
+        #  left waiting on its shard for more...
+        for shard_reader in self._shard_readers:
+            shard_reader.close()
+
+        # Stop each importer, waiting for its consumers...
+        for batch_importer in self._batch_importers:
+            batch_importer.stop()
+
+        # Wait for each importer's thread to finish...
+        for thread in self._threads:
+            thread.join()
+
+# Signal handler which interrupts the main thread as Ctrl-C would...
+def interrupt_signal_handler(signal_number, frame):
+    raise KeyboardInterrupt
 
-        # None left...
-        if len(page_songs_list) == 0:
-            break
+# Looking up each song in the catalogue is preferred over retrieving the
+#  server's whole index when the catalogue has fewer songs than this fraction of
+#  the server's. Retrieving a page of a thousand songs costs roughly as much as
+#  a few dozen individual lookups...
+check_existing_lookup_ratio = 0.02
 
-        # Dump each song and end with a new line...
-        for song in page_songs_list:
-            existing_song_references.add(song.reference)
+# Get a compact set of all of the existing song references on the Helios
+#  server...
+def get_existing_song_references(client):
+
+    # Grab songs in pages of a thousand at a time...
+    page_size = 1000
+
+    # Log that we are about to count the number of songs on server...
+    logging.info(_(F"Please wait while retrieving list of songs from server..."))
 
-        # Give some feedback...
-        print(_(F"\rRetrieved {len(existing_song_references):,} songs..."), end='', flush=True)
+    # Fetch songs several pages at a time, in whatever order they arrive, and
+    #  give some feedback after every page's worth...
+    def scan_references():
+        for songs_retrieved, song in enumerate(scan_all_songs(client, page_size=page_size, ordered=False), 1):
+            if songs_retrieved % page_size == 0:
+                print(_(F"\rRetrieved {songs_retrieved:,} songs..."), end='', flush=True)
+            yield song.reference
 
-        # Seek to the next page on next query...
-        current_page += 1
+    # Pack every reference into a compact set...
+    existing_song_references = CompactReferenceSet(scan_references())
 
     # Provide summary...
     print("\r", end='')
-    logging.info(_(F"Retrieved a total of {len(existing_song_references):,} songs from server..."))
+    logging.info(_(F"Retrieved a total of {len(existing_song_references):,} songs from server using {existing_song_references.get_memory_size() / 1048576:,.1f} MiB..."))
 
     # Return set of all existing song references to caller...
     return existing_song_references
 
+# Parse a --host value, which may be followed by a colon and port, into a tuple
+#  of host and port. IPv6 addresses need to be enclosed in square brackets to
+#  be given a port...
+def parse_server_argument(value, default_port):
+
+    # Bracketed IPv6 address, with or without a port...
+    match = re.fullmatch(r'\[(.+)\](?::(\d+))?', value)
+    if match:
+        return match.group(1), int(match.group(2) or default_port)
+
+    # Host name or IPv4 address with a port...
+    match = re.fullmatch(r'([^:]+):(\d+)', value)
+    if match:
+        return match.group(1), int(match.group(2))
+
+    # Otherwise use the default port...
+    return value, default_port
+
+# Create a batch importer for the server the given arguments, client, and
+#  system status refer to. Its consumer threads are sized for that server and
+#  it gets its own means of checking which songs the server already has, unless
+#  resuming with the journal's completed references...
+def create_batch_importer(
+    arguments, client, system_status, catalogue_songs_estimate, completed_song_references, journal,
+    fingerprint_index, metrics):
+
+    logging.info(_(F"Preparing to import into {arguments.host}:{arguments.port}..."))
+
+    # Adaptive concurrency controller, if requested...
+    concurrency_controller = None
+
+    # User requested adaptive concurrency. Spawn the maximum number of
+    #  consumer threads, but start with as many active as the server has
+    #  logical cores and let the controller tune it from there...
+    if arguments.threads == 'auto-adaptive':
+        arguments.threads = max(arguments.threads_maximum, 1)
+        concurrency_controller = AdaptiveConcurrencyController(
+            initial_limit=system_status.cpu.cores,
+            maximum_limit=arguments.threads,
+            status_client_factory=partial(
+                helios.Client,
+                host=arguments.host,
+                port=arguments.port,
+                api_key=arguments.api_key,
+                timeout_connect=arguments.timeout_connect,
+                timeout_read=arguments.timeout_read,
+                tls=arguments.tls,
+                tls_ca_file=arguments.tls_ca_file,
+                tls_certificate=arguments.tls_certificate,
+                tls_key=arguments.tls_key),
+            timeout_read=arguments.timeout_read)
+
+    # User requested autodetection on the number of consumer threads...
+    elif arguments.threads == 0:
+
+        # Start by setting to the number of logical cores on the server...
+        arguments.threads = max(system_status.cpu.cores, 1)
+
+        # If the number of threads exceeds the maximum allowed, reduce it.
+        #  This is a safety blow out valve in case the server has 144
+        #  logical cores and the client spawns enough threads that they
+        #  become i/o bound...
+        if arguments.threads > arguments.threads_maximum:
+            arguments.threads = arguments.threads_maximum
+
+    # Resuming, so only skip what the journal says is already done...
+    if completed_song_references is not None:
+        existing_song_references = completed_song_references
+
+    # Otherwise determine how to check which songs are already on the
+    #  server. Asking about each song in the catalogue is cheaper when it
+    #  is small compared to the server, provided we know how big it is...
+    else:
+
+        # Choose automatically...
+        if arguments.check_existing == 'auto':
+            if catalogue_songs_estimate is not None and catalogue_songs_estimate < system_status.songs * check_existing_lookup_ratio:
+                arguments.check_existing = 'lookup'
+            else:
+                arguments.check_existing = 'index'
+
+        # Ask the server about each song as it is reached...
+        if arguments.check_existing == 'lookup':
+            logging.info(_(F"Checking each song against the server's {system_status.songs:,} songs as it is reached..."))
+            existing_song_references = ServerReferenceLookup(client)
+
+        # Get the list of songs already on the Helios server and return
+        #  a set of all the song references...
+        else:
+            existing_song_references = get_existing_song_references(client)
+
+    # Initialize batch song importer for the requested engine...
+    if arguments.engine == 'asyncio':
+        return AsyncBatchSongImporter(
+            arguments,
+            existing_song_references,
+            journal,
+            fingerprint_index,
+            metrics)
+    else:
+        return BatchSongImporter(
+            arguments,
+            existing_song_references,
+            journal,
+            concurrency_controller,
+            fingerprint_index,
+            metrics)
+
 # Main function...
 def main():
 
@@ -510,7 +5000,7 @@ def main():
         description=_('Batch import songs into Helios.'))
 
     # Add common arguments to argument parser...
-    add_common_arguments(argument_parser)
+    add_common_arguments(argument_parser, multiple_hosts=True)
 
     # Add arguments specific to this utility to argument parser...
     add_arguments(argument_parser)
@@ -526,21 +5016,112 @@ def main():
     else:
         logging.basicConfig(format=logging_format, level=logging.INFO, datefmt="%H:%M:%S")
 
+    # Only checking the catalogue, which doesn't need a server...
+    if arguments.preflight:
+        sys.exit(0 if preflight_catalogue(arguments) else 1)
+
+    # Only measuring how fast songs could be prepared locally, which doesn't
+    #  need a server either...
+    if arguments.benchmark:
+        sys.exit(0 if benchmark_catalogue(arguments) else 1)
+
     # Success flag to determine exit code...
     success = False
 
-    # Total number of songs in the input catalogue file...
-    songs_total = 0
-
     # Batch importer will be constructed within try block...
     batch_importer = None
 
+    # Import journal, if one is kept...
+    journal = None
+
+    # Content fingerprint index, if duplicates are being looked for...
+    fingerprint_index = None
+
     # Try to process the catalogue file...
     try:
 
         # Input file...
         catalogue_file = None
 
+        # Adaptive concurrency works by idling consumer threads, which the
+        #  asyncio engine doesn't have...
+        if arguments.engine == 'asyncio' and arguments.threads == 'auto-adaptive':
+            raise helios.exceptions.Validation(_("--threads=auto-adaptive is not supported with --engine=asyncio."))
+
+        # The asyncio engine already reads files in the background...
+        if arguments.engine == 'asyncio' and arguments.read_ahead:
+            raise helios.exceptions.Validation(_("--read-ahead is not supported with --engine=asyncio."))
+
+        # User asked us to keep watching for new songs...
+        if arguments.watch:
+
+            # Only consumer threads wait on the catalogue between songs, and
+            #  songs can't be reordered if we never know when we have them
+            #  all...
+            if arguments.engine == 'asyncio':
+                raise helios.exceptions.Validation(_("--watch is not supported with --engine=asyncio."))
+            if arguments.schedule != 'catalogue':
+                raise helios.exceptions.Validation(_("--watch cannot be combined with --schedule."))
+
+            # Standard input is already read as it arrives, and only a CSV
+            #  catalogue can be followed as it grows...
+            if arguments.catalogue_file == '-':
+                raise helios.exceptions.Validation(_("--watch cannot be used with standard input, which is already imported as it arrives."))
+            if not os.path.isdir(arguments.catalogue_file) and get_catalogue_format(arguments.catalogue_file, arguments.format) != 'csv':
+                raise helios.exceptions.Validation(_("--watch only supports CSV catalogues or directories."))
+
+            # Watch a directory for new song files...
+            if os.path.isdir(arguments.catalogue_file):
+                reader = WatchedDirectoryReader(
+                    path=arguments.catalogue_file,
+                    interval=arguments.watch_interval,
+                    method=arguments.watch_method)
+                logging.info(_(F"Watching {arguments.catalogue_file} for new songs..."))
+
+            # Or follow a growing catalogue...
+            else:
+                reader = WatchedCsvCatalogueReader(
+                    path=arguments.catalogue_file,
+                    delimiter=arguments.delimiter,
+                    offset=arguments.offset,
+                    interval=arguments.watch_interval,
+                    method=arguments.watch_method)
+                logging.info(_(F"Following {arguments.catalogue_file} for new songs..."))
+
+            # Shut down the same way as for Ctrl-C when a service manager asks
+            #  us to...
+            signal.signal(signal.SIGTERM, interrupt_signal_handler)
+
+        # Otherwise prepare to read the input catalogue in a single pass.
+        #  Songs are handed to the consumer threads as they are read...
+        else:
+
+            # If starting part way through, use an offset index to seek there
+            #  directly. Without one we can still parse our way there...
+            offset_index = None
+            if arguments.offset > 1:
+                try:
+                    offset_index = CatalogueOffsetIndex(get_default_offset_index_path())
+                except (OSError, sqlite3.Error) as some_exception:
+                    logging.warning(_(F"Could not open offset index ({str(some_exception)})."))
+
+            # Construct the reader, which only needs the index to find where
+            #  to start...
+            try:
+                reader = create_catalogue_reader(
+                    path=arguments.catalogue_file,
+                    file_format=arguments.format,
+                    delimiter=arguments.delimiter,
+                    offset=arguments.offset,
+                    offset_index=offset_index)
+            finally:
+                if offset_index:
+                    offset_index.close()
+
+            # Read the first song now so that a catalogue with bad columns is
+            #  rejected before any server is contacted...
+            reader = PrimedCatalogueReader(reader)
+
         # If no host provided, use Zeroconf auto detection...
         if not arguments.host:
 
@@ -549,149 +5130,117 @@ def main():
             addresses, arguments.port, arguments.tls = zeroconf_find_server()
 
             # Select the first interface on the server...
-            arguments.host = addresses[0]
-
-        # Create a client...
-        client = helios.Client(
-            host=arguments.host,
-            port=arguments.port,
-            api_key=arguments.api_key,
-            tls=arguments.tls,
-            tls_ca_file=arguments.tls_ca_file,
-            tls_certificate=arguments.tls_certificate,
-            tls_key=arguments.tls_key,
-            verbose=arguments.verbose)
-
-        # Verify we can reach the server...
-        system_status = client.get_system_status()
-
-        # User requested autodetection on the number of consumer threads...
-        if arguments.threads == 0:
-
-            # Start by setting to the number of logical cores on the server...
-            arguments.threads = max(system_status.cpu.cores, 1)
-
-            # If the number of threads exceeds the maximum allowed, reduce it.
-            #  This is a safety blow out valve in case the server has 144
-            #  logical cores and the client spawns enough threads that they
-            #  become i/o bound...
-            if arguments.threads > arguments.threads_maximum:
-                arguments.threads = arguments.threads_maximum
-
-        # These column headers are expected...
-        acceptable_field_names = [
-            'reference',
-            'album',
-            'artist',
-            'title',
-            'genre',
-            'isrc',
-            'beats_per_minute',
-            'year',
-            'path'
-        ]
-
-        # These are the types for every acceptable header. Note that for
-        #  beats_per_minute and year, these should be integral types, but
-        #  nullable integers weren't added until Pandas 0.24.0...
-        acceptable_field_types = {
-            'reference'         : 'str',
-            'album'             : 'str',
-            'artist'            : 'str',
-            'title'             : 'str',
-            'genre'             : 'str',
-            'isrc'              : 'str',
-            'beats_per_minute'  : 'float',
-            'year'              : 'float',
-            'path'              : 'str'
-        }
-
-        # These headers are always required...
-        required_field_names = [
-            'reference',
-            'path'
-        ]
-
-        # Open reader so we can verify headers and count records...
-        reader = pandas.read_csv(
-            filepath_or_buffer=arguments.catalogue_file,
-            comment='#',
-            compression='infer',
-            delimiter=',',
-            header=0,
-            skip_blank_lines=True,
-            iterator=True,
-            chunksize=1,
-            quotechar='"',
-            quoting=0, # csv.QUOTE_MINIMAL
-            doublequote=False,
-            escapechar='\\',
-            encoding='utf-8',
-            low_memory=True)
-
-        # Count the number of song lines in the input catalogue. We use the
-        #  pandas reader to do this because it will only count actual song lines
-        #  after the header and will skip empty lines...
-        logging.info(_("Please wait while counting songs in input catalogue..."))
-        for current_song_offset, data_frame in enumerate(reader, 1):
-
-            # For the first record only, check headers since we only need to do
-            #  this once...
-            if current_song_offset == 1:
-
-                # Check for any extraneous column fields and raise error if any...
-                detected_field_names = data_frame.columns.tolist()
-                extraneous_fields = list(set(detected_field_names) - set(acceptable_field_names))
-                if len(extraneous_fields) > 0:
-                    raise helios.exceptions.Validation(_(F"Input catalogue contained unrecognized column: {extraneous_fields}"))
-
-                # Check for minimum required column fields and raise error if missing any...
-                missing_fields = set(required_field_names) - set(detected_field_names)
-                if len(missing_fields) > 0:
-                    raise helios.exceptions.Validation(_(F"Input catalogue missing column field: {missing_fields}"))
-
-            # Count one more song line...
-            songs_total += 1
-
-            # Every thousand songs give some feedback...
-            if songs_total % 10 == 0:
-                print(_(F"\rCounted {songs_total:,}..."), end='', flush=True)
-
-        # Provide summary and reset seek pointer for parser to next line after
-        #  headers...
-        print("\r", end='')
-        logging.info(_(F"Found a total of {songs_total:,} songs in input catalogue..."))
-
-        # Now initialize the reader we will actually use to parse the records
-        #  and supply the consumer threads...
-        reader = pandas.read_csv(
-            filepath_or_buffer=arguments.catalogue_file,
-            comment='#',
-            compression='infer',
-            delimiter=',',
-            dtype=acceptable_field_types,
-            header=0,
-            skipinitialspace=True,
-            skip_blank_lines=True,
-            iterator=True,
-            na_values=[],
-            chunksize=1,
-            quotechar='"',
-            quoting=0, # csv.QUOTE_MINIMAL
-            doublequote=False,
-            escapechar='\\',
-            encoding='utf-8',
-            low_memory=True)
-
-        # Get the list of songs already on the Helios server and return a set
-        #  of all the song references...
-        existing_song_references = get_existing_song_references(client)
-
-        # Initialize batch song importer...
-        batch_importer = BatchSongImporter(
-            arguments,
-            songs_total,
-            existing_song_references)
+            arguments.host = [addresses[0]]
+
+        # Each server gets its own copy of the arguments with its own host and
+        #  port, a client, and its status...
+        servers_arguments   = []
+        clients             = []
+        system_statuses     = []
+        for host in arguments.host:
+
+            # Separate the port, if one was given...
+            server_arguments = copy.copy(arguments)
+            server_arguments.host, server_arguments.port = parse_server_argument(host, arguments.port)
+            servers_arguments.append(server_arguments)
+
+            # Create a client...
+            client = helios.Client(
+                host=server_arguments.host,
+                port=server_arguments.port,
+                api_key=arguments.api_key,
+                tls=arguments.tls,
+                tls_ca_file=arguments.tls_ca_file,
+                tls_certificate=arguments.tls_certificate,
+                tls_key=arguments.tls_key,
+                verbose=arguments.verbose)
+            clients.append(client)
+
+            # Verify we can reach the server...
+            system_statuses.append(client.get_system_status())
+
+        # Let user know roughly how much work there is...
+        if reader.get_songs_total() is not None:
+            logging.info(_(F"Input catalogue contains approximately {reader.get_songs_total():,} songs..."))
+
+        # Open the import journal, unless this is a dry run or user asked us
+        #  not to keep one. There is nowhere to keep one by default for
+        #  standard input...
+        if arguments.journal and arguments.catalogue_file == '-' and arguments.journal_path is None:
+            logging.info(_("Not recording import progress for standard input without --journal..."))
+        elif arguments.journal and not arguments.dry_run:
+
+            # Default to keeping it next to the catalogue...
+            if arguments.journal_path is None:
+                arguments.journal_path = F"{os.path.normpath(arguments.catalogue_file)}.journal"
+
+            # Try to open it...
+            try:
+                journal = ImportJournal(arguments.journal_path)
+                logging.info(_(F"Recording import progress in {arguments.journal_path}..."))
+
+            # Failed. This is only fatal if we need it to resume...
+            except sqlite3.Error as some_exception:
+                if arguments.resume:
+                    raise
+                logging.warning(_(F"Could not open journal {arguments.journal_path} ({str(some_exception)}). Import will not be resumable."))
+
+        # Open the fingerprint index if we're looking for duplicate content...
+        if arguments.duplicates != 'ignore':
+            if arguments.fingerprint_index_path is None:
+                arguments.fingerprint_index_path = get_default_fingerprint_index_path()
+            fingerprint_index = FingerprintIndex(arguments.fingerprint_index_path)
+            logging.info(_(F"Checking for duplicate content using {arguments.fingerprint_index_path}..."))
+
+        # Resuming, so skip everything the journal says is already done rather
+        #  than retrieving each server's whole catalogue. Anything else that
+        #  turns out to already be on a server will be reported as a conflict
+        #  and skipped...
+        completed_song_references = None
+        if arguments.resume:
+
+            # Can't resume without a journal...
+            if journal is None:
+                raise helios.exceptions.Validation(_("Cannot --resume without a journal."))
+
+            # Get the list of songs already completed...
+            completed_song_references = journal.get_completed_references()
+            logging.info(_(F"Resuming. Journal records {len(completed_song_references):,} songs already imported..."))
+
+        # Roughly how many songs each server will receive...
+        catalogue_songs_estimate = reader.get_songs_total()
+        if catalogue_songs_estimate is not None:
+            catalogue_songs_estimate //= len(clients)
+
+        # Live metrics, shared by every server's importer...
+        metrics = ImportMetrics()
+
+        # Prepare an importer for each server...
+        batch_importers = [
+            create_batch_importer(
+                server_arguments,
+                client,
+                system_status,
+                catalogue_songs_estimate,
+                completed_song_references,
+                journal,
+                fingerprint_index,
+                metrics)
+            for server_arguments, client, system_status in zip(servers_arguments, clients, system_statuses)]
+
+        # Use it directly if there is only one, otherwise spread songs across
+        #  all of them...
+        if len(batch_importers) == 1:
+            batch_importer = batch_importers[0]
+        else:
+            batch_importer = ShardedSongImporter(arguments, batch_importers, clients, metrics)
+
+        # Expose live metrics, if requested...
+        if arguments.metrics_port is not None or arguments.metrics_file:
+            if arguments.metrics_port is not None:
+                batch_importer.get_metrics().start_http_server(arguments.metrics_address, arguments.metrics_port)
+                logging.info(_(F"Serving live metrics on http://{arguments.metrics_address}:{arguments.metrics_port}/metrics..."))
+            batch_importer.get_metrics().start_sampling(arguments.metrics_file, arguments.metrics_interval)
 
         # Submit the songs...
         batch_importer.start(reader)
@@ -721,6 +5270,9 @@ def main():
             # Tell it to stop, if it hasn't already...
             batch_importer.stop()
 
+            # Stop exposing live metrics, writing a final snapshot...
+            batch_importer.get_metrics().stop()
+
             # If there were any failures, deal with them...
             if len(batch_importer.get_failures()) > 0:
 
@@ -749,9 +5301,29 @@ def main():
                 if log_file:
                     log_file.close()
 
+            # Summarize how many retries were needed...
+            if batch_importer.get_retry_count() > 0:
+                print(_(F"Retried songs {batch_importer.get_retry_count():,} times after temporary failures."))
+
+            # Summarize duplicate content found...
+            if len(batch_importer.get_duplicates()) > 0:
+                if arguments.duplicates == 'skip':
+                    print(_(F"Skipped {len(batch_importer.get_duplicates()):,} songs duplicating the contents of another."))
+                else:
+                    print(_(F"Found {len(batch_importer.get_duplicates()):,} songs duplicating the contents of another."))
+
             # Mark it as deallocated...
             del batch_importer
 
+            # Summarize journal, if we kept one...
+            if journal:
+                state_counts = journal.get_state_counts()
+                print(_(F"Journal {journal.get_path()}: {state_counts.get(ImportJournal.state_uploaded, 0):,} uploaded, "
+                        F"{state_counts.get(ImportJournal.state_exists, 0):,} already on server, "
+                        F"{state_counts.get(ImportJournal.state_duplicate, 0):,} duplicates, "
+                        F"{state_counts.get(ImportJournal.state_failed, 0):,} failed, "
+                        F"{state_counts.get(ImportJournal.state_queued, 0):,} interrupted."))
+
             # If this was a dry run, remind the user...
             if arguments.dry_run:
                 print(_("Note that this was a dry run and nothing was actually uploaded."))
@@ -760,6 +5332,14 @@ def main():
         if catalogue_file:
             catalogue_file.close()
 
+        # Close journal...
+        if journal:
+            journal.close()
+
+        # Close fingerprint index...
+        if fingerprint_index:
+            fingerprint_index.close()
+
     # Exit with status code based on whether we were successful or not...
     if success:
         sys.exit(0)
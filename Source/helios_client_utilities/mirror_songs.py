@@ -0,0 +1,413 @@
+#!/usr/bin/python3
+#
+#   Helios, intelligent music.
+#   Copyright (C) 2015-2024 Cartesian Theatre. All rights reserved.
+#
+
+# System imports...
+import argparse
+import csv
+import os
+import sqlite3
+import sys
+import time
+
+# Other imports...
+import helios
+from helios_client_utilities.common import add_common_arguments, get_cache_directory, scan_all_songs, zeroconf_find_server
+from tqdm import tqdm
+
+# i18n...
+import gettext
+_ = gettext.gettext
+
+# Song fields kept in the mirror, in the order they are stored and shown...
+mirror_field_names = [
+    'id',
+    'reference',
+    'artist',
+    'title',
+    'album',
+    'genre',
+    'year',
+    'beats_per_minute',
+    'location'
+]
+
+# Number of songs to request from the server at a time...
+mirror_page_size = 1000
+
+# Add arguments specific to this utility to argument parser...
+def add_arguments(argument_parser):
+
+    # Define behaviour for --artist...
+    argument_parser.add_argument(
+        '--artist',
+        default=None,
+        dest='artist',
+        help=_('Show songs in the mirror by this artist, ignoring case.'))
+
+    # Define behaviour for --full...
+    argument_parser.add_argument(
+        '--full',
+        action='store_true',
+        default=False,
+        dest='full',
+        help=_('When synchronizing, fetch the whole catalogue so that changes '
+               'to songs already in the mirror are seen too.'))
+
+    # Define behaviour for --genre...
+    argument_parser.add_argument(
+        '--genre',
+        default=None,
+        dest='genre',
+        help=_('Show songs in the mirror of this genre, ignoring case.'))
+
+    # Define behaviour for --mirror...
+    argument_parser.add_argument(
+        '--mirror',
+        default=None,
+        dest='mirror_path',
+        help=_('Path to local mirror of the server\'s song metadata. Defaults '
+               'to one in the user\'s cache directory.'))
+
+    # Define behaviour for --reference...
+    argument_parser.add_argument(
+        '--reference',
+        default=None,
+        dest='song_reference',
+        help=_('Show the song in the mirror with this reference.'))
+
+    # Define behaviour for --sync...
+    argument_parser.add_argument(
+        '--sync',
+        action='store_true',
+        default=False,
+        dest='sync',
+        help=_('Synchronize the mirror with the server before anything else. '
+               'Only songs added since the last synchronization are fetched, '
+               'unless --full is used or songs were deleted.'))
+
+# Local SQLite mirror of the song metadata on a server, which can be queried
+#  without contacting it...
+class SongMirror:
+
+    # Constructor...
+    def __init__(self, path):
+
+        # Create the directory to hold it, if necessary...
+        directory = os.path.dirname(os.path.abspath(path))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        # Open or create the database...
+        self._connection = sqlite3.connect(database=path)
+
+        # Write-ahead logging lets queries run while synchronizing...
+        self._connection.execute('PRAGMA journal_mode=WAL;')
+        self._connection.execute('PRAGMA synchronous=NORMAL;')
+
+        # Create schema if this is a new mirror. Artist and genre are looked up
+        #  ignoring case, so their indices are too...
+        self._connection.executescript(
+        """
+            CREATE TABLE IF NOT EXISTS songs (
+                id                  INTEGER PRIMARY KEY NOT NULL,
+                reference           TEXT NOT NULL,
+                artist              TEXT,
+                title               TEXT,
+                album               TEXT,
+                genre               TEXT,
+                year                INTEGER,
+                beats_per_minute    REAL,
+                location            TEXT
+            );
+            CREATE INDEX IF NOT EXISTS songs_reference ON songs (reference);
+            CREATE INDEX IF NOT EXISTS songs_artist ON songs (artist COLLATE NOCASE);
+            CREATE INDEX IF NOT EXISTS songs_genre ON songs (genre COLLATE NOCASE);
+            CREATE TABLE IF NOT EXISTS properties (
+                key                 TEXT PRIMARY KEY NOT NULL,
+                value               TEXT
+            );
+        """)
+
+    # Look for where songs added since the last synchronization begin. Songs
+    #  are listed in the order they were added, so if the last song we have is
+    #  still where we left it, nothing before it was deleted. Returns a tuple of
+    #  the next page to fetch and the songs after it on its own page, or None
+    #  if the mirror has to be synchronized in full...
+    def _find_new_songs(self, client, page_size):
+
+        # How many songs we have and the most recently added...
+        songs_total, last_id = self._connection.execute('SELECT COUNT(*), MAX(id) FROM songs;').fetchone()
+
+        # Mirror is empty...
+        if songs_total == 0:
+            return 1, []
+
+        # Fetch the page the last song should be on...
+        page    = (songs_total - 1) // page_size + 1
+        index   = (songs_total - 1) % page_size
+        songs   = client.get_all_songs(page=page, page_size=page_size)
+
+        # It moved, so something before it was deleted...
+        if len(songs) <= index or songs[index].id != last_id:
+            return None
+
+        # Resume from there...
+        return page + 1, songs[index + 1:]
+
+    # Add or update the given stored songs, returning the number changed...
+    def _put_songs(self, songs):
+
+        # Changes so far...
+        total_changes = self._connection.total_changes
+
+        # Only rewrite songs whose fields actually differ...
+        assignments = ', '.join(F'{key} = excluded.{key}' for key in mirror_field_names[1:])
+        self._connection.executemany(
+            F"INSERT INTO songs ({', '.join(mirror_field_names)}) VALUES ({', '.join('?' * len(mirror_field_names))}) "
+            F"ON CONFLICT (id) DO UPDATE SET {assignments} "
+            F"WHERE ({', '.join(F'songs.{key}' for key in mirror_field_names[1:])}) IS NOT "
+            F"({', '.join(F'excluded.{key}' for key in mirror_field_names[1:])});",
+            [tuple(getattr(song, key) for key in mirror_field_names) for song in songs])
+
+        # Done...
+        return self._connection.total_changes - total_changes
+
+    # Close the mirror...
+    def close(self):
+        if self._connection:
+            self._connection.close()
+            self._connection = None
+
+    # Get a property of the mirror, or None if it isn't set...
+    def get_property(self, key):
+        row = self._connection.execute('SELECT value FROM properties WHERE key = ?;', (key,)).fetchone()
+        return row[0] if row else None
+
+    # Get the number of songs in the mirror...
+    def get_songs_total(self):
+        return self._connection.execute('SELECT COUNT(*) FROM songs;').fetchone()[0]
+
+    # Get a cursor over every song matching all of the given fields that aren't
+    #  None, in the order they were added. The year is a tuple of the first and
+    #  last year in an inclusive range...
+    def query(self, artist=None, genre=None, reference=None, album=None, year=None):
+
+        # Conditions for each field given...
+        conditions  = []
+        parameters  = []
+        for condition, value in [
+            ('album = ? COLLATE NOCASE', album),
+            ('artist = ? COLLATE NOCASE', artist),
+            ('genre = ? COLLATE NOCASE', genre),
+            ('reference = ?', reference)]:
+            if value is not None:
+                conditions.append(condition)
+                parameters.append(value)
+
+        # Range of years...
+        if year is not None:
+            conditions.append('year BETWEEN ? AND ?')
+            parameters.extend(year)
+
+        # Query...
+        return self._connection.execute(
+            F"SELECT {', '.join(mirror_field_names)} FROM songs "
+            F"{'WHERE ' + ' AND '.join(conditions) if conditions else ''} ORDER BY id;",
+            parameters)
+
+    # Synchronize the mirror with the given server, identified by server. Only
+    #  songs added since the last synchronization are fetched, unless full or
+    #  songs were deleted on the server. Then every song is fetched, only
+    #  those that changed are rewritten, and those no longer on the server are
+    #  removed. The mirror is updated in a single transaction so it is never
+    #  left half synchronized. Returns a tuple of the number of songs added,
+    #  updated, and removed...
+    def synchronize(self, client, server, full=False, page_size=mirror_page_size):
+
+        # Statistics...
+        songs_changed = 0
+        songs_removed = 0
+
+        # Update atomically...
+        with self._connection:
+
+            # Mirror was of another server, so start over...
+            if self.get_property('server') != server:
+                self._connection.execute('DELETE FROM songs;')
+                full = True
+
+            # Find where new songs begin, unless synchronizing in full...
+            first_page  = 1
+            songs       = []
+            if not full:
+                new_songs = self._find_new_songs(client, page_size)
+                if new_songs is None:
+                    full = True
+                else:
+                    first_page, songs = new_songs
+
+            # Songs on the server before synchronizing, and how many we expect
+            #  to fetch...
+            songs_before    = self.get_songs_total()
+            songs_expected  = client.get_system_status().songs
+            if not full:
+                songs_expected = max(songs_expected - songs_before, 0)
+
+            # When synchronizing in full, remember every song seen so the rest
+            #  can be removed afterwards...
+            if full:
+                self._connection.execute('CREATE TEMPORARY TABLE IF NOT EXISTS seen (id INTEGER PRIMARY KEY);')
+                self._connection.execute('DELETE FROM seen;')
+
+            # Store each page's songs as they arrive...
+            progress_bar = tqdm(desc=_('Synchronizing'), total=songs_expected, unit=_(' songs'))
+            try:
+                for song in scan_all_songs(client, page_size=page_size, first_page=first_page):
+                    songs.append(song)
+                    if len(songs) >= page_size:
+                        songs_changed += self._put_songs(songs)
+                        if full:
+                            self._connection.executemany('INSERT OR IGNORE INTO seen (id) VALUES (?);', [(song.id,) for song in songs])
+                        progress_bar.update(len(songs))
+                        songs = []
+                songs_changed += self._put_songs(songs)
+                if full:
+                    self._connection.executemany('INSERT OR IGNORE INTO seen (id) VALUES (?);', [(song.id,) for song in songs])
+                progress_bar.update(len(songs))
+            finally:
+                progress_bar.close()
+
+            # Remove songs no longer on the server...
+            if full:
+                songs_removed = self._connection.execute(
+                    'DELETE FROM songs WHERE id NOT IN (SELECT id FROM seen);').rowcount
+                self._connection.execute('DELETE FROM seen;')
+
+            # Remember which server this is a mirror of and when...
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO properties (key, value) VALUES (?, ?);',
+                [('server', server), ('synchronized', time.strftime('%Y-%m-%d %H:%M:%S'))])
+
+        # Songs added are those changed that weren't already there...
+        songs_added = self.get_songs_total() - songs_before + songs_removed
+        return songs_added, songs_changed - songs_added, songs_removed
+
+# Get the default path of the mirror...
+def get_default_mirror_path():
+    return os.path.join(get_cache_directory(), 'mirror.db')
+
+# Main function...
+def main():
+
+    # Initialize the argument parser...
+    argument_parser = argparse.ArgumentParser(
+        description=_('Keep a local mirror of the song metadata on a remote Helios server and query it offline.'))
+
+    # Add common arguments to argument parser...
+    add_common_arguments(argument_parser)
+
+    # Add arguments specific to this utility to argument parser...
+    add_arguments(argument_parser)
+
+    # Parse the command line...
+    arguments = argument_parser.parse_args()
+
+    # Status on whether there were any errors...
+    success = False
+
+    # Mirror will be opened within try block...
+    mirror = None
+
+    # Try to synchronize and query the mirror...
+    try:
+
+        # Open the mirror...
+        if arguments.mirror_path is None:
+            arguments.mirror_path = get_default_mirror_path()
+        mirror = SongMirror(arguments.mirror_path)
+
+        # Synchronize with the server, if requested...
+        if arguments.sync:
+
+            # If no host provided, use Zeroconf auto detection...
+            if not arguments.host:
+
+                # Get the list of all IP addresses for every interface for the
+                #  best server, its port, and TLS flag...
+                addresses, arguments.port, arguments.tls = zeroconf_find_server()
+
+                # Select the first interface on the server...
+                arguments.host = addresses[0]
+
+            # Create a client...
+            client = helios.Client(
+                host=arguments.host,
+                port=arguments.port,
+                api_key=arguments.api_key,
+                timeout_connect=arguments.timeout_connect,
+                timeout_read=arguments.timeout_read,
+                tls=arguments.tls,
+                tls_ca_file=arguments.tls_ca_file,
+                tls_certificate=arguments.tls_certificate,
+                tls_key=arguments.tls_key,
+                verbose=arguments.verbose)
+
+            # Synchronize...
+            started = time.monotonic()
+            songs_added, songs_updated, songs_removed = mirror.synchronize(
+                client, F'{arguments.host}:{arguments.port}', full=arguments.full)
+            print(_(F"Synchronized {mirror.get_songs_total():,} songs in {time.monotonic() - started:.1f} seconds: "
+                    F"{songs_added:,} added, {songs_updated:,} updated, {songs_removed:,} removed."),
+                file=sys.stderr)
+
+        # Show matching songs as CSV, if any were asked for...
+        if arguments.artist is not None or arguments.genre is not None or arguments.song_reference is not None:
+            cursor = mirror.query(
+                artist=arguments.artist, genre=arguments.genre, reference=arguments.song_reference)
+            writer = csv.writer(sys.stdout)
+            writer.writerow(mirror_field_names)
+            writer.writerows(cursor)
+
+        # Otherwise describe the mirror if it wasn't just synchronized...
+        elif not arguments.sync:
+            print(_(F"Mirror: {arguments.mirror_path}"))
+            print(_(F"Server: {mirror.get_property('server') or _('never synchronized')}"))
+            print(_(F"Songs: {mirror.get_songs_total():,}"))
+            print(_(F"Synchronized: {mirror.get_property('synchronized') or _('never')}"))
+
+        # Done...
+        success = True
+
+    # User trying to abort...
+    except KeyboardInterrupt:
+        print(_('\rAborting, please wait a moment...'), file=sys.stderr)
+
+    # Helios exception...
+    except helios.exceptions.ExceptionBase as some_exception:
+        print(some_exception.what(), file=sys.stderr)
+
+    # Some other kind of exception...
+    except Exception as some_exception:
+        print(_(F"An exception occurred: {str(some_exception)}"), file=sys.stderr)
+
+    # Cleanup...
+    finally:
+
+        # Close the mirror...
+        if mirror:
+            mirror.close()
+
+    # Exit with status code based on whether we were successful or not...
+    if success:
+        sys.exit(0)
+    else:
+        sys.exit(1)
+
+# Entry point...
+if __name__ == '__main__':
+
+    # Run main function...
+    main()
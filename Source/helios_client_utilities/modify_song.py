@@ -6,14 +6,13 @@
 
 # System imports...
 import argparse
-import base64
 from pprint import pprint
 import sys
 
 # Other imports...
 import attr
 import helios
-from helios_client_utilities.common import add_common_arguments, zeroconf_find_server
+from helios_client_utilities.common import add_common_arguments, modify_song_from_file, zeroconf_find_server
 
 # i18n...
 import gettext
@@ -172,10 +171,6 @@ def main():
     if arguments.song_edit_file == '':
         patch_song_dict['file'] = ''
 
-    # If a path was provided to --edit-file, load and submit the file...
-    elif arguments.song_edit_file is not None:
-        patch_song_dict['file'] = base64.b64encode(open(arguments.song_edit_file, 'rb').read()).decode('ascii')
-
     # Initialize all the other patchable song fields...
     if arguments.song_edit_album is not None:
         patch_song_dict['album'] = arguments.song_edit_album
@@ -221,12 +216,24 @@ def main():
             tls_key=arguments.tls_key,
             verbose=arguments.verbose)
 
-        # Submit modification request...
-        stored_song = client.modify_song(
-            patch_song_dict=patch_song_dict,
-            store=arguments.store,
-            song_id=arguments.song_id,
-            song_reference=arguments.song_reference)
+        # Submit modification request, streaming the replacement file from
+        #  disk if one was provided...
+        if arguments.song_edit_file:
+            stored_song = modify_song_from_file(
+                client,
+                patch_song_dict=patch_song_dict,
+                song_path=arguments.song_edit_file,
+                store=arguments.store,
+                song_id=arguments.song_id,
+                song_reference=arguments.song_reference)
+
+        # Otherwise just the metadata...
+        else:
+            stored_song = client.modify_song(
+                patch_song_dict=patch_song_dict,
+                store=arguments.store,
+                song_id=arguments.song_id,
+                song_reference=arguments.song_reference)
 
         # Note success...
         success = True
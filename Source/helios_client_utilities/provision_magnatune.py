@@ -22,7 +22,7 @@ import traceback
 import urllib
 
 # Other imports...
-from helios_client_utilities.common import __version__
+from helios_client_utilities.common import TokenBucket, __version__, byte_rate_argument
 import keyring
 import magic
 import mutagen.flac
@@ -110,6 +110,25 @@ def add_arguments(argument_parser):
         nargs='?',
         required=False)
 
+    # Define behaviour for --limit-rate...
+    argument_parser.add_argument(
+        '--limit-rate',
+        default=None,
+        dest='limit_rate',
+        nargs='?',
+        type=byte_rate_argument,
+        help=_('Maximum bytes per second to download, shared by all downloads. '
+               'Accepts a K, M, or G suffix. Defaults to unlimited.'))
+
+    # Define behaviour for --limit-requests...
+    argument_parser.add_argument(
+        '--limit-requests',
+        default=None,
+        dest='limit_requests',
+        nargs='?',
+        type=float,
+        help=_('Maximum downloads per second to begin. Defaults to unlimited.'))
+
     # Define behaviour for --maximum-errors...
     argument_parser.add_argument(
         '--maximum-errors',
@@ -199,8 +218,11 @@ def add_arguments(argument_parser):
         action='version',
         version=get_version())
 
-# Download a file over HTTP to either a file object or a file name...
-def download_file(url, fileobj=None, filename=None, verify=False, authorization_dict=None):
+# Download a file over HTTP to either a file object or a file name. Optional
+#  TokenBucket instances limit bytes per second and requests per second...
+def download_file(
+    url, fileobj=None, filename=None, verify=False, authorization_dict=None,
+    rate_limiter=None, request_limiter=None):
 
     # Either a file object or a file name has to be provided...
     if fileobj is not None and filename is not None:
@@ -234,6 +256,10 @@ def download_file(url, fileobj=None, filename=None, verify=False, authorization_
     # Try to perform download...
     try:
 
+        # Wait our turn if the rate of requests is limited...
+        if request_limiter is not None:
+            request_limiter.consume()
+
         # Make request to server...
         response = session.get(
             url,
@@ -267,6 +293,10 @@ def download_file(url, fileobj=None, filename=None, verify=False, authorization_
             if not chunk:
                 continue
 
+            # Wait for bandwidth, if limited...
+            if rate_limiter is not None:
+                rate_limiter.consume(len(chunk))
+
             # Append chunk to file...
             fileobj.write(chunk)
 
@@ -576,6 +606,11 @@ def main():
     # Temporary file names to delete on exit...
     temporary_filenames = []
 
+    # Limit bandwidth and rate of requests shared by all downloads, if
+    #  requested...
+    rate_limiter    = TokenBucket(arguments.limit_rate) if arguments.limit_rate else None
+    request_limiter = TokenBucket(arguments.limit_requests, burst=1) if arguments.limit_requests else None
+
     # Create output directory, if not already...
     os.makedirs(name=arguments.output_directory, exist_ok=True)
 
@@ -724,7 +759,9 @@ def main():
             # Download database and decompress it into RAM...
             response_headers = download_file(
                 url="http://he3.magnatune.com/info/sqlite_normalized.db.gz",
-                filename=compressed_tempfilename)
+                filename=compressed_tempfilename,
+                rate_limiter=rate_limiter,
+                request_limiter=request_limiter)
 
             # Show last modified date...
             logging.info(_(F"Last modified: {response_headers.get('Last-Modified')}"))
@@ -968,7 +1005,11 @@ def main():
                         temporary_filenames.append(artwork_output_path)
 
                         # Download artwork...
-                        download_file(url=artwork_url, filename=artwork_output_path)
+                        download_file(
+                            url=artwork_url,
+                            filename=artwork_output_path,
+                            rate_limiter=rate_limiter,
+                            request_limiter=request_limiter)
 
                         # Don't delete file on exit, now that we have all of it...
                         temporary_filenames.remove(artwork_output_path)
@@ -998,7 +1039,9 @@ def main():
                 download_file(
                     url=url,
                     filename=output_path,
-                    authorization_dict={'user' : arguments.user, 'pass' : arguments.password})
+                    authorization_dict={'user' : arguments.user, 'pass' : arguments.password},
+                    rate_limiter=rate_limiter,
+                    request_limiter=request_limiter)
 
                 # Don't delete file on exit, now that we have all of it...
                 temporary_filenames.remove(output_path)
@@ -1041,7 +1084,11 @@ def main():
                         logging.info(F"[{song_id}] Downloading song {index + 1}/{total_requested}: High resolution album artwork missing. Will embed...")
 
                         # Download artwork...
-                        download_file(url=artwork_url, filename=artwork_output_path)
+                        download_file(
+                            url=artwork_url,
+                            filename=artwork_output_path,
+                            rate_limiter=rate_limiter,
+                            request_limiter=request_limiter)
 
                     # Embed artwork...
                     embed_artwork(song_path=output_path, artwork_path=artwork_output_path)
@@ -6,14 +6,13 @@
 
 # System imports...
 import argparse
-import base64
 from pprint import pprint
 import sys
 
 # Other imports...
 import helios
 from helios.responses import StoredSongSchema
-from helios_client_utilities.common import add_common_arguments, zeroconf_find_server
+from helios_client_utilities.common import add_common_arguments, get_similar_songs_from_file, zeroconf_find_server
 
 # i18n...
 import gettext
@@ -133,8 +132,6 @@ def main():
         similarity_search_dict = {}
         if arguments.algorithm:
             similarity_search_dict['algorithm'] = arguments.algorithm
-        if arguments.similar_file:
-            similarity_search_dict['similar_file'] = base64.b64encode(open(arguments.similar_file, 'rb').read()).decode('ascii')
         if arguments.similar_id:
             similarity_search_dict['similar_id'] = arguments.similar_id
         if arguments.similar_reference:
@@ -143,8 +140,13 @@ def main():
             similarity_search_dict['similar_url'] = arguments.similar_url
         similarity_search_dict['maximum_results'] = arguments.maximum_results
 
-        # Query and show a progress bar...
-        similar_songs_list = client.get_similar_songs(similarity_search_dict, True)
+        # Query and show a progress bar. If the search key is a local file, it
+        #  is streamed from disk rather than loaded into memory...
+        if arguments.similar_file:
+            similar_songs_list = get_similar_songs_from_file(
+                client, similarity_search_dict, arguments.similar_file, True)
+        else:
+            similar_songs_list = client.get_similar_songs(similarity_search_dict, True)
 
         # Note success...
         success = True
@@ -0,0 +1,73 @@
+#
+#   Helios, intelligent music.
+#   Copyright (C) 2015-2024 Cartesian Theatre. All rights reserved.
+#
+
+# Other imports...
+import pytest
+
+# Helios...
+from helios_client_utilities.import_songs import (
+    CatalogueOffsetIndex, CsvCatalogueReader, catalogue_data_frame_to_rows, read_catalogue_csv)
+
+# Rows which a line counting scanner would miscount, repeated...
+tricky_rows = [
+    'R{index},"C:\\\\",x.bin\n',
+    'R{index},plain,x.bin # note with a " quote\n',
+    'R{index},"multi\nline",x.bin\n# comment " line\n\n',
+    'R{index},\t"tab quote,x.bin\n',
+    'R{index},"hash # inside",x.bin\n',
+    'R{index},escaped\\\nnewline,x.bin\n   \n'
+]
+
+# Tricky catalogue of a hundred songs...
+@pytest.fixture
+def catalogue_path(tmp_path):
+    path = tmp_path / 'catalogue.csv'
+    with open(path, 'w') as file:
+        file.write('# Generated catalogue\nreference,title,path\n')
+        for index in range(100):
+            file.write(tricky_rows[index % len(tricky_rows)].format(index=index))
+    return str(path)
+
+# Offset index with only a few rows between each indexed offset, so most
+#  lookups land between them...
+@pytest.fixture
+def offset_index(tmp_path, monkeypatch):
+    monkeypatch.setattr(CatalogueOffsetIndex, 'interval', 7)
+    offset_index = CatalogueOffsetIndex(str(tmp_path / 'offsets.db'))
+    yield offset_index
+    offset_index.close()
+
+# Starting at any song gives the same rows pandas does reading from the start...
+def test_matches_pandas(catalogue_path, offset_index):
+    expected_rows = catalogue_data_frame_to_rows(read_catalogue_csv(catalogue_path))
+    assert [csv_row['reference'] for csv_row in expected_rows] == [F'R{index}' for index in range(100)]
+    for offset in (2, 7, 8, 9, 50, 99, 100):
+        reader = CsvCatalogueReader(catalogue_path, offset=offset, offset_index=offset_index)
+        assert list(reader) == expected_rows[offset - 1:]
+
+# An offset past the last song gives no rows...
+def test_past_end(catalogue_path, offset_index):
+    assert list(CsvCatalogueReader(catalogue_path, offset=101, offset_index=offset_index)) == []
+
+# A catalogue indexed with one delimiter isn't looked up with another, since
+#  the delimiter changes where quoted fields begin...
+def test_delimiter_not_shared(tmp_path, offset_index):
+
+    # Semicolon delimited catalogue whose titles open a quote only if commas
+    #  were the delimiter...
+    path = str(tmp_path / 'catalogue.csv')
+    with open(path, 'w') as file:
+        file.write('reference;title;path\n')
+        for index in range(30):
+            file.write(F'R{index};a,"b;x.bin\n')
+
+    # Index it with the wrong delimiter first...
+    offset_index.get_position(path, 10, ',')
+
+    # Then read it with the right one...
+    expected_rows = catalogue_data_frame_to_rows(read_catalogue_csv(path, delimiter=';'))
+    reader = CsvCatalogueReader(path, delimiter=';', offset=10, offset_index=offset_index)
+    assert list(reader) == expected_rows[9:]
+    assert offset_index.get_position(path, 10, ';')[2:] == (7, 30)
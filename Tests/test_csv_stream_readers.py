@@ -0,0 +1,136 @@
+#
+#   Helios, intelligent music.
+#   Copyright (C) 2015-2024 Cartesian Theatre. All rights reserved.
+#
+
+# System imports...
+import io
+import os
+import threading
+import time
+
+# Other imports...
+import pytest
+
+# Helios...
+from helios_client_utilities.import_songs import (
+    CsvRecordBuffer, CsvRecordScanner, CsvStreamCatalogueReader, WatchedCsvCatalogueReader,
+    catalogue_data_frame_to_rows, read_catalogue_csv)
+
+# Catalogue with quoted fields spanning lines, escapes, and comments...
+catalogue = (
+    b'# Generated catalogue\n'
+    b'\n'
+    b'reference,title,path\n'
+    b'A,"Line one\nline two",a.flac\n'
+    b'B,"C:\\\\",b.flac\n'
+    b'C,plain,c.flac # comment with a " quote\n'
+    b'# comment line with a " quote\n'
+    b'D, "spaced\n  quote",d.flac\n'
+    b'E,escaped\\\nnewline,e.flac\n'
+    b'F,"hash # inside",f.flac\n'
+    b'   \n'
+    b'G,"quote \\" inside",g.flac\n')
+
+# Rows as pandas parses the whole catalogue at once...
+def expected_rows():
+    return catalogue_data_frame_to_rows(read_catalogue_csv(io.BytesIO(catalogue)))
+
+# Scanner agrees with pandas on which records are rows, wherever the catalogue
+#  is split...
+@pytest.mark.parametrize('piece_size', [1, 2, 7, len(catalogue)])
+def test_scanner_rows(piece_size):
+
+    # Scan in pieces...
+    scanner = CsvRecordScanner()
+    records = []
+    for start in range(0, len(catalogue), piece_size):
+        records += scanner.feed(catalogue[start:start + piece_size])
+    records += scanner.finish()
+
+    # Records cover the whole catalogue in order...
+    assert records[0][0] == 0
+    assert records[-1][1] == len(catalogue)
+    assert all(previous[1] == record[0] for previous, record in zip(records, records[1:]))
+
+    # One row for the column header line and one for each song...
+    rows = [(start, end) for start, end, is_row in records if is_row]
+    assert len(rows) == len(expected_rows()) + 1
+
+    # Parsing from the start of each song's row gives pandas' rows from it...
+    names = ['reference', 'title', 'path']
+    for index, (start, end) in enumerate(rows[1:]):
+        data_frame = read_catalogue_csv(io.BytesIO(catalogue[start:]), names=names)
+        assert catalogue_data_frame_to_rows(data_frame) == expected_rows()[index:]
+
+# Buffer never splits a row, wherever the catalogue is split in two...
+def test_buffer_every_split():
+    for split in range(1, len(catalogue)):
+        record_buffer = CsvRecordBuffer()
+        records = record_buffer.add(catalogue[:split])
+        records += record_buffer.add(catalogue[split:])
+        records += record_buffer.finish()
+        assert record_buffer.get_header_line() == b'reference,title,path\n'
+        data_frame = read_catalogue_csv(io.BytesIO(record_buffer.get_header_line() + records))
+        assert catalogue_data_frame_to_rows(data_frame) == expected_rows()
+
+# Standard input arriving in writes that split quoted fields is read the same
+#  as the whole catalogue...
+def test_stream_reader_split_writes(monkeypatch):
+
+    # Feed standard input from a pipe, one small write at a time...
+    read_descriptor, write_descriptor = os.pipe()
+    class Stdin:
+        def fileno(self):
+            return read_descriptor
+    monkeypatch.setattr('sys.stdin', Stdin())
+    def write():
+        for start in range(0, len(catalogue), 5):
+            os.write(write_descriptor, catalogue[start:start + 5])
+            time.sleep(0.001)
+        os.close(write_descriptor)
+    writer = threading.Thread(target=write)
+    writer.start()
+
+    # Read it...
+    try:
+        rows = list(CsvStreamCatalogueReader('-'))
+    finally:
+        writer.join()
+        os.close(read_descriptor)
+    assert rows == expected_rows()
+
+# Stream reader skips songs before the requested offset...
+def test_stream_reader_offset(tmp_path):
+    path = tmp_path / 'catalogue.csv'
+    path.write_bytes(catalogue)
+    rows = list(CsvStreamCatalogueReader(str(path), offset=3))
+    assert rows == expected_rows()[2:]
+
+# Watched catalogue holds back a row whose quoted field is still being written...
+def test_watched_reader_partial_row(tmp_path):
+
+    # Catalogue with the first part of a quoted field...
+    path = tmp_path / 'catalogue.csv'
+    path.write_bytes(b'reference,title,path\nA,"Line one\n')
+
+    # Read until nothing more arrives, appending the rest the first time...
+    rows = []
+    appended = False
+    iterator = iter(WatchedCsvCatalogueReader(str(path), interval=0.1, method='poll'))
+    try:
+        for csv_row in iterator:
+            if csv_row is not None:
+                rows.append(csv_row)
+            elif not appended:
+                with open(path, 'ab') as file:
+                    file.write(b'line two",a.flac\nB,plain,b.flac\n')
+                appended = True
+            else:
+                break
+    finally:
+        iterator.close()
+
+    # Check them...
+    assert [(csv_row['reference'], csv_row['title']) for csv_row in rows] == [
+        ('A', 'Line one\nline two'), ('B', 'plain')]
@@ -0,0 +1,74 @@
+#
+#   Helios, intelligent music.
+#   Copyright (C) 2015-2024 Cartesian Theatre. All rights reserved.
+#
+
+# System imports...
+import sqlite3
+
+# Other imports...
+import pytest
+
+# Helios...
+from helios_client_utilities.import_songs import ImportJournal
+
+# Journal in a temporary directory, closed after each test...
+@pytest.fixture
+def journal(tmp_path):
+    journal = ImportJournal(str(tmp_path / 'catalogue.csv.journal'))
+    yield journal
+    journal.close()
+
+# Get a song's state, path, fingerprint, and reason straight from the journal's
+#  database...
+def get_row(journal, reference):
+    with sqlite3.connect(journal.get_path()) as connection:
+        return connection.execute(
+            'SELECT state, path, fingerprint, reason FROM songs WHERE reference = ?;',
+            (reference, )).fetchone()
+
+# Only songs known to be on the server are skipped on resume. Failed and
+#  in-flight ones are queued again...
+def test_completed_references(journal):
+    journal.mark_uploaded('UPLOADED', 'abc')
+    journal.mark_exists('EXISTS')
+    journal.mark_duplicate('DUPLICATE', 'UPLOADED')
+    journal.mark_failed('FAILED', 'Conflict')
+    journal.mark_queued('QUEUED', 'queued.flac')
+    assert journal.get_completed_references() == {'UPLOADED', 'EXISTS', 'DUPLICATE'}
+
+# A song we uploaded stays uploaded if a later run finds it on the server...
+def test_exists_keeps_uploaded(journal):
+    journal.mark_uploaded('SONG', 'abc')
+    journal.mark_exists('SONG')
+    assert get_row(journal, 'SONG') == ('uploaded', None, 'abc', None)
+
+# A song that failed and was tried again loses its failure reason, and keeps
+#  its path and fingerprint once uploaded...
+def test_retry_after_failure(journal):
+    journal.mark_queued('SONG', 'song.flac')
+    journal.mark_failed('SONG', 'Server error')
+    assert get_row(journal, 'SONG') == ('failed', 'song.flac', None, 'Server error')
+    journal.mark_queued('SONG', 'song.flac')
+    journal.mark_uploaded('SONG', 'abc')
+    assert get_row(journal, 'SONG') == ('uploaded', 'song.flac', 'abc', None)
+
+# Every state is still there after the journal is reopened, with songs that
+#  were in flight counted as interrupted rather than completed...
+def test_survives_reopening(tmp_path):
+
+    # First run, which dies with one song in flight...
+    path = str(tmp_path / 'catalogue.csv.journal')
+    journal = ImportJournal(path)
+    journal.mark_uploaded('UPLOADED', 'abc')
+    journal.mark_failed('FAILED', 'Conflict')
+    journal.mark_queued('QUEUED', 'queued.flac')
+    journal.close()
+
+    # Resumed run...
+    journal = ImportJournal(path)
+    try:
+        assert journal.get_completed_references() == {'UPLOADED'}
+        assert journal.get_state_counts() == {'uploaded': 1, 'failed': 1, 'queued': 1}
+    finally:
+        journal.close()
@@ -0,0 +1,79 @@
+#
+#   Helios, intelligent music.
+#   Copyright (C) 2015-2024 Cartesian Theatre. All rights reserved.
+#
+
+# System imports...
+import os
+
+# Other imports...
+import pytest
+
+# Helios...
+from helios_client_utilities.common import get_song_reference
+from helios_client_utilities.import_songs import WatchedDirectoryReader
+
+# Relative paths that reduce to the same readable text, or to none at all...
+colliding_paths = [
+    '日本/曲.mp3',
+    '中文/歌.mp3',
+    'a-b.mp3',
+    'a_b.mp3',
+    'A.mp3',
+    'a.mp3',
+    'a.flac',
+    'x/a b.flac',
+    'x_a_b.flac',
+    'Björk/Jóga.flac'
+]
+
+# Every path gets its own reference, and none is empty...
+def test_unique():
+    references = [get_song_reference('', path) for path in colliding_paths]
+    assert all(references)
+    assert len(set(references)) == len(references)
+
+# References are readable where possible and the same every time...
+@pytest.mark.parametrize('relative_path, readable', [
+    ('Some Artist/Some Album/01 - Some Title.flac', 'SOME_ARTIST_SOME_ALBUM_01_SOME_TITLE_'),
+    ('Björk/Jóga.flac', 'BJORK_JOGA_'),
+    ('日本/曲.mp3', '')
+])
+def test_readable(relative_path, readable):
+    reference = get_song_reference('HOME_', relative_path)
+    assert reference.startswith('HOME_' + readable)
+    assert len(reference) == len('HOME_' + readable) + 12
+    assert reference == get_song_reference('HOME_', relative_path)
+
+# The platform's path separator doesn't change a reference...
+def test_separator_independent():
+    assert get_song_reference('', os.path.join('Artist', 'Title.flac')) == get_song_reference('', 'Artist/Title.flac')
+
+# Watched directory gives every song already in it the same reference as the
+#  catalogue generator would, and notes they were found by scanning...
+def test_watched_directory_references(tmp_path):
+
+    # Songs whose names would otherwise collide...
+    for relative_path in ('a-b.mp3', 'a_b.mp3', os.path.join('x', 'a b.flac'), 'x_a_b.flac'):
+        path = tmp_path / relative_path
+        path.parent.mkdir(exist_ok=True)
+        path.write_bytes(b'song')
+        os.utime(path, (0, 0))
+
+    # Take what the initial scan finds...
+    rows = []
+    iterator = iter(WatchedDirectoryReader(str(tmp_path), interval=0.1, method='poll'))
+    try:
+        for csv_row in iterator:
+            if csv_row is None:
+                break
+            rows.append(csv_row)
+    finally:
+        iterator.close()
+
+    # Check them...
+    assert len(rows) == 4
+    for csv_row in rows:
+        assert csv_row['found_by_scan']
+        assert csv_row['reference'] == get_song_reference('', os.path.relpath(csv_row['path'], str(tmp_path)))
+    assert len(set(csv_row['reference'] for csv_row in rows)) == 4
@@ -0,0 +1,180 @@
+#
+#   Helios, intelligent music.
+#   Copyright (C) 2015-2024 Cartesian Theatre. All rights reserved.
+#
+
+# System imports...
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import time
+
+# Other imports...
+import pytest
+
+# Helios...
+from helios_client_utilities.common import AsyncHeliosClient, ContentDigest, StreamingSongUpload
+
+# Song file whose size isn't a multiple of the chunk size or of three...
+@pytest.fixture
+def song_path(tmp_path):
+    path = tmp_path / 'song.flac'
+    path.write_bytes(os.urandom(100003))
+    return str(path)
+
+# Body decodes to the fields plus the file's contents, whether the file is read
+#  from disk or given already read...
+@pytest.mark.parametrize('from_memory', [False, True])
+def test_body(song_path, from_memory):
+    with open(song_path, 'rb') as file:
+        content = file.read()
+    body = StreamingSongUpload(
+        {'reference': 'SONG', 'title': 'Tïtle "quoted"'}, 'file', song_path, chunk_size=4096,
+        content=content if from_memory else None)
+    data = b''.join(body)
+    assert len(data) == len(body)
+    fields = json.loads(data)
+    assert fields['reference'] == 'SONG'
+    assert fields['title'] == 'Tïtle "quoted"'
+    assert base64.b64decode(fields['file']) == content
+
+# Resending the body, as a retried request does, gives the same digest of the
+#  file and doesn't count the resent bytes again...
+def test_resent_body_hash_and_progress(song_path):
+    digest = ContentDigest()
+    new_bytes_total = []
+    body = StreamingSongUpload(
+        {'reference': 'SONG'}, 'file', song_path, chunk_size=4096, content_hash=digest,
+        progress_callback=lambda bytes_read, new_bytes, bytes_total: new_bytes_total.append(new_bytes))
+    with open(song_path, 'rb') as file:
+        expected_digest = hashlib.sha256(file.read()).hexdigest()
+
+    # First pass...
+    b''.join(body)
+    assert digest.hexdigest() == expected_digest
+
+    # A pass abandoned part way through leaves the last complete digest...
+    iterator = iter(body)
+    next(iterator)
+    next(iterator)
+    iterator.close()
+    assert digest.hexdigest() == expected_digest
+
+    # A complete second pass...
+    b''.join(body)
+    assert digest.hexdigest() == expected_digest
+    assert sum(new_bytes_total) == len(body)
+
+# Minimal HTTP server which answers each request with an empty JSON object.
+#  If close_after_response is set, it closes each connection right after
+#  answering without saying so, like a server dropping an idle connection...
+async def start_server(close_after_response=False, request_bodies=None):
+
+    # Handle a connection...
+    async def handle(reader, writer):
+        try:
+            while True:
+
+                # Read headers...
+                head = await reader.readuntil(b'\r\n\r\n')
+                length = 0
+                for line in head.decode('latin-1').split('\r\n'):
+                    key, separator, value = line.partition(':')
+                    if key.lower() == 'content-length':
+                        length = int(value)
+
+                # Read body...
+                body = await reader.readexactly(length)
+                if request_bodies is not None:
+                    request_bodies.append(body)
+
+                # Answer...
+                writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: 2\r\n\r\n{}')
+                await writer.drain()
+                if close_after_response:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        writer.close()
+
+    # Start listening on any free port...
+    server = await asyncio.start_server(handle, '127.0.0.1', 0)
+    return server, server.sockets[0].getsockname()[1]
+
+# A request retried on a fresh connection because its idle one went stale
+#  resends the body, but its digest is still that of the file...
+def test_stale_connection_retry_digest(song_path):
+
+    async def run():
+        request_bodies = []
+        server, port = await start_server(close_after_response=True, request_bodies=request_bodies)
+        client = AsyncHeliosClient(host='127.0.0.1', port=port, tls=False)
+        try:
+
+            # First request leaves its connection idle, then the server drops it...
+            await client.request('GET', '/status')
+            await asyncio.sleep(0.1)
+
+            # Second request discovers that and tries again...
+            digest = ContentDigest()
+            body = StreamingSongUpload({'reference': 'SONG'}, 'file', song_path, chunk_size=4096, content_hash=digest)
+            (status_code, headers, response_body) = await client.request('POST', '/songs', body=body)
+            assert status_code == 200
+
+        finally:
+            await client.close()
+            server.close()
+            await server.wait_closed()
+        return digest, request_bodies
+
+    digest, request_bodies = asyncio.run(run())
+    with open(song_path, 'rb') as file:
+        content = file.read()
+    assert digest.hexdigest() == hashlib.sha256(content).hexdigest()
+    assert base64.b64decode(json.loads(request_bodies[-1])['file']) == content
+
+# Body which yields slowly, noting when it is closed...
+class SlowBody:
+
+    # Constructor...
+    def __init__(self):
+        self.closed = False
+
+    # Iterator method...
+    def __iter__(self):
+        try:
+            for index in range(20):
+                time.sleep(0.1)
+                yield b'x' * 10
+        finally:
+            self.closed = True
+
+    # Length of body...
+    def __len__(self):
+        return 200
+
+# Cancelling a request while a chunk of its body is still being read raises
+#  CancelledError, not an error about the body, which is closed once the read
+#  finishes...
+def test_cancel_during_body_read():
+
+    async def run():
+        server, port = await start_server()
+        client = AsyncHeliosClient(host='127.0.0.1', port=port, tls=False)
+        body = SlowBody()
+        try:
+            task = asyncio.create_task(client.request('POST', '/songs', body=body))
+            await asyncio.sleep(0.25)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            await asyncio.sleep(0.3)
+        finally:
+            await client.close()
+            server.close()
+            await server.wait_closed()
+        return body
+
+    assert asyncio.run(run()).closed
@@ -94,7 +94,7 @@ setup(
         'attrs >= 18.2.0',
         'PyGObject >= 3.22',
         'pygst',
-        'helios-client',
+        'helios-client >= 0.5.20241122',
         'importlib_resources',
         'keyring',
         'mutagen >= 1.3',
@@ -111,6 +111,9 @@ setup(
         'urllib3',
         'zeroconf >= 0.27.0'
     ],
+    extras_require={
+        'columnar': ['pyarrow']
+    },
     package_dir={'': 'Source'},
     packages=find_packages(where='Source'),
     data_files=[
@@ -118,11 +121,13 @@ setup(
         ('share/applications/helios-trainer/text', ['Data/share/applications/helios-trainer/text/quick_start_page.txt']),
         ('share/applications/helios-trainer', ['Data/share/applications/helios-trainer/login_logo.png']),
         ('share/bash-completion/completions', ['Data/share/bash-completion/completions/helios-add-song']),
+        ('share/bash-completion/completions', ['Data/share/bash-completion/completions/helios-catalogue-songs']),
         ('share/bash-completion/completions', ['Data/share/bash-completion/completions/helios-delete-song']),
         ('share/bash-completion/completions', ['Data/share/bash-completion/completions/helios-download-song']),
         ('share/bash-completion/completions', ['Data/share/bash-completion/completions/helios-get-song']),
         ('share/bash-completion/completions', ['Data/share/bash-completion/completions/helios-import-songs']),
         ('share/bash-completion/completions', ['Data/share/bash-completion/completions/helios-learn']),
+        ('share/bash-completion/completions', ['Data/share/bash-completion/completions/helios-mirror-songs']),
         ('share/bash-completion/completions', ['Data/share/bash-completion/completions/helios-modify-song']),
         ('share/bash-completion/completions', ['Data/share/bash-completion/completions/helios-provision-magnatune']),
         ('share/bash-completion/completions', ['Data/share/bash-completion/completions/helios-similar']),
@@ -145,12 +150,14 @@ setup(
     entry_points={
         'console_scripts': [
             'helios-add-song = helios_client_utilities.add_song:main',
+            'helios-catalogue-songs = helios_client_utilities.catalogue_songs:main',
             'helios-delete-song = helios_client_utilities.delete_song:main',
             'helios-download-song = helios_client_utilities.download_song:main',
             'helios-find-servers = helios_client_utilities.find_servers:main',
             'helios-get-song = helios_client_utilities.get_song:main',
             'helios-import-songs = helios_client_utilities.import_songs:main',
             'helios-learn = helios_client_utilities.learn:main',
+            'helios-mirror-songs = helios_client_utilities.mirror_songs:main',
             'helios-modify-song = helios_client_utilities.modify_song:main',
             'helios-provision-magnatune = helios_client_utilities.provision_magnatune:main',
             'helios-similar = helios_client_utilities.similar:main',